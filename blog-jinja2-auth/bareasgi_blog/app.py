@@ -1,11 +1,12 @@
 """Application"""
 
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import timedelta
 from functools import partial
-import sqlite3
-from typing import Mapping, Any
+import hashlib
+import os
+from typing import Mapping, Any, Optional
 
-import aiosqlite
 from bareasgi import (
     Application,
     Scope,
@@ -13,19 +14,69 @@ from bareasgi import (
     Message
 )
 import bareasgi_jinja2
-import jinja2
 import pkg_resources
 
+from .connection_pool import ConnectionPool
+from .migrations import migrate
+from .repository import make_record_unpacker, make_unpacker
+from .password_hasher import PasswordHasher
 from .auth_repository import AuthRepository
+from .key_ring import KeyRing
+from .revocation_store import RevocationStore
 from .token_manager import TokenManager
 from .jwt_authenticator import JwtAuthenticator
 from .auth_controller import AuthController
-from .blog_repository import BlogRepository
+from .rate_limiter import RateLimiter, TokenBucketTable
+from .cached_blog_repository import CachedBlogRepository
+from .entity_cache import EntityCache
+from .fragment_cache import FragmentCache
+from .response_cache import ResponseCache
+from .server_push import ServerPush, find_assets
+from .static_controller import StaticController
+from .templating import (
+    FirstRequestLogger,
+    create_environment,
+    precompile_templates
+)
 from .blog_controller import BlogController
 
 from .utils import parse_timedelta
 
 
+def _create_executor(kind: str, max_workers: Optional[int]) -> Executor:
+    if kind == 'process':
+        return ProcessPoolExecutor(max_workers)
+    if kind == 'thread':
+        return ThreadPoolExecutor(max_workers)
+    raise ValueError(f'Unknown executor "{kind}"')
+
+
+def _template_version(templates: str) -> str:
+    # A digest of the templates, so pages rendered by a new version of the
+    # templates get new entity tags.
+    digest = hashlib.blake2b(digest_size=8)
+    for root, dirs, files in os.walk(templates):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, templates).encode())
+            with open(path, 'rb') as file_ptr:
+                digest.update(file_ptr.read())
+    return digest.hexdigest()
+
+
+def _create_token_buckets(
+        config: Mapping[str, Any],
+        name: str
+) -> TokenBucketTable:
+    return TokenBucketTable(
+        config[name]['capacity'],
+        config[name]['rate'],
+        config.get('shard_count', 16),
+        parse_timedelta(config.get('sweep_interval', '1m')).total_seconds()
+    )
+
+
 async def _on_startup(
         app: Application,
         _scope: Scope,
@@ -34,46 +85,128 @@ async def _on_startup(
 ) -> None:
     config = info['config']
 
-    sqlite_filename = config['sqlite']['filename']
+    sqlite_config = config['sqlite']
 
-    conn = await aiosqlite.connect(
-        sqlite_filename,
-        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
+    group_commit_config = sqlite_config.get('group_commit') or {}
+    pool = ConnectionPool(
+        sqlite_config['filename'],
+        sqlite_config.get('pool_size', 4),
+        group_commit_config.get('window'),
+        group_commit_config.get('max_batch', 64)
+    )
+    await pool.open()
+    await migrate(pool.writer)
+
+    row_factory = (
+        make_record_unpacker
+        if sqlite_config.get('row_mode') == 'record'
+        else make_unpacker
     )
 
     admin_username = config['auth']['admin_username']
     admin_password = config['auth']['admin_password']
-    auth_repository = AuthRepository(conn, admin_username, admin_password)
+    hashing_config = config['auth'].get('password_hashing') or {}
+    hashing_executor = _create_executor(
+        hashing_config.get('executor', 'thread'),
+        hashing_config.get('max_workers')
+    )
+    password_hasher = PasswordHasher(
+        hashing_executor,
+        hashing_config.get('scheme', 'scrypt')
+    )
+    user_cache_config = config['cache']['users']
+    user_cache_ttl = parse_timedelta(user_cache_config['ttl'])
+    user_cache = EntityCache(
+        user_cache_config['max_size'],
+        user_cache_ttl.total_seconds() if user_cache_ttl else None
+    )
+    auth_repository = AuthRepository(
+        pool,
+        admin_username,
+        admin_password,
+        password_hasher,
+        user_cache,
+        row_factory
+    )
     await auth_repository.initialise()
 
     auth_config = config['authentication']
+    key_ring = (
+        KeyRing.from_config(auth_config['signing'])
+        if 'signing' in auth_config
+        else KeyRing.from_secret(auth_config['secret'])
+    )
     token_manager = TokenManager(
-        auth_config['secret'],
+        key_ring,
         parse_timedelta(auth_config['token_expiry']) or timedelta(hours=1),
         auth_config['issuer'],
         auth_config['cookie_name'],
         auth_config['domain'],
         auth_config['path'],
-        parse_timedelta(auth_config['max_age']) or timedelta(days=1)
+        parse_timedelta(auth_config['max_age']) or timedelta(days=1),
+        auth_config.get('token_cache_size', 1024)
+    )
+
+    revocations = RevocationStore(
+        pool,
+        parse_timedelta(auth_config.get('revocation_refresh_interval', '5s'))
+        or timedelta(seconds=5)
     )
+    await revocations.load()
 
     authenticator = JwtAuthenticator(
         auth_repository,
         token_manager,
+        revocations,
         '/auth/login',
-        auth_config['login_expiry']
+        parse_timedelta(auth_config['login_expiry']) or timedelta(days=1),
+        parse_timedelta(auth_config.get('renewal_cache_ttl', '30s'))
+        or timedelta(seconds=30),
+        auth_config.get('renewal_cache_size', 1024)
+    )
+
+    rate_limit_config = config['rate_limit']
+    rate_limiter = RateLimiter(
+        _create_token_buckets(rate_limit_config, 'address'),
+        _create_token_buckets(rate_limit_config, 'username'),
+        max_body_size=rate_limit_config.get('max_body_size', 4096)
     )
 
-    auth_controller = AuthController(auth_repository, authenticator)
+    auth_controller = AuthController(
+        auth_repository,
+        authenticator,
+        rate_limiter
+    )
     auth_controller.add_routes(app)
 
-    blog_repository = BlogRepository(conn)
+    blog_cache_config = config['cache']['blog_entries']
+    blog_cache_ttl = parse_timedelta(blog_cache_config['ttl'])
+    blog_cache = EntityCache(
+        blog_cache_config['max_size'],
+        blog_cache_ttl.total_seconds() if blog_cache_ttl else None
+    )
+    blog_repository = CachedBlogRepository(pool, blog_cache, row_factory)
     await blog_repository.initialise()
 
-    blog_controller = BlogController(blog_repository, authenticator)
+    page_cache_config = config['cache']['pages']
+    page_cache_ttl = parse_timedelta(page_cache_config['ttl'])
+    page_cache = ResponseCache(
+        page_cache_config['max_bytes'],
+        page_cache_config['key'],
+        page_cache_ttl.total_seconds() if page_cache_ttl else None
+    )
+    blog_repository.add_write_listener(page_cache.clear)
+
+    blog_controller = BlogController(
+        blog_repository,
+        authenticator,
+        info['template_version'],
+        page_cache
+    )
     blog_controller.add_routes(app)
 
-    info['aiosqlite_conn'] = conn
+    info['connection_pool'] = pool
+    info['hashing_executor'] = hashing_executor
 
 
 async def _on_shutdown(
@@ -81,22 +214,61 @@ async def _on_shutdown(
         info: Info,
         _request: Message
 ) -> None:
-    conn: aiosqlite.Connection = info['aiosqlite_conn']
-    await conn.close()
+    pool: ConnectionPool = info['connection_pool']
+    await pool.close()
+    hashing_executor: Executor = info['hashing_executor']
+    hashing_executor.shutdown()
 
 
 def create_application(config: Mapping[str, Any]) -> Application:
     """Create the application"""
     templates = pkg_resources.resource_filename(__name__, "templates")
+    static = pkg_resources.resource_filename(__name__, "static")
+
+    templates_config = config['templates']
+
+    env = create_environment(
+        templates,
+        templates_config.get('bytecode_cache_dir'),
+        FragmentCache(config['cache']['fragments']['max_bytes'])
+    )
+    if templates_config['precompile']:
+        precompile_templates(env)
 
-    app = Application(info=dict(config=config))
+    # The assets to push are declared in the config, or found in the
+    # template the pages extend.
+    push_config = config['push']
+    server_push = ServerPush(
+        push_config['assets']
+        if 'assets' in push_config
+        else find_assets(env, push_config['template']),
+        (
+            parse_timedelta(push_config['idle_timeout'])
+            or timedelta(seconds=5)
+        ).total_seconds(),
+        push_config.get('max_connections', 1024)
+    )
 
-    env = jinja2.Environment(
-        loader=jinja2.FileSystemLoader(templates),
-        autoescape=jinja2.select_autoescape(['html', 'xml']),
-        enable_async=True
+    app = Application(
+        middlewares=[
+            FirstRequestLogger(templates_config['log_first_requests']),
+            server_push
+        ],
+        info=dict(
+            config=config,
+            template_version=_template_version(templates)
+        )
     )
+
     bareasgi_jinja2.add_jinja2(app, env)
 
+    static_controller = StaticController(
+        static,
+        '/static',
+        parse_timedelta(config['static']['max_age']) or timedelta(days=1)
+    )
+    static_controller.add_routes(app)
+
     app.startup_handlers.append(partial(_on_startup, app))
+    app.shutdown_handlers.append(_on_shutdown)
     return app
@@ -18,19 +18,26 @@ import bareasgi_jinja2
 
 from .auth_repository import AuthRepository
 from .jwt_authenticator import JwtAuthenticator
+from .rate_limiter import RateLimiter
+from .templating import stream_template
+from .utils import decode_cursor
 
 LOGGER = logging.getLogger(__name__)
 
+ADMIN_PAGE_SIZE = 100
+
 class AuthController:
     """AuthController"""
 
     def __init__(
             self,
             repository: AuthRepository,
-            authenticator: JwtAuthenticator
+            authenticator: JwtAuthenticator,
+            rate_limiter: RateLimiter
     ) -> None:
         self._repository = repository
         self._authenticator = authenticator
+        self._rate_limiter = rate_limiter
 
     def add_routes(self, app: Application) -> None:
         """Add routes to the application
@@ -51,7 +58,7 @@ class AuthController:
         app.http_router.add(
             {'POST'},
             '/auth/register',
-            self._save_register
+            mw(self._rate_limiter, handler=self._save_register)
         )
         app.http_router.add(
             {'GET'},
@@ -61,7 +68,7 @@ class AuthController:
         app.http_router.add(
             {'POST'},
             '/auth/login',
-            self._approve_login
+            mw(self._rate_limiter, handler=self._approve_login)
         )
         app.http_router.add(
             {'GET'},
@@ -83,6 +90,11 @@ class AuthController:
             '/auth/change-password',
             mw(self._authenticator, handler=self._save_change_password)
         )
+        app.http_router.add(
+            {'POST'},
+            '/auth/logout',
+            mw(self._authenticator, handler=self._logout)
+        )
 
     async def _index_redirect(
             self,
@@ -158,12 +170,9 @@ class AuthController:
             args = dict(parse_qsl(text))
 
             username = args['username']
-            if not await self._repository.is_valid_password(username, args['password']):
-                return 303, [(b'Location', b'/auth/login')]
-
-            user = await self._repository.read_by_username(username)
+            user = await self._repository.authenticate(username, args['password'])
             if user is None:
-                raise RuntimeError("Failed to find user")
+                return 303, [(b'Location', b'/auth/login')]
 
             set_cookie = self._authenticator.create_token(username, user['id'], user['role'])
             location = b'/auth/admin' if user['role'] == 'admin' else b'/blog/index'
@@ -179,10 +188,28 @@ class AuthController:
             LOGGER.exception('login failed')
             return 500
 
-    @bareasgi_jinja2.template('auth/admin.html')
     async def _admin(
             self,
-            _scope: Scope,
+            scope: Scope,
+            info: Info,
+            matches: RouteMatches,
+            content: Content
+    ) -> HttpResponse:
+        # The template can only give the page, so a bad cursor is refused
+        # before it is rendered.
+        args = dict(parse_qsl(scope['query_string'] or b''))
+        if b'cursor' in args:
+            try:
+                decode_cursor(args[b'cursor'].decode(), 2)
+            except ValueError:
+                return 400
+
+        return await self._admin_page(scope, info, matches, content)
+
+    @stream_template('auth/admin.html')
+    async def _admin_page(
+            self,
+            scope: Scope,
             info: Info,
             _matches: RouteMatches,
             _content: Content
@@ -191,13 +218,17 @@ class AuthController:
         if jwt is None or not jwt.get('role') == 'admin':
             raise RuntimeError("Unauthenticated")
 
-        users = await self._repository.read_many(
+        args = dict(parse_qsl(scope['query_string'] or b''))
+        cursor = args[b'cursor'].decode() if b'cursor' in args else None
+
+        users, next_cursor = await self._repository.read_page(
             ['id', 'username', 'role'],
             'username',
             True,
-            10000
+            ADMIN_PAGE_SIZE,
+            cursor
         )
-        return {'users': users}
+        return {'users': users, 'next_cursor': next_cursor}
 
     async def _grant(
             self,
@@ -238,15 +269,16 @@ class AuthController:
 
     async def _save_change_password(
             self,
-            scope: Scope,
-            _info: Info,
+            _scope: Scope,
+            info: Info,
             _matches: RouteMatches,
             content: Content
     ) -> HttpResponse:
         try:
             text = await text_reader(content)
             args: Dict[str, Any] = dict(parse_qsl(text))
-            username = args['username']
+            # The password changed is always that of the user logged in.
+            username = info['jwt']['sub']
             old_password = args['old_password']
             new_password = args['new_password']
 
@@ -257,7 +289,38 @@ class AuthController:
             if not is_ok:
                 raise RuntimeError("Failed to change password")
 
-            return 303, [(b'Location', b'/blog/index')]
+            # End every session which used the old password.
+            await self._authenticator.revoke_user(username)
+            await self._authenticator.revoke_token(info['jwt'])
+
+            return (
+                303,
+                [
+                    (b'set-cookie', self._authenticator.create_expired_token()),
+                    (b'Location', b'/auth/login')
+                ]
+            )
         except:  # pylint: disable=bare-except
             LOGGER.exception('failed to change password')
             return 500
+
+    async def _logout(
+            self,
+            _scope: Scope,
+            info: Info,
+            _matches: RouteMatches,
+            _content: Content
+    ) -> HttpResponse:
+        try:
+            await self._authenticator.revoke_token(info['jwt'])
+
+            return (
+                303,
+                [
+                    (b'set-cookie', self._authenticator.create_expired_token()),
+                    (b'Location', b'/auth/login')
+                ]
+            )
+        except:  # pylint: disable=bare-except
+            LOGGER.exception('logout failed')
+            return 500
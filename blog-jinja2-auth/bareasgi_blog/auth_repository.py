@@ -1,12 +1,14 @@
 """Auth Repository"""
 
-import hashlib
-from typing import Any, Dict, List, Optional, Tuple
-import uuid
+import logging
+from typing import Any, Dict, List, Optional
 
-import aiosqlite
+from .connection_pool import ConnectionPool
+from .entity_cache import EntityCache
+from .password_hasher import PasswordHasher
+from .repository import Repository, Row, RowFactory, make_unpacker
 
-from .repository import Repository
+LOGGER = logging.getLogger(__name__)
 
 
 class AuthRepository(Repository):
@@ -14,18 +16,53 @@ class AuthRepository(Repository):
 
     def __init__(
             self,
-            conn: aiosqlite.Connection,
+            pool: ConnectionPool,
             admin_username: str,
-            admin_password: str
+            admin_password: str,
+            password_hasher: Optional[PasswordHasher] = None,
+            user_cache: Optional[EntityCache] = None,
+            row_factory: RowFactory = make_unpacker
     ) -> None:
-        super().__init__(conn, 'users')
+        super().__init__(pool, 'users', row_factory)
         self._admin_username = admin_username
         self._admin_password = admin_password
+        self._password_hasher = password_hasher or PasswordHasher()
+        self._user_cache = user_cache or EntityCache(1024)
+        self._user_versions: Dict[str, int] = {}
+        self._all_users_version = 0
+
+    def user_version(self, username: str) -> int:
+        """The version of a user, which changes whenever the user is updated
+        or deleted.
+
+        :param username: The username
+        :type username: str
+        :return: The version
+        :rtype: int
+        """
+        # Both counts only increase, so the sum changes whenever either does.
+        return self._all_users_version + self._user_versions.get(username, 0)
+
+    def _invalidate(self, *usernames: Optional[str]) -> None:
+        for username in usernames:
+            if username is not None:
+                self._user_cache.invalidate(username)
+                self._user_versions[username] = (
+                    self._user_versions.get(username, 0) + 1
+                )
+
+    def _invalidate_all(self) -> None:
+        self._user_cache.clear()
+        self._all_users_version += 1
+
+    async def _read_username(self, id_: int) -> Optional[str]:
+        user = await self.read_by_id(id_, ['username'])
+        return user['username'] if user is not None else None
 
     async def create(self, **kwargs) -> int:
         inserts = dict(kwargs)
         password = inserts.pop('password')
-        hash_, salt = self._hash_password(password)
+        hash_, salt = await self._password_hasher.hash(password)
         inserts['hash'] = hash_
         inserts['salt'] = salt
         return await super().create(**inserts)
@@ -33,25 +70,47 @@ class AuthRepository(Repository):
     async def read_by_username(
             self,
             username: str
-    ) -> Optional[Dict[str, Any]]:
-        """Read by username"""
-        return await self.read_by_column('username', username, None)
+    ) -> Optional[Row]:
+        """Read by username
+
+        The users are cached, so the rows returned are shared and must not be
+        modified.
+        """
+        user = self._user_cache.get(username)
+        if user is not None:
+            return user
+
+        generation = self._user_cache.generation
+        user = await self.read_by_column('username', username, None)
+        if user is not None:
+            self._user_cache.put(username, user, generation)
+        return user
+
+    async def update(self, id_: int, **kwargs) -> bool:
+        # The cache is keyed by username, so the username is read first.
+        username = await self._read_username(id_)
+        try:
+            return await super().update(id_, **kwargs)
+        finally:
+            self._invalidate(username, kwargs.get('username'))
+
+    async def delete(self, id_: int) -> bool:
+        username = await self._read_username(id_)
+        try:
+            return await super().delete(id_)
+        finally:
+            self._invalidate(username)
+
+    async def update_by_column(self, column: str, value: Any, **kwargs) -> int:
+        try:
+            return await super().update_by_column(column, value, **kwargs)
+        finally:
+            if column == 'username':
+                self._invalidate(value, kwargs.get('username'))
+            else:
+                self._invalidate_all()
 
     async def initialise(self) -> None:
-        await self._conn.execute("""
-CREATE TABLE IF NOT EXISTS users
-(
-    id INTEGER PRIMARY KEY,
-    username TEXT NOT NULL,
-    hash TEXT NOT NULL,
-    salt TEXT NOT NULL,
-    role TEXT NOT NULL,
-
-    UNIQUE(username)
-)
-""")
-        await self._conn.commit()
-
         admins = await self.read_many_by_role('admin', 1)
         if not admins:
             await self._create_admin_user()
@@ -60,7 +119,7 @@ CREATE TABLE IF NOT EXISTS users
             self,
             role: str,
             limit: int
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Row]:
         """Read many by role"""
         return await self.read_many_by_column(
             'role',
@@ -71,21 +130,48 @@ CREATE TABLE IF NOT EXISTS users
             limit
         )
 
+    async def authenticate(self, username: str, password: str) -> Optional[Row]:
+        """Authenticate a user.
+
+        The user is read once, from the cache if possible, and used both to
+        check the password and as the result.
+
+        :param username: The username
+        :type username: str
+        :param password: The password
+        :type password: str
+        :return: The user if the password is valid, otherwise None
+        :rtype: Optional[Row]
+        """
+        user = await self.read_by_username(username)
+        if user is None:
+            return None
+        if not await self._password_hasher.verify(
+                password,
+                user['hash'],
+                user['salt']
+        ):
+            return None
+        if self._password_hasher.needs_upgrade(user['hash']):
+            LOGGER.info('Upgrading the password hash for %s', username)
+            hash_, salt = await self._password_hasher.hash(password)
+            await self.update(user['id'], hash=hash_, salt=salt)
+        return user
+
     async def is_valid_password(self, username: str, password: str) -> bool:
         """Check a password"""
-        auth = await self.read_by_column('username', username, ['hash', 'salt'])
-        if auth is None:
-            return False
-        hash_ = self._create_hash(password, auth['salt'])
-        return auth['hash'] == hash_
+        return await self.authenticate(username, password) is not None
 
     async def change_password(self, username: str, password: str) -> bool:
         """Change a users password"""
-        hash_, salt = self._hash_password(password)
-        user = await self.read_by_username(username)
-        if user is None:
-            return False
-        return await self.update(user['id'], hash=hash_, salt=salt)
+        hash_, salt = await self._password_hasher.hash(password)
+        count = await self.update_by_column(
+            'username',
+            username,
+            hash=hash_,
+            salt=salt
+        )
+        return count == 1
 
     async def _create_admin_user(self) -> None:
         admin = {
@@ -94,13 +180,3 @@ CREATE TABLE IF NOT EXISTS users
             'role': 'admin'
         }
         await self.create(**admin)
-
-    @classmethod
-    def _hash_password(cls, password: str) -> Tuple[str, str]:
-        salt = uuid.uuid4().hex
-        hash_ = cls._create_hash(password, salt)
-        return hash_, salt
-
-    @classmethod
-    def _create_hash(cls, password, salt) -> str:
-        return hashlib.sha512((password + salt).encode()).hexdigest()
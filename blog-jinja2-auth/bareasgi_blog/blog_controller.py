@@ -1,6 +1,9 @@
 """Blog controller"""
 
-from typing import Any, Dict
+from datetime import datetime
+import logging
+import sqlite3
+from typing import Any, Dict, List, Optional
 from urllib.parse import parse_qsl
 
 from bareasgi import (
@@ -10,13 +13,32 @@ from bareasgi import (
     RouteMatches,
     Content,
     HttpResponse,
-    text_reader
+    text_reader,
+    bytes_writer
 )
 from bareasgi.middleware import mw
 import bareasgi_jinja2
 
 from .blog_repository import BlogRepository
+from .conditional import (
+    is_conditional,
+    is_not_modified,
+    make_etag,
+    validator_headers
+)
 from .jwt_authenticator import JwtAuthenticator
+from .response_cache import ResponseCache
+from .templating import stream_template
+from .utils import NdjsonError, ndjson_reader
+from . import serializer
+
+LOGGER = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+
+# The pages are rendered for a user, so they must not be kept by a shared
+# cache.
+PAGE_CACHE_CONTROL = b'private, no-cache'
 
 
 class BlogController:
@@ -25,10 +47,14 @@ class BlogController:
     def __init__(
             self,
             repository: BlogRepository,
-            authenticator: JwtAuthenticator
+            authenticator: JwtAuthenticator,
+            template_version: str = '',
+            response_cache: Optional[ResponseCache] = None
     ) -> None:
         self._repository = repository
         self._authenticator = authenticator
+        self._template_version = template_version
+        self._response_cache = response_cache
 
     def add_routes(self, app: Application) -> None:
         """Add routes to the application
@@ -36,10 +62,15 @@ class BlogController:
         :param app: The ASGI application
         :type app: Application
         """
+        # The index is the most requested page, so it is served from the
+        # response cache when there is one.
+        index_middleware = [self._authenticator]
+        if self._response_cache is not None:
+            index_middleware.append(self._response_cache)
         app.http_router.add(
             {'GET'},
             '/blog/index',
-            mw(self._authenticator, handler=self._index)
+            mw(*index_middleware, handler=self._index)
         )
         app.http_router.add(
             {'GET'},
@@ -71,9 +102,14 @@ class BlogController:
             '/blog/delete',
             mw(self._authenticator, handler=self._delete)
         )
+        app.http_router.add(
+            {'POST'},
+            '/blog/import',
+            mw(self._authenticator, handler=self._import)
+        )
 
 
-    @bareasgi_jinja2.template('blog/index.html')
+    @stream_template('blog/index.html')
     async def _index(
             self,
             _scope: Scope,
@@ -142,24 +178,59 @@ class BlogController:
         except:  # pylint: disable=bare-except
             return 500
 
-    @bareasgi_jinja2.template('blog/read.html')
     async def _read(
             self,
             scope: Scope,
             info: Info,
-            _matches: RouteMatches,
-            _content: Content
-    ) -> Dict[str, Any]:
+            matches: RouteMatches,
+            content: Content
+    ) -> HttpResponse:
+        """Read a blog entry.
+
+        The page depends on the user and the templates as well as the entry,
+        so they are part of the entity tag. When the client sends validators,
+        only the time the entry was updated is read to check them, and an
+        unchanged page gets a 304.
+        """
         jwt = info['jwt']
         args = dict(parse_qsl(scope['query_string'] or b''))
         blog_entry_id = int(args[b'id'])
+        variant = f'{jwt["sub"]}:{jwt["role"]}:{self._template_version}'
+
+        if is_conditional(scope['headers']):
+            updated = await self._repository.read_updated(blog_entry_id)
+            if updated is not None:
+                etag = make_etag(blog_entry_id, updated, variant)
+                if is_not_modified(scope['headers'], etag, updated):
+                    return (
+                        304,
+                        validator_headers(etag, updated, PAGE_CACHE_CONTROL)
+                    )
+
         blog_entry = await self._repository.read_by_id(blog_entry_id, None)
-        return {
-            'blog_entry': blog_entry,
-            'role': jwt['role'],
-            'username': jwt['sub'],
-            'user_id': jwt['user_id']
-        }
+
+        @bareasgi_jinja2.template('blog/read.html')
+        async def render(
+                _scope: Scope,
+                _info: Info,
+                _matches: RouteMatches,
+                _content: Content
+        ) -> Dict[str, Any]:
+            return {
+                'blog_entry': blog_entry,
+                'role': jwt['role'],
+                'username': jwt['sub'],
+                'user_id': jwt['user_id']
+            }
+
+        status, headers, *body = await render(scope, info, matches, content)
+        if status == 200 and blog_entry is not None:
+            headers += validator_headers(
+                make_etag(blog_entry_id, blog_entry['updated'], variant),
+                blog_entry['updated'],
+                PAGE_CACHE_CONTROL
+            )
+        return (status, headers, *body)
 
     @bareasgi_jinja2.template('blog/edit.html')
     async def _update(
@@ -234,3 +305,102 @@ class BlogController:
             return 303, [(b'Location', b'/blog/index')]
         except:  # pylint: disable=bare-except
             return 500
+
+    async def _import(
+            self,
+            _scope: Scope,
+            info: Info,
+            _matches: RouteMatches,
+            content: Content
+    ) -> HttpResponse:
+        """Import blog entries from newline delimited JSON.
+
+        The entries are inserted in batches as the body is read, so the
+        memory used does not depend on the size of the upload. Each batch is
+        committed when it is inserted. If a line is invalid, or a batch can't
+        be inserted, the response is a 400 giving the number of entries
+        imported, the line which failed, and the line to resume the import
+        from. Every entry before that line has been imported.
+        """
+        try:
+            jwt = info['jwt']
+            if jwt['role'] not in ['admin', 'blogger']:
+                return 401
+
+            count = 0
+            batch: List[Dict[str, Any]] = []
+            batch_line = 1
+            try:
+                async for line, value in ndjson_reader(content):
+                    if not batch:
+                        batch_line = line
+                    batch.append(
+                        _make_import_entry(line, value, jwt['user_id'])
+                    )
+                    if len(batch) == IMPORT_BATCH_SIZE:
+                        count += await self._repository.create_many(batch)
+                        batch = []
+                if batch:
+                    count += await self._repository.create_many(batch)
+            except NdjsonError as error:
+                return _import_failed(
+                    count,
+                    error.line,
+                    batch_line if batch else error.line,
+                    str(error)
+                )
+            except sqlite3.IntegrityError as error:
+                return _import_failed(
+                    count,
+                    batch_line,
+                    batch_line,
+                    f'Line {batch_line}: {error}'
+                )
+
+            return (
+                200,
+                [(b'content-type', b'application/json')],
+                bytes_writer(serializer.dumps({'count': count}))
+            )
+        except:  # pylint: disable=bare-except
+            LOGGER.exception('import failed')
+            return 500
+
+
+def _import_failed(
+        count: int,
+        line: int,
+        resume_from: int,
+        error: str
+) -> HttpResponse:
+    return (
+        400,
+        [(b'content-type', b'application/json')],
+        bytes_writer(serializer.dumps({
+            'count': count,
+            'line': line,
+            'resume_from': resume_from,
+            'error': error
+        }))
+    )
+
+
+def _make_import_entry(
+        line: int,
+        value: Dict[str, Any],
+        user_id: int
+) -> Dict[str, Any]:
+    try:
+        entry: Dict[str, Any] = {}
+        if 'created' in value:
+            entry['created'] = datetime.fromisoformat(value['created'])
+            entry['updated'] = datetime.fromisoformat(
+                value.get('updated', value['created'])
+            )
+        entry['user_id'] = user_id
+        entry['title'] = value['title']
+        entry['description'] = value.get('description')
+        entry['content'] = value.get('content')
+        return entry
+    except (AttributeError, KeyError, TypeError, ValueError) as error:
+        raise NdjsonError(line, f'Invalid blog entry: {error!r}') from error
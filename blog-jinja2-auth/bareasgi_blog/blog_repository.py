@@ -3,20 +3,49 @@
 from datetime import datetime
 from typing import (
     Any,
+    Callable,
     Dict,
     List,
-    Optional
+    Optional,
+    Tuple
 )
 
-import aiosqlite
-
-from bareasgi_blog.repository import Repository, make_unpacker
+from bareasgi_blog.connection_pool import ConnectionPool
+from bareasgi_blog.repository import (
+    Repository,
+    Page,
+    Row,
+    RowFactory,
+    keyset_columns,
+    keyset_where,
+    make_page,
+    make_unpacker
+)
+from bareasgi_blog.utils import decode_cursor
 
 class BlogRepository(Repository):
     """"BlogRepository"""
 
-    def __init__(self, conn: aiosqlite.Connection) -> None:
-        super().__init__(conn, 'blog_entries')
+    def __init__(
+            self,
+            pool: ConnectionPool,
+            row_factory: RowFactory = make_unpacker
+    ) -> None:
+        super().__init__(pool, 'blog_entries', row_factory)
+        self._write_listeners: List[Callable[[], None]] = []
+
+    def add_write_listener(self, listener: Callable[[], None]) -> None:
+        """Add a function to call after the blog entries have been written,
+        so anything derived from them can be invalidated
+
+        :param listener: The function to call
+        :type listener: Callable[[], None]
+        """
+        self._write_listeners.append(listener)
+
+    def _notify_write(self) -> None:
+        for listener in self._write_listeners:
+            listener()
 
     async def create(self, **kwargs) -> int:
         now = datetime.utcnow()
@@ -25,53 +54,112 @@ class BlogRepository(Repository):
             'updated': now
         }
         inserts.update(kwargs)
-        return await super().create(**inserts)
+        try:
+            return await super().create(**inserts)
+        finally:
+            self._notify_write()
+
+    async def create_many(self, rows: List[Dict[str, Any]]) -> int:
+        now = datetime.utcnow()
+        inserts = []
+        for row in rows:
+            insert: Dict[str, Any] = {
+                'created': now,
+                'updated': now
+            }
+            insert.update(row)
+            inserts.append(insert)
+        try:
+            return await super().create_many(inserts)
+        finally:
+            self._notify_write()
 
     async def read_by_column(
             self,
             column: str,
             value: Any,
             columns: Optional[List[str]]
-    ) -> Optional[Dict[str, Any]]:
+    ) -> Optional[Row]:
         """Read a record by a column value"""
-        stmt = f"""
-SELECT users.username,{','.join(f'{self.table}.{column}' for column in columns) if columns else '*'}
+        selected = tuple(columns or ())
+        stmt = self._statements.statement(
+            ('read_by_column', self.table, column, selected),
+            (self.table, column, *selected),
+            lambda: f"""
+SELECT users.username,{','.join(f'{self.table}.{name}' for name in selected) if selected else f'{self.table}.*'}
 FROM {self.table}
 JOIN users
 ON users.id = {self.table}.user_id
 WHERE {self.table}.{column} = ?
 """
+        )
         args = (value,)
 
-        async with self._conn.cursor() as cur:
+        async with self._pool.reader() as conn, conn.cursor() as cur:
             await cur.execute(stmt, args)
             row = await cur.fetchone()
             if row is None:
                 return None
-            result = make_unpacker(cur)(row)
+            result = self._row_factory(cur)(row)
             return result
 
+    async def read_updated(self, id_: int) -> Optional[datetime]:
+        """Read the time a blog entry was last updated, without reading the
+        entry itself
+
+        :param id_: The id of the blog entry
+        :type id_: int
+        :return: The time the entry was updated, or None if there is no entry
+        :rtype: Optional[datetime]
+        """
+        stmt = self._statements.statement(
+            ('read_updated', self.table),
+            (self.table,),
+            lambda: f"""
+SELECT updated
+FROM {self.table}
+WHERE id = ?
+"""
+        )
+        args = (id_,)
+
+        async with self._pool.reader() as conn, conn.cursor() as cur:
+            await cur.execute(stmt, args)
+            row = await cur.fetchone()
+            return row[0] if row is not None else None
+
     async def read_many(
             self,
             columns: Optional[List[str]],
             order_by_column: str,
             order_by_ascending: bool,
             limit: int
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Row]:
         """Read many records"""
-        stmt = f"""
-SELECT users.username,{','.join(f'{self.table}.{column}' for column in columns) if columns else '*'}
+        selected = tuple(columns or ())
+        stmt = self._statements.statement(
+            (
+                'read_many',
+                self.table,
+                selected,
+                order_by_column,
+                order_by_ascending
+            ),
+            (self.table, order_by_column, *selected),
+            lambda: f"""
+SELECT users.username,{','.join(f'{self.table}.{name}' for name in selected) if selected else f'{self.table}.*'}
 FROM {self.table}
 JOIN users
 ON users.id = {self.table}.user_id
 ORDER BY {order_by_column} {'ASC' if order_by_ascending else 'DESC'}
 LIMIT ?
 """
+        )
         args = (limit,)
 
-        async with self._conn.cursor() as cur:
+        async with self._pool.reader() as conn, conn.cursor() as cur:
             await cur.execute(stmt, args)
-            unpack = make_unpacker(cur)
+            unpack = self._row_factory(cur)
             values = [unpack(row) async for row in cur]
             return values
 
@@ -81,7 +169,7 @@ LIMIT ?
             end_date: datetime,
             columns: Optional[List[str]],
             limit: int
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Row]:
         """Read between the start and end date
 
         :param start_date: The start date
@@ -93,7 +181,7 @@ LIMIT ?
         :param limit: The maximum number of entries to return
         :type limit: int
         :return: The entries found
-        :rtype: List[Dict[str, Any]]
+        :rtype: List[Row]
         """
         return await self.read_between_column(
             'created',
@@ -105,6 +193,92 @@ LIMIT ?
             limit
         )
 
+    async def read_page(
+            self,
+            columns: Optional[List[str]],
+            order_by_column: str,
+            order_by_ascending: bool,
+            limit: int,
+            cursor: Optional[str] = None,
+            between: Optional[Tuple[Any, Any]] = None
+    ) -> Page:
+        selected = keyset_columns(columns, order_by_column)
+        has_cursor = cursor is not None
+        has_between = between is not None
+        direction = 'ASC' if order_by_ascending else 'DESC'
+        stmt = self._statements.statement(
+            (
+                'read_page',
+                self.table,
+                selected,
+                order_by_column,
+                order_by_ascending,
+                has_cursor,
+                has_between
+            ),
+            (self.table, order_by_column, *selected),
+            lambda: f"""
+SELECT users.username,{','.join(f'{self.table}.{name}' for name in selected) if selected else f'{self.table}.*'}
+FROM {self.table}
+JOIN users
+ON users.id = {self.table}.user_id
+{keyset_where(
+    f'{self.table}.{order_by_column}',
+    f'{self.table}.id',
+    order_by_ascending,
+    has_between,
+    has_cursor
+)}
+ORDER BY {self.table}.{order_by_column} {direction},{self.table}.id {direction}
+LIMIT ?
+"""
+        )
+        args = (
+            *(between or ()),
+            *(decode_cursor(cursor, 2) if cursor is not None else ()),
+            limit + 1
+        )
+
+        async with self._pool.reader() as conn, conn.cursor() as cur:
+            await cur.execute(stmt, args)
+            unpack = self._row_factory(cur)
+            values = [unpack(row) async for row in cur]
+            return make_page(values, order_by_column, limit)
+
+    async def read_between_page(
+            self,
+            start_date: datetime,
+            end_date: datetime,
+            columns: Optional[List[str]],
+            limit: int,
+            cursor: Optional[str] = None
+    ) -> Page:
+        """Read a page of entries between the start and end date, latest
+        first
+
+        :param start_date: The start date
+        :type start_date: datetime
+        :param end_date: The end date
+        :type end_date: datetime
+        :param columns: The columns to return
+        :type columns: Optional[List[str]]
+        :param limit: The maximum number of entries to return
+        :type limit: int
+        :param cursor: The cursor returned with the previous page, defaults
+            to None
+        :type cursor: Optional[str], optional
+        :return: The entries found and the cursor for the next page
+        :rtype: Tuple[List[Row], Optional[str]]
+        """
+        return await self.read_page(
+            columns,
+            'created',
+            False,
+            limit,
+            cursor,
+            (start_date, end_date)
+        )
+
     async def update(
         self,
         id_: int,
@@ -114,22 +288,16 @@ LIMIT ?
             'updated': datetime.utcnow()
         }
         updates.update(kwargs)
-        return await super().update(id_, **updates)
-
-
-    async def initialise(self) -> None:
-        await self._conn.execute(f"""
-CREATE TABLE IF NOT EXISTS {self.table}
-(
-    id INTEGER PRIMARY KEY,
-    user_id INTEGER NOT NULL,
-    title TEXT NOT NULL,
-    description TEXT NULL,
-    content TEXT NULL,
-    created timestamp NOT NULL,
-    updated timestamp NOT NULL,
-
-    UNIQUE(title)
-)
-""")
-        await self._conn.commit()
+        try:
+            return await super().update(id_, **updates)
+        finally:
+            self._notify_write()
+
+    async def delete(
+            self,
+            id_: int
+    ) -> bool:
+        try:
+            return await super().delete(id_)
+        finally:
+            self._notify_write()
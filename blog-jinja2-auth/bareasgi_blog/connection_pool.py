@@ -0,0 +1,167 @@
+"""Connection Pool"""
+
+import asyncio
+from contextlib import asynccontextmanager
+import logging
+import sqlite3
+from typing import AsyncIterator, List, Optional
+
+import aiosqlite
+
+from .group_commit import GroupCommitter
+
+LOGGER = logging.getLogger(__name__)
+
+
+async def _connect(filename: str) -> aiosqlite.Connection:
+    return await aiosqlite.connect(
+        filename,
+        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
+    )
+
+
+class ConnectionPool:
+    """A pool of sqlite connections with a single writer and many readers.
+
+    The database is put into WAL mode so the readers can run concurrently
+    with the writer. An in memory database cannot be shared between
+    connections, so in that case all reads go to the writer.
+    """
+
+    def __init__(
+            self,
+            filename: str,
+            pool_size: int,
+            group_commit_window: Optional[float] = None,
+            group_commit_max_batch: int = 64
+    ) -> None:
+        """Initialise the connection pool
+
+        :param filename: The sqlite database filename
+        :type filename: str
+        :param pool_size: The number of reader connections
+        :type pool_size: int
+        :param group_commit_window: If set, the time in seconds for which
+            writes are collected into a single commit, defaults to None
+        :type group_commit_window: Optional[float], optional
+        :param group_commit_max_batch: The maximum number of writes in a group
+            commit, defaults to 64
+        :type group_commit_max_batch: int, optional
+        """
+        self.filename = filename
+        self.pool_size = 0 if filename == ':memory:' else pool_size
+        self.group_commit_window = group_commit_window
+        self.group_commit_max_batch = group_commit_max_batch
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._committer: Optional[GroupCommitter] = None
+        self._write_lock = asyncio.Lock()
+        self._in_transaction = False
+        self._readers: List[aiosqlite.Connection] = []
+        self._available: 'asyncio.Queue[aiosqlite.Connection]' = asyncio.Queue()
+
+    async def open(self) -> None:
+        """Open the connections"""
+        self._writer = await _connect(self.filename)
+        if self.pool_size:
+            async with self._writer.execute('PRAGMA journal_mode=WAL') as cur:
+                journal_mode, = await cur.fetchone()
+                LOGGER.debug('Journal mode is %s', journal_mode)
+            if self.group_commit_window is None:
+                await self._writer.execute('PRAGMA synchronous=NORMAL')
+
+        if self.group_commit_window is not None:
+            # The commits are batched, so each commit can afford a full sync.
+            self._committer = GroupCommitter(
+                self._commit_writer,
+                self._write_lock,
+                self.group_commit_window,
+                self.group_commit_max_batch
+            )
+
+        for _ in range(self.pool_size):
+            conn = await _connect(self.filename)
+            await conn.execute('PRAGMA query_only=ON')
+            self._readers.append(conn)
+            self._available.put_nowait(conn)
+
+    @property
+    def writer(self) -> aiosqlite.Connection:
+        """The connection used for writes"""
+        if self._writer is None:
+            raise RuntimeError('The connection pool is not open')
+        return self._writer
+
+    async def _commit_writer(self) -> None:
+        # Called with the write lock held.
+        await self.writer.commit()
+        self._in_transaction = False
+
+    @asynccontextmanager
+    async def write(
+            self,
+            name: str = 'write'
+    ) -> AsyncIterator[aiosqlite.Connection]:
+        """Run statements on the writer and commit them.
+
+        The writer is held from the first statement until the statements are
+        released, so the statements of other callers cannot be interleaved
+        with them. They are run in a savepoint, and are rolled back if an
+        exception is raised.
+
+        Without group commit the statements are committed before the writer
+        is released. With group commit the writer is released first, and
+        this waits for the shared commit.
+
+        :param name: The name of the savepoint, defaults to 'write'
+        :type name: str, optional
+        """
+        async with self._write_lock:
+            conn = self.writer
+            if not self._in_transaction:
+                await conn.execute('BEGIN')
+                self._in_transaction = True
+            await conn.execute(f'SAVEPOINT {name}')
+            try:
+                yield conn
+            except:  # pylint: disable=bare-except
+                await conn.execute(f'ROLLBACK TO SAVEPOINT {name}')
+                await conn.execute(f'RELEASE SAVEPOINT {name}')
+                if self._committer is None:
+                    await self._commit_writer()
+                raise
+            else:
+                await conn.execute(f'RELEASE SAVEPOINT {name}')
+                if self._committer is None:
+                    await self._commit_writer()
+
+        if self._committer is not None:
+            await self._committer.commit()
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a reader connection from the pool.
+
+        If the pool has no readers the writer is used.
+        """
+        if not self._readers:
+            yield self.writer
+            return
+
+        conn = await self._available.get()
+        try:
+            yield conn
+        finally:
+            self._available.put_nowait(conn)
+
+    async def close(self) -> None:
+        """Close the connections"""
+        if self._committer is not None:
+            await self._committer.close()
+            self._committer = None
+        for conn in self._readers:
+            await conn.close()
+        self._readers.clear()
+        self._available = asyncio.Queue()
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
@@ -0,0 +1,135 @@
+"""Fragment Cache"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import jinja2
+from jinja2 import nodes
+from jinja2.ext import Extension
+from jinja2.parser import Parser
+from markupsafe import Markup
+
+
+class FragmentCache:
+    """A cache of rendered template fragments, bounded by their total size
+    in bytes, with least recently used eviction.
+
+    A fragment is keyed by the version of the data it was rendered from, so
+    it never needs to be invalidated. A fragment for an old version is no
+    longer used, and is evicted in time.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """Initialise the fragment cache
+
+        :param max_bytes: The maximum size of the fragments in bytes
+        :type max_bytes: int
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._fragments: 'OrderedDict[Hashable, Tuple[int, Markup]]' = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Markup]:
+        """Get a fragment from the cache
+
+        :param key: The key
+        :type key: Hashable
+        :return: The fragment or None if it was not found
+        :rtype: Optional[Markup]
+        """
+        entry = self._fragments.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._fragments.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, fragment: Markup) -> None:
+        """Put a fragment in the cache
+
+        :param key: The key
+        :type key: Hashable
+        :param fragment: The rendered fragment
+        :type fragment: Markup
+        """
+        size = len(fragment.encode())
+        if size > self.max_bytes:
+            return
+
+        previous = self._fragments.pop(key, None)
+        if previous is not None:
+            self.size -= previous[0]
+        self._fragments[key] = (size, fragment)
+        self.size += size
+        while self.size > self.max_bytes:
+            _key, (evicted_size, _fragment) = self._fragments.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """The cache statistics
+
+        :return: The hits, misses, evictions, number of fragments and size of
+            the cache
+        :rtype: Dict[str, int]
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'fragments': len(self._fragments),
+            'size': self.size
+        }
+
+
+class FragmentCacheExtension(Extension):
+    """A template tag which caches the fragment it encloses.
+
+    The tag takes the values the fragment depends on, which are the key in
+    the fragment cache. For example:
+
+        {% cache 'blog-entry', blog_entry['id'], blog_entry['updated'] %}
+            ...
+        {% endcache %}
+
+    The cache is set on the environment as fragment_cache. If it is None the
+    fragments are rendered every time. The environment must be async.
+    """
+    tags = {'cache'}
+
+    def __init__(self, environment: jinja2.Environment) -> None:
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser: Parser) -> nodes.Node:
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        key = nodes.Tuple(args, 'load')
+        return nodes.CallBlock(
+            self.call_method('_render', [key]),
+            [],
+            [],
+            body
+        ).set_lineno(lineno)
+
+    async def _render(
+            self,
+            key: Tuple[Any, ...],
+            caller: Callable[[], Any]
+    ) -> Markup:
+        cache: Optional[FragmentCache] = self.environment.fragment_cache
+        if cache is None:
+            return await caller()
+
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = await caller()
+            cache.put(key, fragment)
+        return fragment
@@ -0,0 +1,88 @@
+"""Group Commit"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+
+class GroupCommitter:
+    """Coalesces the commits of concurrent writers.
+
+    Writes that arrive within the window, or until the batch is full, share a
+    single transaction and a single commit. Each caller resumes only after the
+    commit which covers its write has completed.
+    """
+
+    def __init__(
+            self,
+            commit: Callable[[], Awaitable[None]],
+            lock: asyncio.Lock,
+            window: float,
+            max_batch: int
+    ) -> None:
+        """Initialise the group committer
+
+        :param commit: The function which commits the writer
+        :type commit: Callable[[], Awaitable[None]]
+        :param lock: The lock held while the writer must not commit
+        :type lock: asyncio.Lock
+        :param window: The time in seconds to wait for other writers
+        :type window: float
+        :param max_batch: The maximum number of writes in a commit
+        :type max_batch: int
+        """
+        self._commit_writer = commit
+        self._lock = lock
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: List[asyncio.Future] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._commits: List[asyncio.Task] = []
+
+    async def commit(self) -> None:
+        """Wait for the current transaction to be committed"""
+        future = asyncio.get_event_loop().create_future()
+        self._pending.append(future)
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_event_loop().call_later(
+                self.window,
+                self._flush
+            )
+        await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._commit(batch))
+        self._commits.append(task)
+        task.add_done_callback(self._commits.remove)
+
+    async def _commit(self, batch: List[asyncio.Future]) -> None:
+        LOGGER.debug('Committing %s writes', len(batch))
+        try:
+            async with self._lock:
+                await self._commit_writer()
+        except Exception as error:  # pylint: disable=broad-except
+            LOGGER.exception('Group commit failed')
+            for future in batch:
+                if not future.done():
+                    future.set_exception(error)
+        else:
+            for future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    async def close(self) -> None:
+        """Commit any outstanding writes"""
+        self._flush()
+        if self._commits:
+            await asyncio.gather(*self._commits, return_exceptions=True)
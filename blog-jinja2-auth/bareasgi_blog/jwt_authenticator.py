@@ -2,9 +2,12 @@
 JWT Authenticator
 """
 
+import asyncio
+from collections import OrderedDict
 from datetime import datetime, timedelta
 import logging
-from typing import Optional
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
 
 from baretypes import (
     Scope,
@@ -18,10 +21,13 @@ from bareutils import response_code
 
 from .token_manager import TokenManager
 from .auth_repository import AuthRepository
+from .revocation_store import RevocationStore
 
 # pylint: disable=invalid-name
 logger = logging.getLogger(__name__)
 
+ROLES = ('admin', 'blogger', 'reader')
+
 
 class JwtAuthenticator:
     """JTW authentication middleware"""
@@ -30,14 +36,97 @@ class JwtAuthenticator:
             self,
             repository: AuthRepository,
             token_manager: TokenManager,
+            revocations: RevocationStore,
             authentication_path: str,
-            login_expiry: timedelta
+            login_expiry: timedelta,
+            renewal_cache_ttl: timedelta = timedelta(seconds=30),
+            renewal_cache_size: int = 1024
     ) -> None:
-        """Initialise the JWT Authenticator"""
+        """Initialise the JWT Authenticator
+
+        Concurrent requests carrying the same expired token share a single
+        renewal, and the result is kept for a short time so the requests
+        which follow also receive the same cookie.
+
+        The role in a token is checked against the user whenever the version
+        of that user in the repository changes, so a change of role takes
+        effect on the next request.
+
+        :param repository: The auth repository
+        :type repository: AuthRepository
+        :param token_manager: The token manager
+        :type token_manager: TokenManager
+        :param revocations: The revoked tokens and users
+        :type revocations: RevocationStore
+        :param authentication_path: The path to redirect to for a login
+        :type authentication_path: str
+        :param login_expiry: The time after the login when a token can no
+            longer be renewed
+        :type login_expiry: timedelta
+        :param renewal_cache_ttl: The time to keep a renewed cookie, defaults
+            to 30 seconds
+        :type renewal_cache_ttl: timedelta, optional
+        :param renewal_cache_size: The maximum number of renewed cookies to
+            keep, defaults to 1024
+        :type renewal_cache_size: int, optional
+        """
         self._repository = repository
         self._token_manager = token_manager
+        self._revocations = revocations
         self._authentication_path = authentication_path.encode()
         self._login_expiry = login_expiry
+        self._renewal_cache_ttl = renewal_cache_ttl.total_seconds()
+        self._renewal_cache_size = renewal_cache_size
+        self._renewals: Dict[bytes, asyncio.Future] = {}
+        self._renewed: 'OrderedDict[bytes, Tuple[float, int, Optional[bytes]]]' = OrderedDict()
+        self._checked: 'OrderedDict[bytes, Tuple[int, str]]' = OrderedDict()
+
+    async def _renew_cookie_once(
+            self,
+            token: bytes,
+            username: str
+    ) -> Optional[bytes]:
+        entry = self._renewed.get(token)
+        if entry is not None:
+            expires_at, user_version, set_cookie = entry
+            if (
+                    expires_at > time.monotonic() and
+                    user_version == self._repository.user_version(username)
+            ):
+                return set_cookie
+            del self._renewed[token]
+
+        renewal = self._renewals.get(token)
+        if renewal is None:
+            user_version = self._repository.user_version(username)
+            renewal = asyncio.ensure_future(self._renew_cookie(token))
+            self._renewals[token] = renewal
+            renewal.add_done_callback(
+                lambda future: self._on_renewed(token, user_version, future)
+            )
+        else:
+            logger.debug('Joining the renewal in progress')
+
+        # A cancelled request must not cancel the renewal the others await.
+        return await asyncio.shield(renewal)
+
+    def _on_renewed(
+            self,
+            token: bytes,
+            user_version: int,
+            renewal: asyncio.Future
+    ) -> None:
+        del self._renewals[token]
+        if renewal.cancelled() or renewal.exception() is not None:
+            return
+
+        self._renewed[token] = (
+            time.monotonic() + self._renewal_cache_ttl,
+            user_version,
+            renewal.result()
+        )
+        if len(self._renewed) > self._renewal_cache_size:
+            self._renewed.popitem(last=False)
 
     async def _renew_cookie(
             self,
@@ -48,8 +137,6 @@ class JwtAuthenticator:
 
         username: str = payload['sub']
         issued_at: datetime = payload['iat']
-        user_id: int = payload['user_id']
-        role: str = payload['role']
 
         logger.debug(
             'Token renewal request: user=%s, iat=%s',
@@ -70,23 +157,91 @@ class JwtAuthenticator:
             return None
 
         user = await self._repository.read_by_username(username)
-        if user is None or user['role'] not in ['admin', 'blogger', 'reader']:
+        if user is None or user['role'] not in ROLES:
             return None
 
-        logger.debug('Token renewed for %s', user)
-        token = self._token_manager.encode(username, utc_now, issued_at, user_id, role)
+        logger.debug('Token renewed for %s', username)
+        token = self._token_manager.encode(
+            username,
+            utc_now,
+            issued_at,
+            user['id'],
+            user['role'],
+            payload.get('jti')
+        )
         logger.debug('Sending token %s', token)
 
         set_cookie = self._token_manager.make_cookie(token)
 
         return set_cookie
 
+    def _set_checked(self, token: bytes, user_version: int, role: str) -> None:
+        self._checked[token] = (user_version, role)
+        self._checked.move_to_end(token)
+        if len(self._checked) > self._renewal_cache_size:
+            self._checked.popitem(last=False)
+
+    async def _check_role(
+            self,
+            token: bytes,
+            payload: Mapping[str, Any]
+    ) -> Optional[Tuple[Mapping[str, Any], int]]:
+        username = payload['sub']
+        user_version = self._repository.user_version(username)
+        checked = self._checked.get(token)
+        if checked is not None and checked[0] == user_version:
+            role = checked[1]
+        else:
+            user = await self._repository.read_by_username(username)
+            if user is None or user['role'] not in ROLES:
+                return None
+            role = user['role']
+            self._set_checked(token, user_version, role)
+
+        if role != payload['role']:
+            logger.debug(
+                'Role changed for %s from %s to %s',
+                username,
+                payload['role'],
+                role
+            )
+            payload = {**payload, 'role': role}
+        return payload, user_version
+
+    async def revoke_token(self, payload: Mapping[str, Any]) -> None:
+        """Revoke a token, ending its login session
+
+        :param payload: The decoded token
+        :type payload: Mapping[str, Any]
+        """
+        jti = payload.get('jti')
+        if jti is None:
+            return
+        await self._revocations.revoke_token(
+            jti,
+            payload['sub'],
+            payload['iat'] + self._login_expiry
+        )
+
+    async def revoke_user(self, username: str) -> None:
+        """Revoke the tokens issued to a user up to now
+
+        :param username: The username
+        :type username: str
+        """
+        revoked_before = datetime.utcnow()
+        await self._revocations.revoke_user(username, revoked_before)
+
     def create_token(self, username: str, user_id: int, role: str) -> bytes:
         """Create a token"""
         now = datetime.utcnow()
         token = self._token_manager.encode(username, now, now, user_id, role)
         return self._token_manager.make_cookie(token)
 
+    def create_expired_token(self) -> bytes:
+        """Create a cookie which removes the token"""
+        return self._token_manager.make_expired_cookie()
+
     async def __call__(
             self,
             scope: Scope,
@@ -103,18 +258,51 @@ class JwtAuthenticator:
             if token is None:
                 return response_code.FOUND, [(b'location', self._authentication_path)]
 
-            now = datetime.utcnow()
+            payload = self._token_manager.decode_unexpired(
+                token,
+                int(time.time())
+            )
+            is_expired = payload is None
+            if is_expired:
+                payload = self._token_manager.decode(token)
+
+            if await self._revocations.is_revoked(payload):
+                logger.debug('Token revoked for %s', payload['sub'])
+                return (
+                    response_code.FOUND,
+                    [
+                        (b'set-cookie', self.create_expired_token()),
+                        (b'location', self._authentication_path)
+                    ]
+                )
 
-            payload = self._token_manager.decode(token)
-            if payload['exp'] > now:
+            if not is_expired:
                 logger.debug('Cookie still valid')
                 cookie = None
             else:
                 logger.debug('Renewing cookie')
-                cookie = await self._renew_cookie(token)
+                cookie = await self._renew_cookie_once(token, payload['sub'])
                 if cookie is None:
                     return response_code.UNAUTHORIZED
 
+            checked = await self._check_role(token, payload)
+            if checked is None:
+                return response_code.UNAUTHORIZED
+            checked_payload, user_version = checked
+            if checked_payload is not payload:
+                payload = checked_payload
+                if cookie is None:
+                    token = self._token_manager.encode(
+                        payload['sub'],
+                        datetime.utcnow(),
+                        payload['iat'],
+                        payload['user_id'],
+                        payload['role'],
+                        payload.get('jti')
+                    )
+                    self._set_checked(token, user_version, payload['role'])
+                    cookie = self._token_manager.make_cookie(token)
+
             if info is None:
                 info = dict()
             info['jwt'] = payload
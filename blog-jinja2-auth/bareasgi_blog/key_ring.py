@@ -0,0 +1,138 @@
+"""Key Ring"""
+
+import logging
+import os
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional
+
+import jwt
+
+LOGGER = logging.getLogger(__name__)
+
+HMAC_ALGORITHMS = ('HS256', 'HS384', 'HS512')
+
+
+class SigningKey(NamedTuple):
+    """A key for signing and verifying tokens.
+
+    The asymmetric keys are parsed key objects rather than PEM text, so they
+    are only parsed once. A key without a signing key can only verify.
+    """
+    kid: str
+    algorithm: str
+    signing_key: Optional[Any]
+    verifying_key: Any
+
+
+class KeyRing:
+    """The keys used to sign and verify tokens.
+
+    Tokens are signed with the current key, and carry its id in the "kid"
+    header. A token is verified with the key named by its kid, so the current
+    key can be rotated while the tokens signed by the previous keys remain
+    valid. A token without a kid is verified with the current key.
+    """
+
+    def __init__(self, keys: List[SigningKey], current_kid: str) -> None:
+        """Initialise the key ring
+
+        :param keys: The keys
+        :type keys: List[SigningKey]
+        :param current_kid: The id of the key used for signing
+        :type current_kid: str
+        """
+        self._keys: Dict[str, SigningKey] = {key.kid: key for key in keys}
+        if current_kid not in self._keys:
+            raise KeyError(f'Unknown signing key "{current_kid}"')
+        self.current = self._keys[current_kid]
+
+    def find(self, kid: Optional[str]) -> SigningKey:
+        """Find the key to verify a token
+
+        :param kid: The key id from the token header
+        :type kid: Optional[str]
+        :raises jwt.InvalidTokenError: If the key is unknown
+        :return: The key
+        :rtype: SigningKey
+        """
+        if kid is None:
+            return self.current
+        key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f'Unknown key id "{kid}"')
+        return key
+
+    @classmethod
+    def from_secret(cls, secret: str, algorithm: str = 'HS256') -> 'KeyRing':
+        """Create a key ring with a single shared secret
+
+        :param secret: The secret
+        :type secret: str
+        :param algorithm: The HMAC algorithm, defaults to 'HS256'
+        :type algorithm: str, optional
+        :return: The key ring
+        :rtype: KeyRing
+        """
+        key = SigningKey('default', algorithm, secret.encode(), secret.encode())
+        return cls([key], key.kid)
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> 'KeyRing':
+        """Create a key ring from the configuration.
+
+        Each key has a kid and an algorithm. An HMAC key has a secret. An
+        asymmetric key has the path of a PEM private key, a PEM public key, or
+        both. The cryptography package is only needed for asymmetric keys.
+
+        :param config: The signing configuration
+        :type config: Mapping[str, Any]
+        :return: The key ring
+        :rtype: KeyRing
+        """
+        keys = [_load_key(key_config) for key_config in config['keys']]
+        return cls(keys, config['current'])
+
+
+def _read_file(path: str) -> bytes:
+    with open(os.path.expanduser(path), 'rb') as file_ptr:
+        return file_ptr.read()
+
+
+def _load_key(config: Mapping[str, Any]) -> SigningKey:
+    kid: str = config['kid']
+    algorithm: str = config['algorithm']
+
+    if algorithm in HMAC_ALGORITHMS:
+        secret = config['secret'].encode()
+        return SigningKey(kid, algorithm, secret, secret)
+
+    # pylint: disable=import-outside-toplevel
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives.serialization import (
+        load_pem_private_key,
+        load_pem_public_key
+    )
+
+    signing_key = None
+    if 'private_key' in config:
+        signing_key = load_pem_private_key(
+            _read_file(config['private_key']),
+            password=None,
+            backend=default_backend()
+        )
+    if 'public_key' in config:
+        verifying_key = load_pem_public_key(
+            _read_file(config['public_key']),
+            backend=default_backend()
+        )
+    elif signing_key is not None:
+        verifying_key = signing_key.public_key()
+    else:
+        raise ValueError(f'Key "{kid}" has no private or public key')
+
+    LOGGER.info(
+        'Loaded %s key "%s"%s',
+        algorithm,
+        kid,
+        '' if signing_key else ' for verification only'
+    )
+    return SigningKey(kid, algorithm, signing_key, verifying_key)
@@ -0,0 +1,128 @@
+"""Migrations"""
+
+import logging
+from typing import List, NamedTuple, Optional, Sequence
+
+import aiosqlite
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Migration(NamedTuple):
+    """A numbered schema migration"""
+    version: int
+    description: str
+    script: str
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1,
+        'Create the users and blog entries tables',
+        """
+CREATE TABLE IF NOT EXISTS users
+(
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    salt TEXT NOT NULL,
+    role TEXT NOT NULL,
+
+    UNIQUE(username)
+);
+
+CREATE TABLE IF NOT EXISTS blog_entries
+(
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NULL,
+    content TEXT NULL,
+    created timestamp NOT NULL,
+    updated timestamp NOT NULL,
+
+    UNIQUE(title)
+);
+"""
+    ),
+    Migration(
+        2,
+        'Index the columns used for ranges, joins and lookups',
+        """
+CREATE INDEX blog_entries_created ON blog_entries(created, id);
+CREATE INDEX blog_entries_user_id ON blog_entries(user_id);
+CREATE INDEX users_role ON users(role, username);
+"""
+    ),
+    Migration(
+        3,
+        'Create the token and user revocation tables',
+        """
+CREATE TABLE revoked_tokens
+(
+    jti TEXT NOT NULL,
+    username TEXT NOT NULL,
+    expires timestamp NOT NULL,
+
+    PRIMARY KEY(jti)
+);
+
+CREATE INDEX revoked_tokens_expires ON revoked_tokens(expires);
+
+CREATE TABLE revoked_users
+(
+    username TEXT NOT NULL,
+    revoked_before timestamp NOT NULL,
+
+    PRIMARY KEY(username)
+);
+"""
+    )
+]
+
+
+async def migrate(
+        conn: aiosqlite.Connection,
+        migrations: Optional[Sequence[Migration]] = None
+) -> int:
+    """Apply the migrations which have not yet been applied.
+
+    Each migration runs in its own transaction, and the version applied is
+    recorded in the database with the user_version pragma.
+
+    :param conn: The connection to migrate
+    :type conn: aiosqlite.Connection
+    :param migrations: The migrations, or None for MIGRATIONS, defaults to
+        None
+    :type migrations: Optional[Sequence[Migration]], optional
+    :return: The version of the schema
+    :rtype: int
+    """
+    async with conn.execute('PRAGMA user_version') as cur:
+        version, = await cur.fetchone()
+
+    if migrations is None:
+        migrations = MIGRATIONS
+
+    for migration in sorted(migrations, key=lambda x: x.version):
+        if migration.version <= version:
+            continue
+
+        LOGGER.info(
+            'Applying migration %s: %s',
+            migration.version,
+            migration.description
+        )
+        try:
+            await conn.executescript(f"""
+BEGIN;
+{migration.script}
+PRAGMA user_version = {migration.version};
+COMMIT;
+""")
+        except:  # pylint: disable=bare-except
+            await conn.rollback()
+            raise
+        version = migration.version
+
+    return version
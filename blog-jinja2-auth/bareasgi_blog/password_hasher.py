@@ -0,0 +1,179 @@
+"""Password Hasher"""
+
+import asyncio
+from concurrent.futures import Executor
+import hashlib
+import hmac
+from typing import Dict, Optional, Tuple
+import uuid
+
+# The parameters for each key derivation function. A hash records the
+# function and parameters it was made with, so these can be raised without
+# breaking the existing hashes.
+SCHEMES: Dict[str, Dict[str, int]] = {
+    'scrypt': {'n': 2 ** 14, 'r': 8, 'p': 1},
+    'pbkdf2-sha256': {'i': 310000}
+}
+
+# The hashes made before the hash format was versioned are the hex digest of
+# the SHA-512 of the password and salt, without a scheme prefix.
+LEGACY_SCHEME = 'sha512'
+
+
+def _derive(
+        scheme: str,
+        params: Dict[str, int],
+        password: str,
+        salt: str
+) -> str:
+    if scheme == 'scrypt':
+        return hashlib.scrypt(
+            password.encode(),
+            salt=salt.encode(),
+            n=params['n'],
+            r=params['r'],
+            p=params['p'],
+            maxmem=256 * params['n'] * params['r'] * params['p'] + 2 ** 20
+        ).hex()
+    if scheme == 'pbkdf2-sha256':
+        return hashlib.pbkdf2_hmac(
+            'sha256',
+            password.encode(),
+            salt.encode(),
+            params['i']
+        ).hex()
+    if scheme == LEGACY_SCHEME:
+        return hashlib.sha512((password + salt).encode()).hexdigest()
+    raise ValueError(f'Unknown password hash scheme "{scheme}"')
+
+
+def _parse(hash_: str) -> Tuple[str, Dict[str, int], str]:
+    if not hash_.startswith('$'):
+        return LEGACY_SCHEME, {}, hash_
+    _, scheme, text, digest = hash_.split('$')
+    params = {
+        name: int(value)
+        for name, value in (param.split('=') for param in text.split(','))
+    }
+    return scheme, params, digest
+
+
+def hash_password(
+        scheme: str,
+        params: Dict[str, int],
+        password: str,
+        salt: str
+) -> str:
+    """Hash a password
+
+    :param scheme: The key derivation function
+    :type scheme: str
+    :param params: The parameters of the key derivation function
+    :type params: Dict[str, int]
+    :param password: The password
+    :type password: str
+    :param salt: The salt
+    :type salt: str
+    :return: The hash, prefixed by the scheme and parameters
+    :rtype: str
+    """
+    digest = _derive(scheme, params, password, salt)
+    text = ','.join(f'{name}={value}' for name, value in params.items())
+    return f'${scheme}${text}${digest}'
+
+
+def verify_password(password: str, hash_: str, salt: str) -> bool:
+    """Verify a password against a hash made by any known scheme
+
+    :param password: The password
+    :type password: str
+    :param hash_: The hash
+    :type hash_: str
+    :param salt: The salt
+    :type salt: str
+    :return: True if the password matches the hash
+    :rtype: bool
+    """
+    scheme, params, digest = _parse(hash_)
+    return hmac.compare_digest(
+        _derive(scheme, params, password, salt),
+        digest
+    )
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords in an executor.
+
+    A key derivation function is deliberately slow, so running it on the event
+    loop would stall every other request while a password was checked.
+    """
+
+    def __init__(
+            self,
+            executor: Optional[Executor] = None,
+            scheme: str = 'scrypt'
+    ) -> None:
+        """Initialise the password hasher
+
+        :param executor: The executor in which to hash passwords, or None for
+            the default executor of the event loop, defaults to None
+        :type executor: Optional[Executor], optional
+        :param scheme: The key derivation function for new hashes, defaults
+            to 'scrypt'
+        :type scheme: str, optional
+        """
+        if scheme not in SCHEMES:
+            raise ValueError(f'Unknown password hash scheme "{scheme}"')
+        self._executor = executor
+        self.scheme = scheme
+        self.params = SCHEMES[scheme]
+
+    async def hash(self, password: str) -> Tuple[str, str]:
+        """Hash a password with a new salt
+
+        :param password: The password
+        :type password: str
+        :return: The hash and the salt
+        :rtype: Tuple[str, str]
+        """
+        salt = uuid.uuid4().hex
+        hash_ = await asyncio.get_event_loop().run_in_executor(
+            self._executor,
+            hash_password,
+            self.scheme,
+            self.params,
+            password,
+            salt
+        )
+        return hash_, salt
+
+    async def verify(self, password: str, hash_: str, salt: str) -> bool:
+        """Verify a password
+
+        :param password: The password
+        :type password: str
+        :param hash_: The hash
+        :type hash_: str
+        :param salt: The salt
+        :type salt: str
+        :return: True if the password matches the hash
+        :rtype: bool
+        """
+        return await asyncio.get_event_loop().run_in_executor(
+            self._executor,
+            verify_password,
+            password,
+            hash_,
+            salt
+        )
+
+    def needs_upgrade(self, hash_: str) -> bool:
+        """Check if a hash was made with an older scheme or parameters
+
+        :param hash_: The hash
+        :type hash_: str
+        :return: True if the password should be hashed again
+        :rtype: bool
+        """
+        scheme, params, _ = _parse(hash_)
+        return scheme != self.scheme or params != self.params
@@ -0,0 +1,257 @@
+"""Rate Limiter"""
+
+import logging
+import math
+import time
+from typing import AsyncIterator, Dict, Hashable, List, Optional
+from urllib.parse import parse_qsl
+
+from baretypes import (
+    Scope,
+    Info,
+    RouteMatches,
+    Content,
+    HttpResponse,
+    HttpRequestCallback
+)
+from bareutils import header, response_code
+
+LOGGER = logging.getLogger(__name__)
+
+
+class TokenBucketTable:
+    """A table of token buckets.
+
+    A bucket holds up to the capacity in tokens, and refills at the rate in
+    tokens per second. The buckets are refilled lazily when they are used, so
+    there is no work for a key which is not being used.
+
+    A bucket which has been idle long enough to have refilled is the same as
+    no bucket, so it can be removed. The buckets are split into shards, and
+    one shard is swept at each sweep interval, so the work of sweeping is
+    spread out rather than stalling a request.
+    """
+
+    def __init__(
+            self,
+            capacity: float,
+            rate: float,
+            shard_count: int = 16,
+            sweep_interval: float = 60.0
+    ) -> None:
+        """Initialise the token bucket table
+
+        :param capacity: The maximum number of tokens in a bucket
+        :type capacity: float
+        :param rate: The number of tokens added to a bucket each second
+        :type rate: float
+        :param shard_count: The number of shards, defaults to 16
+        :type shard_count: int, optional
+        :param sweep_interval: The time in seconds between the sweeps of a
+            shard, defaults to 60.0
+        :type sweep_interval: float, optional
+        """
+        self.capacity = capacity
+        self.rate = rate
+        self.sweep_interval = sweep_interval
+        self._idle_time = capacity / rate
+        self._shards: List[Dict[Hashable, List[float]]] = [
+            {} for _ in range(shard_count)
+        ]
+        self._next_sweep = time.monotonic() + sweep_interval
+        self._next_shard = 0
+
+    def _tokens(self, bucket: List[float], now: float) -> float:
+        return min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+
+    def wait(self, key: Hashable, now: float) -> float:
+        """Find the time until a token is available in the bucket for a key,
+        without taking it
+
+        :param key: The key
+        :type key: Hashable
+        :param now: The current monotonic time in seconds
+        :type now: float
+        :return: Zero if a token is available, otherwise the time in seconds
+            until one will be
+        :rtype: float
+        """
+        bucket = self._shards[hash(key) % len(self._shards)].get(key)
+        if bucket is None:
+            return 0.0
+        tokens = self._tokens(bucket, now)
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    def take(self, key: Hashable, now: float) -> float:
+        """Take a token from the bucket for a key
+
+        :param key: The key
+        :type key: Hashable
+        :param now: The current monotonic time in seconds
+        :type now: float
+        :return: Zero if a token was taken, otherwise the time in seconds
+            until one will be available
+        :rtype: float
+        """
+        if now >= self._next_sweep:
+            self._sweep(now)
+
+        shard = self._shards[hash(key) % len(self._shards)]
+        bucket = shard.get(key)
+        if bucket is None:
+            shard[key] = [self.capacity - 1, now]
+            return 0.0
+
+        tokens = self._tokens(bucket, now)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            return (1 - tokens) / self.rate
+        bucket[0] = tokens - 1
+        return 0.0
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def _sweep(self, now: float) -> None:
+        shard = self._shards[self._next_shard]
+        idle = [
+            key
+            for key, (_tokens, updated) in shard.items()
+            if now - updated >= self._idle_time
+        ]
+        for key in idle:
+            del shard[key]
+        LOGGER.debug(
+            'Swept %s idle buckets from shard %s',
+            len(idle),
+            self._next_shard
+        )
+        self._next_shard = (self._next_shard + 1) % len(self._shards)
+        self._next_sweep = now + self.sweep_interval / len(self._shards)
+
+
+async def _replay(body: bytes) -> AsyncIterator[bytes]:
+    yield body
+
+
+async def _read_at_most(content: Content, max_size: int) -> Optional[bytes]:
+    body = bytearray()
+    async for chunk in content:
+        body += chunk
+        if len(body) > max_size:
+            return None
+    return bytes(body)
+
+
+class RateLimiter:
+    """Rate limiting middleware.
+
+    Requests are limited by the client address, and by the username in the
+    submitted form, so an attacker can't avoid the limit on a username by
+    changing address, or the limit on an address by changing username.
+
+    The address is checked before the form is read, so a limited client
+    can't make the server read its requests, and the form read is limited in
+    size. A token is only taken when both limits allow the request.
+    """
+
+    def __init__(
+            self,
+            by_address: TokenBucketTable,
+            by_username: TokenBucketTable,
+            username_field: str = 'username',
+            max_body_size: int = 4096
+    ) -> None:
+        """Initialise the rate limiter
+
+        :param by_address: The buckets for the client addresses
+        :type by_address: TokenBucketTable
+        :param by_username: The buckets for the usernames
+        :type by_username: TokenBucketTable
+        :param username_field: The form field holding the username, defaults
+            to 'username'
+        :type username_field: str, optional
+        :param max_body_size: The largest form in bytes, defaults to 4096
+        :type max_body_size: int, optional
+        """
+        self.by_address = by_address
+        self.by_username = by_username
+        self._username_field = username_field
+        self._max_body_size = max_body_size
+
+    def check(
+            self,
+            address: str,
+            username: Optional[str],
+            now: float
+    ) -> float:
+        """Check a request against the limits
+
+        :param address: The client address
+        :type address: str
+        :param username: The username, or None if there is none
+        :type username: Optional[str]
+        :param now: The current monotonic time in seconds
+        :type now: float
+        :return: Zero if the request is allowed, otherwise the time in seconds
+            until it would be
+        :rtype: float
+        """
+        wait = self.by_address.wait(address, now)
+        if username is not None:
+            wait = max(wait, self.by_username.wait(username, now))
+        if wait:
+            return wait
+
+        self.by_address.take(address, now)
+        if username is not None:
+            self.by_username.take(username, now)
+        return 0.0
+
+    def _too_many_requests(
+            self,
+            wait: float,
+            address: str,
+            username: Optional[str]
+    ) -> HttpResponse:
+        LOGGER.warning(
+            'Rate limited address=%s, username=%s',
+            address,
+            username
+        )
+        return (
+            response_code.TOO_MANY_REQUESTS,
+            [(b'retry-after', str(math.ceil(wait)).encode())]
+        )
+
+    async def __call__(
+            self,
+            scope: Scope,
+            info: Info,
+            matches: RouteMatches,
+            content: Content,
+            handler: HttpRequestCallback
+    ) -> HttpResponse:
+        client = scope.get('client')
+        address = client[0] if client else ''
+
+        wait = self.by_address.wait(address, time.monotonic())
+        if wait:
+            return self._too_many_requests(wait, address, None)
+
+        content_length = header.content_length(scope['headers'])
+        if content_length is not None and content_length > self._max_body_size:
+            return response_code.PAYLOAD_TOO_LARGE
+        body = await _read_at_most(content, self._max_body_size)
+        if body is None:
+            return response_code.PAYLOAD_TOO_LARGE
+
+        form = parse_qsl(body.decode(errors='replace'))
+        username = dict(form).get(self._username_field)
+
+        wait = self.check(address, username, time.monotonic())
+        if wait:
+            return self._too_many_requests(wait, address, username)
+
+        return await handler(scope, info, matches, _replay(body))
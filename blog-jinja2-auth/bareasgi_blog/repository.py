@@ -1,17 +1,94 @@
 """Repository"""
 
-from abc import ABCMeta, abstractmethod
+from functools import lru_cache
 from typing import (
     Any,
     Callable,
     Dict,
+    Iterator,
     List,
     Optional,
-    Tuple
+    Tuple,
+    Type,
+    Union
 )
 
 import aiosqlite
 
+from .connection_pool import ConnectionPool
+from .statement_cache import STATEMENT_CACHE
+from .utils import encode_cursor, decode_cursor
+
+
+class Record(tuple):
+    """The base class for compact rows.
+
+    A record class is made for each distinct set of columns. The values are
+    held in a tuple, and the record is read like a dict keyed by the column
+    names, so templates can use a record in place of a dict.
+
+    As a record is a tuple, a JSON serializer writes it as an array. Records
+    must be converted with dict() before they are serialized.
+    """
+
+    __slots__ = ()
+
+    _fields: Tuple[str, ...] = ()
+    _index: Dict[str, int] = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            try:
+                key = self._index[key]
+            except KeyError:
+                raise KeyError(key) from None
+        return tuple.__getitem__(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get the value of a column, or the default if it does not exist"""
+        index = self._index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self) -> Tuple[str, ...]:
+        """The column names"""
+        return self._fields
+
+    def values(self) -> Iterator[Any]:
+        """The column values"""
+        return tuple.__iter__(self)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """The column names and values"""
+        return zip(self._fields, tuple.__iter__(self))
+
+    def __repr__(self) -> str:
+        return f'Record({dict(self.items())!r})'
+
+
+Row = Union[Dict[str, Any], Record]
+Page = Tuple[List[Row], Optional[str]]
+RowFactory = Callable[[aiosqlite.Cursor], Callable[[Tuple], Row]]
+
+
+@lru_cache(maxsize=256)
+def record_class(columns: Tuple[str, ...]) -> Type[Record]:
+    """Get the record class for the columns"""
+    return type(
+        'Record',
+        (Record,),
+        {
+            '__slots__': (),
+            '_fields': columns,
+            '_index': {column: index for index, column in enumerate(columns)}
+        }
+    )
+
 
 def make_unpacker(cur: aiosqlite.Cursor) -> Callable[[Tuple], Dict[str, Any]]:
     """Make an unpacker"""
@@ -19,31 +96,127 @@ def make_unpacker(cur: aiosqlite.Cursor) -> Callable[[Tuple], Dict[str, Any]]:
     return lambda row: dict(zip(columns, row))
 
 
-class Repository(metaclass=ABCMeta):
+def make_record_unpacker(cur: aiosqlite.Cursor) -> Callable[[Tuple], Record]:
+    """Make an unpacker which returns records rather than dicts"""
+    columns = tuple(name for name, *_ in cur.description)
+    cls = record_class(columns)
+    return lambda row: tuple.__new__(cls, row)
+
+
+def keyset_columns(
+        columns: Optional[List[str]],
+        order_by_column: str
+) -> Tuple[str, ...]:
+    """Add the keyset columns to the selected columns"""
+    if not columns:
+        return ()
+    return (
+        *columns,
+        *(
+            column
+            for column in (order_by_column, 'id')
+            if column not in columns
+        )
+    )
+
+
+def keyset_where(
+        order_by_column: str,
+        id_column: str,
+        order_by_ascending: bool,
+        has_between: bool,
+        has_cursor: bool
+) -> str:
+    """Make the where clause for a page"""
+    conditions = []
+    if has_between:
+        conditions.append(f'{order_by_column} BETWEEN ? AND ?')
+    if has_cursor:
+        operator = '>' if order_by_ascending else '<'
+        conditions.append(
+            f'({order_by_column},{id_column}) {operator} (?,?)'
+        )
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+
+def make_page(
+        values: List[Row],
+        order_by_column: str,
+        limit: int
+) -> Page:
+    """Make a page from one more value than the limit"""
+    if len(values) <= limit:
+        return values, None
+    values = values[:limit]
+    last = values[-1]
+    return values, encode_cursor(last[order_by_column], last['id'])
+
+
+class Repository:
     """"Repository"""
 
-    def __init__(self, conn: aiosqlite.Connection, table: str) -> None:
-        self._conn = conn
+    def __init__(
+            self,
+            pool: ConnectionPool,
+            table: str,
+            row_factory: RowFactory = make_unpacker
+    ) -> None:
+        self._pool = pool
         self.table = table
+        self._row_factory = row_factory
+        self._statements = STATEMENT_CACHE
 
     async def create(self, **kwargs) -> int:
         """Create a record"""
-        stmt = f"""
-INSERT INTO {self.table}({','.join(kwargs.keys())})
-VALUES ({','.join('?' for _ in range(len(kwargs)))})
-"""
+        stmt = self._insert_statement(tuple(kwargs))
         args = tuple(kwargs.values())
 
-        async with self._conn.cursor() as cur:
+        async with self._pool.write() as conn, conn.cursor() as cur:
             await cur.execute(stmt, args)
-            await self._conn.commit()
-            return cur.lastrowid
+            rowid = cur.lastrowid
+        return rowid
+
+    async def create_many(self, rows: List[Dict[str, Any]]) -> int:
+        """Create many records in a single transaction.
+
+        Every row must have the same columns in the same order.
+
+        :param rows: The records to create
+        :type rows: List[Dict[str, Any]]
+        :raises ValueError: If the rows have different columns
+        :return: The number of records created
+        :rtype: int
+        """
+        if not rows:
+            return 0
+
+        keys = tuple(rows[0])
+        stmt = self._insert_statement(keys)
+        args = []
+        for row in rows:
+            if tuple(row) != keys:
+                raise ValueError('All rows must have the same columns')
+            args.append(tuple(row.values()))
+
+        async with self._pool.write('create_many') as conn:
+            await conn.executemany(stmt, args)
+        return len(args)
+
+    def _insert_statement(self, keys: Tuple[str, ...]) -> str:
+        return self._statements.statement(
+            ('insert', self.table, keys),
+            (self.table, *keys),
+            lambda: f"""
+INSERT INTO {self.table}({','.join(keys)})
+VALUES ({','.join('?' for _ in keys)})
+"""
+        )
 
     async def read_by_id(
             self,
             id_: int,
             columns: Optional[List[str]]
-    ) -> Optional[Dict[str, Any]]:
+    ) -> Optional[Row]:
         """Read a record by it's id"""
         return await self.read_by_column('id', id_, columns)
 
@@ -52,21 +225,26 @@ VALUES ({','.join('?' for _ in range(len(kwargs)))})
             column: str,
             value: Any,
             columns: Optional[List[str]]
-    ) -> Optional[Dict[str, Any]]:
+    ) -> Optional[Row]:
         """Read a record by a column value"""
-        stmt = f"""
-SELECT {','.join(columns) if columns else '*'}
+        selected = tuple(columns or ())
+        stmt = self._statements.statement(
+            ('read_by_column', self.table, column, selected),
+            (self.table, column, *selected),
+            lambda: f"""
+SELECT {','.join(selected) if selected else '*'}
 FROM {self.table}
 WHERE {column} = ?
 """
+        )
         args = (value,)
 
-        async with self._conn.cursor() as cur:
+        async with self._pool.reader() as conn, conn.cursor() as cur:
             await cur.execute(stmt, args)
             row = await cur.fetchone()
             if row is None:
                 return None
-            result = make_unpacker(cur)(row)
+            result = self._row_factory(cur)(row)
             return result
 
     async def read_between_column(
@@ -78,20 +256,32 @@ WHERE {column} = ?
             order_by_column: str,
             order_by_ascending: bool,
             limit: int
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Row]:
         """Read records for a column between values"""
-        stmt = f"""
-SELECT {','.join(columns) if columns else '*'}
+        selected = tuple(columns or ())
+        stmt = self._statements.statement(
+            (
+                'read_between_column',
+                self.table,
+                column,
+                selected,
+                order_by_column,
+                order_by_ascending
+            ),
+            (self.table, column, order_by_column, *selected),
+            lambda: f"""
+SELECT {','.join(selected) if selected else '*'}
 FROM {self.table}
 WHERE {column} BETWEEN ? AND ?
 ORDER BY {order_by_column} {'ASC' if order_by_ascending else 'DESC'}
 LIMIT ?
 """
+        )
         args = (start_value, end_value, limit)
 
-        async with self._conn.cursor() as cur:
+        async with self._pool.reader() as conn, conn.cursor() as cur:
             await cur.execute(stmt, args)
-            unpack = make_unpacker(cur)
+            unpack = self._row_factory(cur)
             values = [unpack(row) async for row in cur]
             return values
 
@@ -101,22 +291,108 @@ LIMIT ?
             order_by_column: str,
             order_by_ascending: bool,
             limit: int
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Row]:
         """Read many records"""
-        stmt = f"""
-SELECT {','.join(columns) if columns else '*'}
+        selected = tuple(columns or ())
+        stmt = self._statements.statement(
+            (
+                'read_many',
+                self.table,
+                selected,
+                order_by_column,
+                order_by_ascending
+            ),
+            (self.table, order_by_column, *selected),
+            lambda: f"""
+SELECT {','.join(selected) if selected else '*'}
 FROM {self.table}
 ORDER BY {order_by_column} {'ASC' if order_by_ascending else 'DESC'}
 LIMIT ?
 """
+        )
         args = (limit,)
 
-        async with self._conn.cursor() as cur:
+        async with self._pool.reader() as conn, conn.cursor() as cur:
             await cur.execute(stmt, args)
-            unpack = make_unpacker(cur)
+            unpack = self._row_factory(cur)
             values = [unpack(row) async for row in cur]
             return values
 
+    async def read_page(
+            self,
+            columns: Optional[List[str]],
+            order_by_column: str,
+            order_by_ascending: bool,
+            limit: int,
+            cursor: Optional[str] = None,
+            between: Optional[Tuple[Any, Any]] = None
+    ) -> Page:
+        """Read a page of records using keyset pagination.
+
+        The records are ordered by the column and then the id. A page starts
+        after the last record of the previous page, so reading a page is an
+        index seek rather than an offset scan.
+
+        :param columns: The columns to return
+        :type columns: Optional[List[str]]
+        :param order_by_column: The column to order by
+        :type order_by_column: str
+        :param order_by_ascending: If true order ascending, otherwise
+            descending
+        :type order_by_ascending: bool
+        :param limit: The maximum number of records to return
+        :type limit: int
+        :param cursor: The cursor returned with the previous page, defaults
+            to None
+        :type cursor: Optional[str], optional
+        :param between: An optional range for the order by column, defaults
+            to None
+        :type between: Optional[Tuple[Any, Any]], optional
+        :return: The records and the cursor for the next page, or None if
+            there are no more records
+        :rtype: Tuple[List[Row], Optional[str]]
+        """
+        selected = keyset_columns(columns, order_by_column)
+        has_cursor = cursor is not None
+        has_between = between is not None
+        direction = 'ASC' if order_by_ascending else 'DESC'
+        stmt = self._statements.statement(
+            (
+                'read_page',
+                self.table,
+                selected,
+                order_by_column,
+                order_by_ascending,
+                has_cursor,
+                has_between
+            ),
+            (self.table, order_by_column, *selected),
+            lambda: f"""
+SELECT {','.join(selected) if selected else '*'}
+FROM {self.table}
+{keyset_where(
+    order_by_column,
+    'id',
+    order_by_ascending,
+    has_between,
+    has_cursor
+)}
+ORDER BY {order_by_column} {direction},id {direction}
+LIMIT ?
+"""
+        )
+        args = (
+            *(between or ()),
+            *(decode_cursor(cursor, 2) if cursor is not None else ()),
+            limit + 1
+        )
+
+        async with self._pool.reader() as conn, conn.cursor() as cur:
+            await cur.execute(stmt, args)
+            unpack = self._row_factory(cur)
+            values = [unpack(row) async for row in cur]
+            return make_page(values, order_by_column, limit)
+
     async def read_many_by_column(
             self,
             column: str,
@@ -125,20 +401,32 @@ LIMIT ?
             order_by_column: str,
             order_by_ascending: bool,
             limit: int
-    ) -> List[Dict[str, Any]]:
+    ) -> List[Row]:
         """Read many records"""
-        stmt = f"""
-SELECT {','.join(columns) if columns else '*'}
+        selected = tuple(columns or ())
+        stmt = self._statements.statement(
+            (
+                'read_many_by_column',
+                self.table,
+                column,
+                selected,
+                order_by_column,
+                order_by_ascending
+            ),
+            (self.table, column, order_by_column, *selected),
+            lambda: f"""
+SELECT {','.join(selected) if selected else '*'}
 FROM {self.table}
 WHERE {column} = ?
 ORDER BY {order_by_column} {'ASC' if order_by_ascending else 'DESC'}
 LIMIT ?
 """
+        )
         args = (value, limit)
 
-        async with self._conn.cursor() as cur:
+        async with self._pool.reader() as conn, conn.cursor() as cur:
             await cur.execute(stmt, args)
-            unpack = make_unpacker(cur)
+            unpack = self._row_factory(cur)
             values = [unpack(row) async for row in cur]
             return values
 
@@ -147,29 +435,58 @@ LIMIT ?
             **kwargs
     ) -> bool:
         """Update a record"""
-        stmt = f"""UPDATE {self.table}
-SET {','.join(f'{key}=?' for key in kwargs)}
+        keys = tuple(kwargs)
+        stmt = self._statements.statement(
+            ('update', self.table, keys),
+            (self.table, *keys),
+            lambda: f"""UPDATE {self.table}
+SET {','.join(f'{key}=?' for key in keys)}
 WHERE id=?"""
+        )
         args = *kwargs.values(), id_
-        async with self._conn.cursor() as cur:
+        async with self._pool.write() as conn, conn.cursor() as cur:
+            await cur.execute(stmt, args)
+            rowcount = cur.rowcount
+        return rowcount == 1
+
+    async def update_by_column(
+            self,
+            column: str,
+            value: Any,
+            **kwargs
+    ) -> int:
+        """Update the records with a given column value"""
+        keys = tuple(kwargs)
+        stmt = self._statements.statement(
+            ('update_by_column', self.table, column, keys),
+            (self.table, column, *keys),
+            lambda: f"""UPDATE {self.table}
+SET {','.join(f'{key}=?' for key in keys)}
+WHERE {column}=?"""
+        )
+        args = *kwargs.values(), value
+        async with self._pool.write() as conn, conn.cursor() as cur:
             await cur.execute(stmt, args)
-            await self._conn.commit()
-            return cur.rowcount == 1
+            rowcount = cur.rowcount
+        return rowcount
 
     async def delete(
             self, id_: int
     ) -> bool:
         """Delete a record"""
-        stmt = f"""
+        stmt = self._statements.statement(
+            ('delete', self.table),
+            (self.table,),
+            lambda: f"""
 DELETE FROM {self.table}
 WHERE id=?
 """
+        )
         args = (id_,)
-        async with self._conn.cursor() as cur:
+        async with self._pool.write() as conn, conn.cursor() as cur:
             await cur.execute(stmt, args)
-            await self._conn.commit()
-            return cur.rowcount == 1
+            rowcount = cur.rowcount
+        return rowcount == 1
 
-    @abstractmethod
     async def initialise(self) -> None:
-        """Initialise the repository"""
+        """Initialise the repository once the schema has been migrated"""
@@ -0,0 +1,242 @@
+"""Response Cache"""
+
+from collections import OrderedDict
+import gzip
+import time
+from typing import (
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple
+)
+
+from baretypes import (
+    Scope,
+    Info,
+    RouteMatches,
+    Content,
+    Header,
+    HttpResponse,
+    HttpRequestCallback
+)
+from bareutils import bytes_reader, bytes_writer
+import bareutils.header as header
+
+# The parts of a request a cached response can depend on.
+KEY_PARTS: Dict[str, Callable[[Scope, Info], Hashable]] = {
+    'path': lambda scope, info: (scope['path'], scope['query_string']),
+    'role': lambda scope, info: info['jwt']['role'],
+    'user': lambda scope, info: info['jwt']['sub']
+}
+
+# An allowance for the key, headers and bookkeeping of each response.
+RESPONSE_OVERHEAD = 256
+
+
+def _parse_accept_encoding(value: bytes) -> Dict[bytes, float]:
+    qualities: Dict[bytes, float] = {}
+    for item in value.split(b','):
+        coding, *params = (part.strip() for part in item.split(b';'))
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, text = param.partition(b'=')
+            if name.strip().lower() == b'q':
+                try:
+                    quality = float(text)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    return qualities
+
+
+def accepts_gzip(accept_encoding: Optional[bytes]) -> bool:
+    """Check if a client accepts a gzip compressed body.
+
+    Gzip is accepted when it, or failing that "*", has a non zero quality
+    which is no lower than that of the identity coding.
+
+    :param accept_encoding: The accept-encoding header, or None if there is
+        none
+    :type accept_encoding: Optional[bytes]
+    :return: True if gzip is accepted
+    :rtype: bool
+    """
+    if accept_encoding is None:
+        return False
+    qualities = _parse_accept_encoding(accept_encoding)
+    quality = qualities.get(
+        b'gzip',
+        qualities.get(b'x-gzip', qualities.get(b'*', 0.0))
+    )
+    return quality > 0 and quality >= qualities.get(b'identity', 0.0)
+
+
+class CachedResponse(NamedTuple):
+    """A cached response with a compressed body"""
+    expires_at: float
+    status: int
+    headers: List[Header]
+    body: bytes
+
+
+class ResponseCache:
+    """Response caching middleware for pages which are expensive to render.
+
+    A response is cached by the parts of the request the page depends on,
+    which must include the user if the page shows who is logged in. The
+    bodies are stored gzip compressed, and the cache is bounded by the size
+    of the compressed bodies, with the least recently used responses evicted
+    first. A client which accepts gzip is sent the compressed body as it is.
+
+    The cache is cleared when this process writes the data the pages are
+    rendered from. As with the entity cache, a response rendered before a
+    write is never stored after it. The cache is held by each process, and a
+    write made by another worker does not clear it, so with several workers
+    a page can be stale until its time to live has passed.
+    """
+
+    def __init__(
+            self,
+            max_bytes: int,
+            key_parts: Sequence[str] = ('path', 'role', 'user'),
+            ttl: Optional[float] = None,
+            compress_level: int = 6
+    ) -> None:
+        """Initialise the response cache
+
+        :param max_bytes: The maximum size of the cached responses
+        :type max_bytes: int
+        :param key_parts: The parts of the request the responses depend on,
+            defaults to ('path', 'role', 'user')
+        :type key_parts: Sequence[str], optional
+        :param ttl: The time to live in seconds, or None if responses don't
+            expire, defaults to None
+        :type ttl: Optional[float], optional
+        :param compress_level: The gzip compression level, defaults to 6
+        :type compress_level: int, optional
+        """
+        unknown = set(key_parts) - set(KEY_PARTS)
+        if unknown:
+            raise ValueError(f'Unknown response cache key parts {unknown}')
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.compress_level = compress_level
+        self.generation = 0
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._key_parts = [KEY_PARTS[name] for name in key_parts]
+        self._responses: 'OrderedDict[Tuple[Hashable, ...], CachedResponse]' = OrderedDict()
+
+    def clear(self) -> None:
+        """Remove all the responses from the cache"""
+        self.generation += 1
+        self._responses.clear()
+        self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """The cache statistics
+
+        :return: The hits, misses, evictions, number of responses and size
+            of the cache
+        :rtype: Dict[str, int]
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'responses': len(self._responses),
+            'size': self.size
+        }
+
+    def _get(self, key: Tuple[Hashable, ...]) -> Optional[CachedResponse]:
+        response = self._responses.get(key)
+        if response is None:
+            self.misses += 1
+            return None
+
+        if self.ttl is not None and response.expires_at < time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._responses.move_to_end(key)
+        self.hits += 1
+        return response
+
+    def _put(
+            self,
+            key: Tuple[Hashable, ...],
+            response: CachedResponse,
+            generation: int
+    ) -> None:
+        if generation != self.generation:
+            return
+
+        size = len(response.body) + RESPONSE_OVERHEAD
+        if size > self.max_bytes:
+            return
+
+        self._remove(key)
+        self._responses[key] = response
+        self.size += size
+        while self.size > self.max_bytes:
+            oldest = next(iter(self._responses))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: Tuple[Hashable, ...]) -> None:
+        response = self._responses.pop(key, None)
+        if response is not None:
+            self.size -= len(response.body) + RESPONSE_OVERHEAD
+
+    async def __call__(
+            self,
+            scope: Scope,
+            info: Info,
+            matches: RouteMatches,
+            content: Content,
+            handler: HttpRequestCallback
+    ) -> HttpResponse:
+        key = tuple(key_part(scope, info) for key_part in self._key_parts)
+        is_gzip = accepts_gzip(
+            header.find(b'accept-encoding', scope['headers'])
+        )
+
+        data: Optional[bytes] = None
+        response = self._get(key)
+        if response is None:
+            generation = self.generation
+            status, headers, body, pushes = await handler(
+                scope,
+                info,
+                matches,
+                content
+            )
+            if status != 200 or pushes:
+                return status, headers, body, pushes
+
+            data = await bytes_reader(body) if body is not None else b''
+            response = CachedResponse(
+                time.monotonic() + self.ttl if self.ttl is not None else 0.0,
+                status,
+                list(headers or []),
+                gzip.compress(data, self.compress_level)
+            )
+            self._put(key, response, generation)
+
+        headers = [*response.headers, (b'vary', b'accept-encoding')]
+        if is_gzip:
+            headers.append((b'content-encoding', b'gzip'))
+            return response.status, headers, bytes_writer(response.body)
+
+        if data is None:
+            data = gzip.decompress(response.body)
+        return response.status, headers, bytes_writer(data)
@@ -0,0 +1,158 @@
+"""Revocation Store"""
+
+import asyncio
+from datetime import datetime, timedelta
+import logging
+import time
+from typing import Any, Dict, Mapping, Optional
+
+from .connection_pool import ConnectionPool
+
+LOGGER = logging.getLogger(__name__)
+
+
+class RevocationStore:
+    """The revoked tokens and users.
+
+    A token is revoked by its jti, which is kept when the token is renewed, so
+    revoking a token ends the login session. A user is revoked by the time
+    up to which their tokens were issued.
+
+    The revocations are persisted in the database and held in memory, so
+    most checks are a dict lookup with no database access. The revocations
+    are re-read from the database when the refresh interval has passed, so
+    those made by the other workers are seen within the interval.
+
+    Tokens are issued with the time to the microsecond, so revoking a user
+    does not revoke a token issued after the revocation in the same second.
+    """
+
+    def __init__(
+            self,
+            pool: ConnectionPool,
+            refresh_interval: timedelta = timedelta(seconds=5)
+    ) -> None:
+        """Initialise the revocation store
+
+        :param pool: The connection pool
+        :type pool: ConnectionPool
+        :param refresh_interval: The time after which the revocations are
+            re-read from the database, defaults to 5 seconds
+        :type refresh_interval: timedelta, optional
+        """
+        self._pool = pool
+        self._refresh_interval = refresh_interval.total_seconds()
+        self._refresh_at = 0.0
+        self._refresh: Optional[asyncio.Future] = None
+        self._tokens: Dict[str, datetime] = {}
+        self._users: Dict[str, datetime] = {}
+
+    async def load(self) -> None:
+        """Remove the expired revocations and load the rest"""
+        now = datetime.utcnow()
+        async with self._pool.write() as conn, conn.cursor() as cur:
+            await cur.execute(
+                'DELETE FROM revoked_tokens WHERE expires < ?',
+                (now,)
+            )
+
+        await self._read()
+        LOGGER.info(
+            'Loaded %s token and %s user revocations',
+            len(self._tokens),
+            len(self._users)
+        )
+
+    async def _read(self) -> None:
+        refresh_at = time.monotonic() + self._refresh_interval
+        async with self._pool.reader() as conn, conn.cursor() as cur:
+            await cur.execute('SELECT jti, expires FROM revoked_tokens')
+            tokens = dict(await cur.fetchall())
+            await cur.execute(
+                'SELECT username, revoked_before FROM revoked_users'
+            )
+            users = dict(await cur.fetchall())
+
+        # A revocation made by this worker while the rows were being read
+        # may not be in them, so the revocations held are kept.
+        now = datetime.utcnow()
+        self._tokens = {
+            jti: expires
+            for jti, expires in {**self._tokens, **tokens}.items()
+            if expires >= now
+        }
+        for username, revoked_before in users.items():
+            self._users[username] = max(
+                revoked_before,
+                self._users.get(username, revoked_before)
+            )
+        self._refresh_at = refresh_at
+
+    async def _refresh_once(self) -> None:
+        if self._refresh is None:
+            self._refresh = asyncio.ensure_future(self._read())
+            self._refresh.add_done_callback(self._on_refreshed)
+        # A cancelled request must not cancel the refresh the others await.
+        await asyncio.shield(self._refresh)
+
+    def _on_refreshed(self, _refresh: asyncio.Future) -> None:
+        self._refresh = None
+
+    async def is_revoked(self, payload: Mapping[str, Any]) -> bool:
+        """Check if a token has been revoked
+
+        :param payload: The decoded token
+        :type payload: Mapping[str, Any]
+        :return: True if the token has been revoked
+        :rtype: bool
+        """
+        if time.monotonic() >= self._refresh_at:
+            await self._refresh_once()
+        if payload.get('jti') in self._tokens:
+            return True
+        revoked_before = self._users.get(payload['sub'])
+        return revoked_before is not None and payload['iat'] <= revoked_before
+
+    async def revoke_token(
+            self,
+            jti: str,
+            username: str,
+            expires: datetime
+    ) -> None:
+        """Revoke a token
+
+        :param jti: The token id
+        :type jti: str
+        :param username: The user the token was issued to
+        :type username: str
+        :param expires: The time after which the token can't be used, and the
+            revocation can be forgotten
+        :type expires: datetime
+        """
+        async with self._pool.write() as conn, conn.cursor() as cur:
+            await cur.execute(
+                """
+INSERT OR REPLACE INTO revoked_tokens(jti, username, expires)
+VALUES (?, ?, ?)
+""",
+                (jti, username, expires)
+            )
+        self._tokens[jti] = expires
+
+    async def revoke_user(self, username: str, revoked_before: datetime) -> None:
+        """Revoke the tokens issued to a user up to a given time
+
+        :param username: The username
+        :type username: str
+        :param revoked_before: The time up to which tokens are revoked
+        :type revoked_before: datetime
+        """
+        async with self._pool.write() as conn, conn.cursor() as cur:
+            await cur.execute(
+                """
+INSERT OR REPLACE INTO revoked_users(username, revoked_before)
+VALUES (?, ?)
+""",
+                (username, revoked_before)
+            )
+        self._users[username] = revoked_before
@@ -0,0 +1,203 @@
+"""HTTP/2 Server Push
+
+A browser only finds the stylesheets and scripts a page uses after it has
+received and parsed the page, which costs another round trip before it can
+request them. On an HTTP/2 connection the server can push them with the
+page instead.
+"""
+
+from collections import OrderedDict
+from html.parser import HTMLParser
+import logging
+import time
+from typing import (
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple
+)
+
+from baretypes import (
+    Scope,
+    Info,
+    RouteMatches,
+    Content,
+    HttpResponse,
+    HttpRequestCallback
+)
+import bareutils.header as header
+import jinja2
+
+LOGGER = logging.getLogger(__name__)
+
+# The request headers a pushed request is given, so it matches the request the
+# browser would have made for the asset.
+PUSH_REQUEST_HEADERS = (b'accept-encoding', b'user-agent')
+
+
+class _AssetParser(HTMLParser):
+    """Finds the stylesheets and scripts in a page"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.assets: List[str] = []
+
+    def handle_starttag(self, tag, attrs) -> None:
+        attributes = dict(attrs)
+        if tag == 'link':
+            rel = (attributes.get('rel') or '').lower().split()
+            url = attributes.get('href') if 'stylesheet' in rel else None
+        elif tag == 'script':
+            url = attributes.get('src')
+        else:
+            return
+
+        # Only assets served by this server, at a path which is not made by
+        # the template, can be pushed.
+        if (
+                url is not None and
+                url.startswith('/') and
+                not url.startswith('//') and
+                '{' not in url and
+                url not in self.assets
+        ):
+            self.assets.append(url)
+
+
+def find_assets(env: jinja2.Environment, template_name: str) -> List[str]:
+    """Find the stylesheets and scripts referenced by a template.
+
+    :param env: The template environment
+    :type env: jinja2.Environment
+    :param template_name: The name of the template, usually the base template
+        the pages extend
+    :type template_name: str
+    :return: The paths of the assets in the order they appear
+    :rtype: List[str]
+    """
+    source, _filename, _uptodate = env.loader.get_source(env, template_name)
+    parser = _AssetParser()
+    parser.feed(source)
+    parser.close()
+    return parser.assets
+
+
+def _is_push_supported(scope: Scope) -> bool:
+    return (
+        scope['http_version'] in ('2', '2.0') and
+        'http.response.push' in (scope.get('extensions') or {})
+    )
+
+
+def _is_page(status: int, headers: Optional[List[Tuple[bytes, bytes]]]) -> bool:
+    if status != 200 or not headers:
+        return False
+    content_type = header.find(b'content-type', headers)
+    return content_type is not None and content_type.startswith(b'text/html')
+
+
+class ServerPush:
+    """Middleware which pushes the assets of a page on HTTP/2 connections.
+
+    Each asset is pushed once per connection: the later pages on the
+    connection find it in the browser's cache. A connection is identified by
+    the address of the client, and is taken to have closed when it has been
+    idle for longer than the server keeps connections alive. The state of
+    the connections is bounded by discarding the least recently used.
+    """
+
+    def __init__(
+            self,
+            assets: Sequence[str],
+            idle_timeout: float = 5.0,
+            max_connections: int = 1024
+    ) -> None:
+        """Initialise the server push middleware
+
+        :param assets: The paths of the assets to push with each page
+        :type assets: Sequence[str]
+        :param idle_timeout: The time in seconds after which an idle
+            connection is taken to have closed, defaults to 5.0
+        :type idle_timeout: float, optional
+        :param max_connections: The maximum number of connections to track,
+            defaults to 1024
+        :type max_connections: int, optional
+        """
+        self.assets = list(assets)
+        self.idle_timeout = idle_timeout
+        self.max_connections = max_connections
+        self.pushes = 0
+        self._connections: 'OrderedDict[Hashable, Tuple[float, Set[str]]]' = OrderedDict()
+
+    def _take_unpushed(self, scope: Scope) -> List[str]:
+        client = scope.get('client')
+        if client is None:
+            return self.assets
+
+        key = (tuple(scope.get('server') or ()), tuple(client))
+        now = time.monotonic()
+        connection = self._connections.pop(key, None)
+        if connection is None or now - connection[0] > self.idle_timeout:
+            pushed: Set[str] = set()
+        else:
+            pushed = connection[1]
+
+        unpushed = [asset for asset in self.assets if asset not in pushed]
+        pushed.update(unpushed)
+        self._connections[key] = (now, pushed)
+        while len(self._connections) > self.max_connections:
+            self._connections.popitem(last=False)
+        return unpushed
+
+    def stats(self) -> Dict[str, int]:
+        """The server push statistics
+
+        :return: The number of pushes and connections being tracked
+        :rtype: Dict[str, int]
+        """
+        return {
+            'pushes': self.pushes,
+            'connections': len(self._connections)
+        }
+
+    async def __call__(
+            self,
+            scope: Scope,
+            info: Info,
+            matches: RouteMatches,
+            content: Content,
+            handler: HttpRequestCallback
+    ) -> HttpResponse:
+        status, headers, body, pushes = await handler(
+            scope,
+            info,
+            matches,
+            content
+        )
+        if (
+                not self.assets or
+                scope['method'] != 'GET' or
+                not _is_push_supported(scope) or
+                not _is_page(status, headers)
+        ):
+            return status, headers, body, pushes
+
+        unpushed = self._take_unpushed(scope)
+        if not unpushed:
+            return status, headers, body, pushes
+
+        push_headers = [
+            (name, value)
+            for name, value in scope['headers']
+            if name in PUSH_REQUEST_HEADERS
+        ]
+        pushes = list(pushes or []) + [
+            (asset, push_headers)
+            for asset in unpushed
+        ]
+        self.pushes += len(unpushed)
+        LOGGER.debug('Pushing %s with %s', unpushed, scope['path'])
+        return status, headers, body, pushes
@@ -0,0 +1,98 @@
+"""Statement Cache"""
+
+import re
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Tuple
+)
+
+IDENTIFIER_REGEX = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def validate_identifiers(identifiers: Iterable[str]) -> None:
+    """Check the identifiers are safe to interpolate into SQL
+
+    :param identifiers: The table and column names
+    :type identifiers: Iterable[str]
+    :raises ValueError: If an identifier is invalid
+    """
+    for identifier in identifiers:
+        if not IDENTIFIER_REGEX.match(identifier):
+            raise ValueError(f'Invalid identifier "{identifier}"')
+
+
+class StatementCache:
+    """A cache of generated SQL statements.
+
+    Statements are keyed by the operation, table, columns and ordering, so the
+    SQL text is byte-for-byte stable and can be reused by the sqlite
+    statement cache. The identifiers are validated once when the statement is
+    first built.
+    """
+
+    def __init__(self, max_size: int = 1024) -> None:
+        """Initialise the statement cache
+
+        :param max_size: The maximum number of statements to hold, defaults to
+            1024
+        :type max_size: int, optional
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._statements: Dict[Tuple[Any, ...], str] = {}
+
+    def statement(
+            self,
+            key: Tuple[Any, ...],
+            identifiers: Iterable[str],
+            build: Callable[[], str]
+    ) -> str:
+        """Get a statement, building it if it is not in the cache.
+
+        :param key: The cache key
+        :type key: Tuple[Any, ...]
+        :param identifiers: The identifiers used by the statement
+        :type identifiers: Iterable[str]
+        :param build: A function to build the statement
+        :type build: Callable[[], str]
+        :return: The SQL statement
+        :rtype: str
+        """
+        stmt = self._statements.get(key)
+        if stmt is not None:
+            self.hits += 1
+            return stmt
+
+        self.misses += 1
+        validate_identifiers(identifiers)
+        stmt = build()
+        if len(self._statements) >= self.max_size:
+            # Discard the oldest statement.
+            del self._statements[next(iter(self._statements))]
+        self._statements[key] = stmt
+        return stmt
+
+    def stats(self) -> Dict[str, int]:
+        """The cache statistics
+
+        :return: The hits, misses and size of the cache
+        :rtype: Dict[str, int]
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._statements)
+        }
+
+    def clear(self) -> None:
+        """Clear the cache and the statistics"""
+        self._statements.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+STATEMENT_CACHE = StatementCache()
@@ -0,0 +1,121 @@
+"""Static controller"""
+
+from datetime import datetime, timedelta
+import hashlib
+import logging
+import mimetypes
+import os
+from typing import Dict, NamedTuple
+
+from bareasgi import (
+    Application,
+    Scope,
+    Info,
+    RouteMatches,
+    Content,
+    HttpResponse,
+    bytes_writer
+)
+from bareutils import response_code
+
+from .conditional import is_not_modified, validator_headers
+
+LOGGER = logging.getLogger(__name__)
+
+
+class StaticFile(NamedTuple):
+    """A static file held in memory"""
+    content_type: bytes
+    etag: bytes
+    updated: datetime
+    body: bytes
+
+
+def _load_file(path: str) -> StaticFile:
+    content_type, encoding = mimetypes.guess_type(path)
+    if content_type is None or encoding is not None:
+        content_type = 'application/octet-stream'
+    elif content_type.startswith('text/'):
+        content_type += '; charset=utf-8'
+
+    with open(path, 'rb') as file_ptr:
+        body = file_ptr.read()
+    digest = hashlib.blake2b(body, digest_size=8).hexdigest()
+
+    return StaticFile(
+        content_type.encode(),
+        f'"{digest}"'.encode(),
+        datetime.utcfromtimestamp(int(os.path.getmtime(path))),
+        body
+    )
+
+
+class StaticController:
+    """Serves the stylesheets and scripts the pages use.
+
+    The files are small, so they are read when the controller is created and
+    served from memory.
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            path_prefix: str = '/static',
+            max_age: timedelta = timedelta(days=1)
+    ) -> None:
+        """Initialise the static controller
+
+        :param directory: The folder containing the files
+        :type directory: str
+        :param path_prefix: The path the files are served under, defaults to
+            '/static'
+        :type path_prefix: str, optional
+        :param max_age: The time a client may use its copy of a file before
+            revalidating it, defaults to a day
+        :type max_age: timedelta, optional
+        """
+        self.path_prefix = path_prefix
+        self._cache_control = (
+            f'public, max-age={int(max_age.total_seconds())}'.encode()
+        )
+        self._files: Dict[str, StaticFile] = {}
+        for root, _dirs, files in os.walk(directory):
+            for name in files:
+                path = os.path.join(root, name)
+                relpath = os.path.relpath(path, directory).replace(os.sep, '/')
+                self._files[relpath] = _load_file(path)
+        LOGGER.info('Loaded %s static files', len(self._files))
+
+    def add_routes(self, app: Application) -> None:
+        """Add routes to the application
+
+        :param app: The ASGI application
+        :type app: Application
+        """
+        app.http_router.add(
+            {'GET'},
+            self.path_prefix + '/{name:path}',
+            self._get
+        )
+
+    async def _get(
+            self,
+            scope: Scope,
+            _info: Info,
+            matches: RouteMatches,
+            _content: Content
+    ) -> HttpResponse:
+        static_file = self._files.get(matches['name'])
+        if static_file is None:
+            return response_code.NOT_FOUND
+
+        headers = validator_headers(
+            static_file.etag,
+            static_file.updated,
+            self._cache_control
+        )
+        if is_not_modified(scope['headers'], static_file.etag, static_file.updated):
+            return 304, headers
+
+        headers.append((b'content-type', static_file.content_type))
+        return 200, headers, bytes_writer(static_file.body)
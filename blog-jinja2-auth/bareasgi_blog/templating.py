@@ -0,0 +1,189 @@
+"""Templating"""
+
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, List, Mapping, Optional
+
+from baretypes import (
+    Scope,
+    Info,
+    RouteMatches,
+    Content,
+    HttpResponse,
+    HttpRequestCallback
+)
+from bareasgi_jinja2.jinja2_template_provider import (
+    INFO_KEY,
+    HttpDecoratorResponse,
+    HttpTemplateRequestCallback,
+    HttpTemplateResponse,
+    Jinja2TemplateProvider
+)
+import jinja2
+
+from .fragment_cache import FragmentCache, FragmentCacheExtension
+
+LOGGER = logging.getLogger(__name__)
+
+
+def create_environment(
+        templates: str,
+        bytecode_cache_dir: Optional[str] = None,
+        fragment_cache: Optional[FragmentCache] = None
+) -> jinja2.Environment:
+    """Create the template environment.
+
+    The bytecode cache keeps the compiled templates on disk, so a worker
+    which starts after the templates have been compiled by another worker,
+    or by an earlier run, only has to load them. A compiled template is
+    recompiled when its source changes.
+
+    :param templates: The folder containing the templates
+    :type templates: str
+    :param bytecode_cache_dir: The folder for the bytecode cache, or None for
+        no bytecode cache, defaults to None
+    :type bytecode_cache_dir: Optional[str], optional
+    :param fragment_cache: The cache for the fragments in the templates'
+        cache tags, or None to render them every time, defaults to None
+    :type fragment_cache: Optional[FragmentCache], optional
+    :return: The template environment
+    :rtype: jinja2.Environment
+    """
+    bytecode_cache: Optional[jinja2.BytecodeCache] = None
+    if bytecode_cache_dir is not None:
+        directory = os.path.expanduser(bytecode_cache_dir)
+        os.makedirs(directory, exist_ok=True)
+        bytecode_cache = jinja2.FileSystemBytecodeCache(directory)
+
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(templates),
+        autoescape=jinja2.select_autoescape(['html', 'xml']),
+        enable_async=True,
+        bytecode_cache=bytecode_cache,
+        extensions=[FragmentCacheExtension]
+    )
+    env.fragment_cache = fragment_cache
+    return env
+
+
+def precompile_templates(env: jinja2.Environment) -> None:
+    """Load every template, so none are compiled while serving a request
+
+    :param env: The template environment
+    :type env: jinja2.Environment
+    """
+    start = time.perf_counter()
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    LOGGER.info(
+        'Loaded %s templates in %.1f ms',
+        len(names),
+        (time.perf_counter() - start) * 1000
+    )
+
+
+async def _generate(
+        template: jinja2.Template,
+        variables: Mapping[str, Any],
+        encoding: str,
+        chunk_size: int
+) -> AsyncIterator[bytes]:
+    # The template produces many small strings, so they are gathered into
+    # chunks rather than sent one at a time.
+    parts: List[str] = []
+    size = 0
+    async for text in template.generate_async(**variables):
+        parts.append(text)
+        size += len(text)
+        if size >= chunk_size:
+            yield ''.join(parts).encode(encoding)
+            parts = []
+            size = 0
+    if parts:
+        yield ''.join(parts).encode(encoding)
+
+
+def stream_template(
+        template_name: str,
+        status: int = 200,
+        encoding: str = 'utf-8',
+        chunk_size: int = 8192
+) -> HttpTemplateResponse:
+    """Registers a template callback which streams the rendered page.
+
+    This is used in the same way as bareasgi_jinja2.template, but the page
+    is sent in chunks as it is rendered rather than after it has been
+    rendered to a single string. The first bytes are sent sooner, and a
+    large page is never held in memory as a whole. As the status has been
+    sent by then, an error while rendering ends the response early rather
+    than giving a 500.
+
+    :param template_name: The name of the template
+    :type template_name: str
+    :param status: The OK status, defaults to 200
+    :type status: int, optional
+    :param encoding: The encoding of the body, defaults to 'utf-8'
+    :type encoding: str, optional
+    :param chunk_size: The number of characters to gather before sending a
+        chunk, defaults to 8192
+    :type chunk_size: int, optional
+    :return: The decorated function
+    :rtype: HttpTemplateResponse
+    """
+
+    def decorator(func: HttpTemplateRequestCallback) -> HttpDecoratorResponse:
+        async def wrapper(*args) -> HttpResponse:
+            # Index from end as class methods will have an extra 'self' parameter.
+            info = args[-3]
+            provider: Jinja2TemplateProvider = info[INFO_KEY]
+            template = provider.env.get_template(template_name)
+            variables = await func(*args)
+            headers = [
+                (b'content-type', f'text/html; charset={encoding}'.encode())
+            ]
+            return (
+                status,
+                headers,
+                _generate(template, variables, encoding, chunk_size)
+            )
+
+        return wrapper
+
+    return decorator
+
+
+class FirstRequestLogger:
+    """Middleware which logs the time taken by the first requests a worker
+    serves, when anything still to be loaded or warmed up shows."""
+
+    def __init__(self, count: int = 20) -> None:
+        """Initialise the first request logger
+
+        :param count: The number of requests to log, defaults to 20
+        :type count: int, optional
+        """
+        self.remaining = count
+
+    async def __call__(
+            self,
+            scope: Scope,
+            info: Info,
+            matches: RouteMatches,
+            content: Content,
+            handler: HttpRequestCallback
+    ) -> HttpResponse:
+        if self.remaining <= 0:
+            return await handler(scope, info, matches, content)
+
+        self.remaining -= 1
+        start = time.perf_counter()
+        response = await handler(scope, info, matches, content)
+        LOGGER.info(
+            'Early request %s %s took %.1f ms',
+            scope['method'],
+            scope['path'],
+            (time.perf_counter() - start) * 1000
+        )
+        return response
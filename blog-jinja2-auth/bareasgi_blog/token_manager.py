@@ -2,36 +2,48 @@
 Token Manager
 """
 
+import calendar
+from collections import OrderedDict
 from datetime import datetime, timedelta
 import logging
-from typing import Mapping, Any, List, Optional
+from types import MappingProxyType
+from typing import Dict, Mapping, Any, List, Optional, Tuple
+import uuid
 
 from baretypes import Header
 from bareutils import encode_set_cookie
-import bareutils.header as header
 import jwt
 
+from .key_ring import KeyRing
+
 # pylint: disable=invalid-name
 logger = logging.getLogger(__name__)
 
 
+def _numeric_date(value: datetime) -> float:
+    # The time is kept to the microsecond so a revocation can tell the tokens
+    # issued before it from those issued after it in the same second.
+    return calendar.timegm(value.utctimetuple()) + value.microsecond / 1e6
+
+
 class TokenManager:
     """Token Manager"""
 
     def __init__(
             self,
-            secret: str,
+            key_ring: KeyRing,
             token_expiry: timedelta,
             issuer: str,
             cookie_name: str,
             domain: str,
             path: str,
-            max_age: timedelta
+            max_age: timedelta,
+            cache_size: int = 1024
     ) -> None:
         """Initialise the token manager
 
-        :param secret: The secret shared by all authenticators
-        :type secret: str
+        :param key_ring: The keys used to sign and verify tokens
+        :type key_ring: KeyRing
         :param token_expiry: The time before a token requires renewing.
         :type token_expiry: timedelta
         :param issuer: The cookie issuer
@@ -44,14 +56,21 @@ class TokenManager:
         :type path: str
         :param max_age: The cookie maximum age
         :type max_age: timedelta
+        :param cache_size: The maximum number of verified tokens to cache,
+            defaults to 1024
+        :type cache_size: int, optional
         """
-        self.secret = secret
+        self.key_ring = key_ring
         self.token_expiry = token_expiry
         self.issuer = issuer
         self.cookie_name = cookie_name.encode()
         self.domain = domain.encode()
         self.path = path.encode()
         self.max_age = max_age
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._verified: 'OrderedDict[bytes, Tuple[int, Mapping[str, Any]]]' = OrderedDict()
 
     def encode(
             self,
@@ -59,7 +78,8 @@ class TokenManager:
             now: datetime,
             issued_at: datetime,
             user_id: int,
-            role: str
+            role: str,
+            jti: Optional[str] = None
     ) -> bytes:
         """Encode the cookie as a JSON web token
 
@@ -73,6 +93,9 @@ class TokenManager:
         :type user_id: int
         :param role: The role
         :type role: str
+        :param jti: The id of the login session, which is kept when the token
+            is renewed, or None to start a new session, defaults to None
+        :type jti: Optional[str], optional
         :return: The information encoded as a JSON web token
         :rtype: bytes
         """
@@ -82,11 +105,29 @@ class TokenManager:
             'iss': self.issuer,
             'sub': username,
             'exp': expiry,
-            'iat': issued_at,
+            'iat': _numeric_date(issued_at),
+            'jti': jti or uuid.uuid4().hex,
             'user_id': user_id,
             'role': role
         }
-        return jwt.encode(payload, key=self.secret)
+        key = self.key_ring.current
+        if key.signing_key is None:
+            raise RuntimeError(f'Key "{key.kid}" can only verify')
+        return jwt.encode(
+            payload,
+            key=key.signing_key,
+            algorithm=key.algorithm,
+            headers={'kid': key.kid}
+        )
+
+    def _verify(self, token: bytes) -> Dict[str, Any]:
+        key = self.key_ring.find(jwt.get_unverified_header(token).get('kid'))
+        return jwt.decode(
+            token,
+            key=key.verifying_key,
+            algorithms=[key.algorithm],
+            options={'verify_exp': False}
+        )
 
     def decode(self, token: bytes) -> Mapping[str, Any]:
         """Decode the JSON web token
@@ -96,15 +137,54 @@ class TokenManager:
         :return: The decoded token
         :rtype: Mapping[str, Any]
         """
-        payload = jwt.decode(
-            token,
-            key=self.secret,
-            options={'verify_exp': False}
-        )
+        payload = self._verify(token)
         payload['exp'] = datetime.utcfromtimestamp(payload['exp'])
         payload['iat'] = datetime.utcfromtimestamp(payload['iat'])
         return payload
 
+    def decode_unexpired(
+            self,
+            token: bytes,
+            now: int
+    ) -> Optional[Mapping[str, Any]]:
+        """Decode a JSON web token which has not expired.
+
+        Verified tokens are cached until they expire, so a token sent with
+        many requests is only verified once. The cached payloads are shared
+        and read only.
+
+        :param token: The token
+        :type token: bytes
+        :param now: The current time in seconds since the epoch
+        :type now: int
+        :return: The decoded token, or None if it has expired
+        :rtype: Optional[Mapping[str, Any]]
+        """
+        entry = self._verified.get(token)
+        if entry is not None:
+            expires_at, payload = entry
+            if expires_at > now:
+                self._verified.move_to_end(token)
+                self.cache_hits += 1
+                return payload
+            del self._verified[token]
+
+        self.cache_misses += 1
+        payload = self._verify(token)
+        expires_at = payload['exp']
+        if expires_at <= now:
+            return None
+
+        payload['exp'] = datetime.utcfromtimestamp(expires_at)
+        payload['iat'] = datetime.utcfromtimestamp(payload['iat'])
+        payload = MappingProxyType(payload)
+
+        self._verified[token] = (expires_at, payload)
+        if len(self._verified) > self.cache_size:
+            self._verified.popitem(last=False)
+
+        return payload
+
     def get_token_from_headers(self, headers: List[Header]) -> Optional[bytes]:
         """Get the token from the headers or None if not present
 
@@ -113,8 +193,17 @@ class TokenManager:
         :return: The token of None if not present
         :rtype: Optional[bytes]
         """
-        tokens = header.cookie(headers).get(self.cookie_name)
-        if tokens is None or not tokens:
+        # Only the token cookie is wanted, so the other cookies are skipped
+        # rather than decoded.
+        prefix = self.cookie_name + b'='
+        tokens = [
+            morsel[len(prefix):]
+            for name, value in headers
+            if name == b'cookie'
+            for morsel in value.rstrip(b'; ').split(b'; ')
+            if morsel.startswith(prefix)
+        ]
+        if not tokens:
             return None
         if len(tokens) > 1:
             logger.warning('Multiple tokens in header - using first')
@@ -162,3 +251,18 @@ class TokenManager:
             http_only=True
         )
         return cookie
+
+    def make_expired_cookie(self) -> bytes:
+        """Make a cookie which removes the token from the browser
+
+        :return: A cookie that can be used in an HTTP header
+        :rtype: bytes
+        """
+        return encode_set_cookie(
+            self.cookie_name,
+            b'',
+            max_age=timedelta(0),
+            domain=self.domain,
+            path=self.path,
+            http_only=True
+        )
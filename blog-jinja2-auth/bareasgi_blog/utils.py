@@ -1,8 +1,10 @@
 """Utilities"""
 
-from datetime import timedelta
+import base64
+from datetime import datetime, timedelta
+import json
 import re
-from typing import Optional
+from typing import Any, AsyncIterable, AsyncIterator, List, Optional, Tuple
 
 TIMEDELTA_REGEX = re.compile(
     r'^((?P<weeks>\d+?)w)?((?P<days>\d+?)d)?((?P<hours>\d+?)h)?((?P<minutes>\d+?)m)?((?P<seconds>\d+?)s)?$'
@@ -25,3 +27,118 @@ def parse_timedelta(text: str) -> Optional[timedelta]:
         if param:
             time_params[name] = int(param)
     return timedelta(**time_params)
+
+
+MAX_NDJSON_LINE_LENGTH = 1024 * 1024
+
+
+class NdjsonError(ValueError):
+    """An invalid line in newline delimited JSON"""
+
+    def __init__(self, line: int, message: str) -> None:
+        """Initialise the error
+
+        :param line: The number of the line, counting from 1
+        :type line: int
+        :param message: The error message
+        :type message: str
+        """
+        super().__init__(f'Line {line}: {message}')
+        self.line = line
+
+
+def _ndjson_loads(line: int, text: bytes) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError as error:
+        raise NdjsonError(line, str(error)) from error
+
+
+async def ndjson_reader(
+        content: AsyncIterable[bytes],
+        max_line_length: int = MAX_NDJSON_LINE_LENGTH
+) -> AsyncIterator[Tuple[int, Any]]:
+    """Read newline delimited JSON from the body of a request.
+
+    The values are yielded as each line arrives, and a line is gathered from
+    the pieces of the chunks it spans, so only the current line is held in
+    memory.
+
+    :param content: The request body
+    :type content: AsyncIterable[bytes]
+    :param max_line_length: The maximum length of a line in bytes, defaults
+        to MAX_NDJSON_LINE_LENGTH
+    :type max_line_length: int, optional
+    :raises NdjsonError: If a line is not valid JSON, or is too long
+    :return: An async iterator of the line numbers and decoded values
+    :rtype: AsyncIterator[Tuple[int, Any]]
+    """
+    pieces: List[bytes] = []
+    length = 0
+    line = 1
+    async for chunk in content:
+        start = 0
+        while True:
+            end = chunk.find(b'\n', start)
+            piece = chunk[start:] if end == -1 else chunk[start:end]
+            length += len(piece)
+            if length > max_line_length:
+                raise NdjsonError(line, f'Longer than {max_line_length} bytes')
+            pieces.append(piece)
+            if end == -1:
+                break
+            text = b''.join(pieces)
+            if text.strip():
+                yield line, _ndjson_loads(line, text)
+            pieces, length = [], 0
+            line += 1
+            start = end + 1
+    text = b''.join(pieces)
+    if text.strip():
+        yield line, _ndjson_loads(line, text)
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the keyset values of the last row of a page as an opaque cursor.
+
+    :return: The cursor
+    :rtype: str
+    """
+    text = json.dumps(
+        [
+            {'datetime': value.isoformat()} if isinstance(value, datetime)
+            else value
+            for value in values
+        ],
+        separators=(',', ':')
+    )
+    return base64.urlsafe_b64encode(text.encode()).rstrip(b'=').decode()
+
+
+def _decode_cursor_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value['datetime'])
+    if isinstance(value, list):
+        raise ValueError('Invalid cursor value')
+    return value
+
+
+def decode_cursor(cursor: str, count: int) -> List[Any]:
+    """Decode a cursor created by encode_cursor
+
+    :param cursor: The cursor
+    :type cursor: str
+    :param count: The number of keyset values expected
+    :type count: int
+    :raises ValueError: If the cursor is invalid
+    :return: The keyset values
+    :rtype: List[Any]
+    """
+    try:
+        text = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(text)
+        if not isinstance(values, list) or len(values) != count:
+            raise ValueError('Invalid cursor')
+        return [_decode_cursor_value(value) for value in values]
+    except (KeyError, TypeError, ValueError) as error:
+        raise ValueError('Invalid cursor') from error
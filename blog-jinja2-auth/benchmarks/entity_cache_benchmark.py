@@ -0,0 +1,79 @@
+"""Benchmark reading blog entries by id with and without the entity cache.
+
+Run from the project folder with:
+
+    python -m benchmarks.entity_cache_benchmark
+"""
+
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from bareasgi_blog.blog_repository import BlogRepository
+from bareasgi_blog.cached_blog_repository import CachedBlogRepository
+from bareasgi_blog.connection_pool import ConnectionPool
+from bareasgi_blog.entity_cache import EntityCache
+from bareasgi_blog.migrations import migrate
+
+ENTRIES = 10000
+HOT_ENTRIES = 100
+READS = 20000
+HOT_READ_RATIO = 0.9
+
+
+def _make_workload() -> list:
+    rng = random.Random(42)
+    return [
+        rng.randint(1, HOT_ENTRIES)
+        if rng.random() < HOT_READ_RATIO
+        else rng.randint(1, ENTRIES)
+        for _ in range(READS)
+    ]
+
+
+async def _run(repository: BlogRepository, workload: list) -> float:
+    start = time.perf_counter()
+    for id_ in workload:
+        await repository.read_by_id(id_, None)
+    return READS / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    """Run the benchmark"""
+    with tempfile.TemporaryDirectory() as folder:
+        pool = ConnectionPool(os.path.join(folder, 'blog.sqlite'), 4)
+        await pool.open()
+        await migrate(pool.writer)
+        await pool.writer.execute(
+            "INSERT INTO users(username, hash, salt, role) VALUES ('user', '', '', 'blogger')"
+        )
+
+        repository = BlogRepository(pool)
+        await repository.create_many([
+            {
+                'user_id': 1,
+                'title': f'Entry {i}',
+                'description': 'A blog entry',
+                'content': 'Some content. ' * 100
+            }
+            for i in range(ENTRIES)
+        ])
+
+        cache = EntityCache(1024)
+        cached_repository = CachedBlogRepository(pool, cache)
+
+        workload = _make_workload()
+        uncached = await _run(repository, workload)
+        cached = await _run(cached_repository, workload)
+
+        print(f'uncached: {uncached:,.0f} reads/s')
+        print(f'cached:   {cached:,.0f} reads/s ({cached / uncached:.1f}x)')
+        print(f'cache:    {cache.stats()}')
+
+        await pool.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
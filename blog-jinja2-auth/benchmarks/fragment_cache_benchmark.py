@@ -0,0 +1,72 @@
+"""Benchmark rendering the blog pages with and without the fragment cache.
+
+Run from the project folder with:
+
+    python -m benchmarks.fragment_cache_benchmark
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+import time
+from typing import Any, Dict, List
+
+import pkg_resources
+
+from bareasgi_blog.fragment_cache import FragmentCache
+from bareasgi_blog.templating import create_environment
+
+ENTRIES = 100
+RENDERS = 200
+
+
+def _make_entries(count: int) -> List[Dict[str, Any]]:
+    start = datetime(2020, 1, 1)
+    return [
+        {
+            'id': i,
+            'user_id': 1 + i % 5,
+            'username': f'user{1 + i % 5}',
+            'title': f'Blog entry number {i}',
+            'description': 'A short description of the entry & what it\'s about.',
+            'content': '<p>Lorem ipsum dolor sit amet, "consectetur".</p>\n' * 100,
+            'created': start + timedelta(minutes=i),
+            'updated': start + timedelta(minutes=i)
+        }
+        for i in range(count)
+    ]
+
+
+async def _run(template, variables) -> float:
+    start = time.perf_counter()
+    for _ in range(RENDERS):
+        await template.render_async(**variables)
+    return (time.perf_counter() - start) / RENDERS * 1e6
+
+
+async def main() -> None:
+    """Run the benchmark"""
+    templates = pkg_resources.resource_filename('bareasgi_blog', 'templates')
+    entries = _make_entries(ENTRIES)
+    user = {'role': 'blogger', 'username': 'user1', 'user_id': 1}
+    pages = (
+        ('blog/index.html', {'blog_entries': entries, **user}),
+        ('blog/read.html', {'blog_entry': entries[0], **user})
+    )
+
+    for name, variables in pages:
+        uncached_env = create_environment(templates)
+        uncached = await _run(uncached_env.get_template(name), variables)
+
+        fragment_cache = FragmentCache(8 * 1024 * 1024)
+        cached_env = create_environment(templates, None, fragment_cache)
+        cached = await _run(cached_env.get_template(name), variables)
+
+        print(
+            f'{name}: uncached {uncached:.1f} us, '
+            f'cached {cached:.1f} us ({uncached / cached:.1f}x), '
+            f'{fragment_cache.stats()}'
+        )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+"""Benchmark the rate limit check made for each login and registration.
+
+Run from the project folder with:
+
+    python -m benchmarks.rate_limiter_benchmark
+"""
+
+import random
+import time
+
+from bareasgi_blog.rate_limiter import RateLimiter, TokenBucketTable
+
+CHECKS = 200000
+ADDRESSES = 10000
+USERNAMES = 10000
+
+
+def main() -> None:
+    """Run the benchmark"""
+    rng = random.Random(42)
+    addresses = [
+        f'10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}'
+        for _ in range(ADDRESSES)
+    ]
+    requests = [
+        (rng.choice(addresses), f'user{rng.randrange(USERNAMES)}')
+        for _ in range(CHECKS)
+    ]
+    rate_limiter = RateLimiter(
+        TokenBucketTable(20, 0.5),
+        TokenBucketTable(5, 0.1)
+    )
+
+    limited = 0
+    start = time.perf_counter()
+    for address, username in requests:
+        if rate_limiter.check(address, username, time.monotonic()):
+            limited += 1
+    elapsed = time.perf_counter() - start
+
+    print(f'check:    {elapsed / CHECKS * 1e6:.2f} us')
+    print(f'limited:  {limited:,} of {CHECKS:,}')
+    print(
+        f'buckets:  {len(rate_limiter.by_address):,} addresses, '
+        f'{len(rate_limiter.by_username):,} usernames'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark serializing lists of blog entries to JSON bytes with the
+encoder class used before the serializer module, and with each serializer.
+
+Run from the project folder with:
+
+    python -m benchmarks.serializer_benchmark
+"""
+
+from datetime import datetime, timedelta
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+from bareasgi_blog import serializer
+
+SIZES = (10, 100, 10000)
+TOTAL_ENTRIES = 200000
+
+
+class DateEncoder(json.JSONEncoder):
+    """JSONEncoder with date support"""
+
+    def default(self, obj):  # pylint: disable=method-hidden,arguments-differ
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        return json.JSONEncoder.default(self, obj)
+
+
+def _date_encoder_dumps(value: Any) -> bytes:
+    # The serialization made before the serializer module was added.
+    return json.dumps(value, cls=DateEncoder).encode()
+
+
+def _make_entries(count: int) -> List[Dict[str, Any]]:
+    start = datetime(2020, 1, 1, 9, 30, 15, 123456)
+    return [
+        {
+            'id': i,
+            'user_id': 1 + i % 5,
+            'title': f'Blog entry number {i}',
+            'description': 'A short description of the entry, with café.',
+            'content': 'Lorem ipsum dolor sit amet, consectetur. ' * 10,
+            'created': start + timedelta(minutes=i),
+            'updated': start + timedelta(minutes=i, seconds=30)
+        }
+        for i in range(count)
+    ]
+
+
+def _run(dumps: Callable[[Any], bytes], entries: List[Dict[str, Any]]) -> float:
+    repeats = max(1, TOTAL_ENTRIES // len(entries))
+    start = time.perf_counter()
+    for _ in range(repeats):
+        dumps(entries)
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main() -> None:
+    """Run the benchmark"""
+    dumpers = {'DateEncoder': _date_encoder_dumps, **serializer.SERIALIZERS}
+    print(f'default serializer: {serializer.BACKEND}')
+    print(f'{"entries":>8} ' + ''.join(f'{name:>14}' for name in dumpers))
+    for size in SIZES:
+        entries = _make_entries(size)
+        assert all(
+            json.loads(dumps(entries)) == json.loads(_date_encoder_dumps(entries))
+            for dumps in dumpers.values()
+        )
+        timings = [_run(dumps, entries) for dumps in dumpers.values()]
+        print(
+            f'{size:>8} ' +
+            ''.join(f'{timing:>11.1f} us' for timing in timings)
+        )
+
+
+if __name__ == '__main__':
+    main()
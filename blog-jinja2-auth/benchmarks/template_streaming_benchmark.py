@@ -0,0 +1,77 @@
+"""Benchmark the time to the first byte and the peak memory of rendering a
+large listing page to a single string and as a stream.
+
+Run from the project folder with:
+
+    python -m benchmarks.template_streaming_benchmark
+"""
+
+import asyncio
+import time
+import tracemalloc
+from typing import Any, Dict, List, Tuple
+
+import pkg_resources
+
+from bareasgi_blog.templating import _generate, create_environment
+
+USERS = 10000
+
+
+def _make_users(count: int) -> List[Dict[str, Any]]:
+    roles = ('admin', 'blogger', 'reader')
+    return [
+        {'id': i, 'username': f'user{i:05}', 'role': roles[i % 3]}
+        for i in range(count)
+    ]
+
+
+async def _render(template, variables) -> Tuple[float, float]:
+    # The rendering used by bareasgi_jinja2.template.
+    start = time.perf_counter()
+    body = (await template.render_async(**variables)).encode()
+    first_byte = time.perf_counter() - start
+    assert body
+    return first_byte, time.perf_counter() - start
+
+
+async def _stream(template, variables) -> Tuple[float, float]:
+    start = time.perf_counter()
+    first_byte = None
+    async for chunk in _generate(template, variables, 'utf-8', 8192):
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        assert chunk
+    return first_byte, time.perf_counter() - start
+
+
+async def _measure(render, template, variables) -> Tuple[float, float, int]:
+    tracemalloc.start()
+    first_byte, total = await render(template, variables)
+    _size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first_byte * 1000, total * 1000, peak
+
+
+async def main() -> None:
+    """Run the benchmark"""
+    templates = pkg_resources.resource_filename('bareasgi_blog', 'templates')
+    env = create_environment(templates)
+    template = env.get_template('auth/admin.html')
+    variables = {'users': _make_users(USERS), 'next_cursor': None}
+
+    # Warm up.
+    await _render(template, variables)
+    await _stream(template, variables)
+
+    for name, render in (('render', _render), ('stream', _stream)):
+        first_byte, total, peak = await _measure(render, template, variables)
+        print(
+            f'{name}: first byte {first_byte:.1f} ms, '
+            f'total {total:.1f} ms, '
+            f'peak memory {peak / 1024:.0f} KiB'
+        )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""Benchmark the token check made for each authenticated request with and
+without the verified token cache.
+
+Run from the project folder with:
+
+    python -m benchmarks.token_cache_benchmark
+"""
+
+from datetime import datetime, timedelta
+import time
+
+import bareutils.header as header
+
+from bareasgi_blog.key_ring import KeyRing
+from bareasgi_blog.token_manager import TokenManager
+
+REQUESTS = 100000
+
+
+def _uncached(token_manager: TokenManager, headers: list) -> None:
+    # The check made before the cache was added.
+    token = header.cookie(headers)[token_manager.cookie_name][0]
+    payload = token_manager.decode(token)
+    assert payload['exp'] > datetime.utcnow()
+
+
+def _cached(token_manager: TokenManager, headers: list) -> None:
+    token = token_manager.get_token_from_headers(headers)
+    payload = token_manager.decode_unexpired(token, int(time.time()))
+    assert payload is not None
+
+
+def _run(check, token_manager: TokenManager, headers: list) -> float:
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        check(token_manager, headers)
+    return (time.perf_counter() - start) / REQUESTS * 1e6
+
+
+def main() -> None:
+    """Run the benchmark"""
+    token_manager = TokenManager(
+        KeyRing.from_secret('not a very secret password'),
+        timedelta(hours=1),
+        'bhdgsystematic.com',
+        'bareasgi-blog',
+        'bhdgsystematic.com',
+        '/',
+        timedelta(days=1)
+    )
+    now = datetime.utcnow()
+    token = token_manager.encode('admin', now, now, 1, 'admin')
+    headers = [
+        (b'host', b'bhdgsystematic.com'),
+        (b'accept', b'text/html'),
+        (
+            b'cookie',
+            b'_ga=GA1.2.1234567890.1234567890; theme=dark; ' +
+            b'bareasgi-blog=' + token + b'; _gid=GA1.2.987654321.987654321'
+        )
+    ]
+
+    uncached = _run(_uncached, token_manager, headers)
+    cached = _run(_cached, token_manager, headers)
+
+    print(f'uncached: {uncached:.2f} us/request')
+    print(f'cached:   {cached:.2f} us/request ({uncached / cached:.1f}x)')
+    print(
+        f'cache:    hits={token_manager.cache_hits}, '
+        f'misses={token_manager.cache_misses}'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark signing and verifying tokens with each algorithm, with keys
+parsed once and with keys parsed from PEM text on every call.
+
+The asymmetric algorithms need the cryptography package. Run from the
+project folder with:
+
+    python -m benchmarks.token_signing_benchmark
+"""
+
+import time
+from typing import Any, Callable, Tuple
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.hazmat.primitives.serialization import (
+    Encoding,
+    NoEncryption,
+    PrivateFormat,
+    PublicFormat
+)
+import jwt
+
+ITERATIONS = 200
+
+PAYLOAD = {
+    'iss': 'bhdgsystematic.com',
+    'sub': 'admin',
+    'exp': 2000000000,
+    'iat': 1600000000,
+    'jti': '0123456789abcdef0123456789abcdef',
+    'user_id': 1,
+    'role': 'admin'
+}
+
+
+def _time(func: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func()
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def _pem(private_key: Any) -> Tuple[bytes, bytes]:
+    private_pem = private_key.private_bytes(
+        Encoding.PEM,
+        PrivateFormat.PKCS8,
+        NoEncryption()
+    )
+    public_pem = private_key.public_key().public_bytes(
+        Encoding.PEM,
+        PublicFormat.SubjectPublicKeyInfo
+    )
+    return private_pem, public_pem
+
+
+def _run(
+        algorithm: str,
+        signing_key: Any,
+        verifying_key: Any
+) -> Tuple[float, float]:
+    token = jwt.encode(PAYLOAD, key=signing_key, algorithm=algorithm)
+    sign = _time(
+        lambda: jwt.encode(PAYLOAD, key=signing_key, algorithm=algorithm)
+    )
+    verify = _time(
+        lambda: jwt.decode(token, key=verifying_key, algorithms=[algorithm])
+    )
+    return sign, verify
+
+
+def main() -> None:
+    """Run the benchmark"""
+    backend = default_backend()
+    ec_key = ec.generate_private_key(ec.SECP256R1(), backend)
+    rsa_key = rsa.generate_private_key(65537, 2048, backend)
+
+    print(f'{"algorithm":<10} {"keys":<8} {"sign us":>9} {"verify us":>10}')
+    secret = b'not a very secret password'
+    sign, verify = _run('HS256', secret, secret)
+    print(f'{"HS256":<10} {"secret":<8} {sign:>9.1f} {verify:>10.1f}')
+
+    for algorithm, private_key in (
+            ('ES256', ec_key),
+            ('RS256', rsa_key),
+            ('PS256', rsa_key)
+    ):
+        sign, verify = _run(algorithm, private_key, private_key.public_key())
+        print(f'{algorithm:<10} {"parsed":<8} {sign:>9.1f} {verify:>10.1f}')
+        sign, verify = _run(algorithm, *_pem(private_key))
+        print(f'{algorithm:<10} {"pem":<8} {sign:>9.1f} {verify:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+"""Test fixtures"""
+
+from typing import Awaitable, Callable, List
+
+import pytest
+
+from bareasgi_blog.connection_pool import ConnectionPool
+from bareasgi_blog.migrations import migrate
+
+
+@pytest.fixture
+def open_pool(tmp_path) -> Callable[..., Awaitable[ConnectionPool]]:
+    """A function to open a connection pool to a migrated database. Each pool
+    opened by a test uses the same database, like the workers of a server.
+    """
+    filename = str(tmp_path / 'blog.sqlite')
+    pools: List[ConnectionPool] = []
+
+    async def open_pool(**kwargs) -> ConnectionPool:
+        pool = ConnectionPool(filename, 2, **kwargs)
+        await pool.open()
+        if not pools:
+            await migrate(pool.writer)
+        pools.append(pool)
+        return pool
+
+    return open_pool
@@ -0,0 +1,113 @@
+"""Tests for the auth controller"""
+
+import asyncio
+from datetime import timedelta
+
+from bareasgi.middleware import mw
+
+from bareasgi_blog.auth_controller import AuthController
+from bareasgi_blog.auth_repository import AuthRepository
+from bareasgi_blog.jwt_authenticator import JwtAuthenticator
+from bareasgi_blog.key_ring import KeyRing
+from bareasgi_blog.rate_limiter import RateLimiter, TokenBucketTable
+from bareasgi_blog.revocation_store import RevocationStore
+from bareasgi_blog.token_manager import TokenManager
+
+
+async def _open_controller(pool) -> AuthController:
+    repository = AuthRepository(pool, 'admin', 'secret')
+    await repository.initialise()
+    token_manager = TokenManager(
+        KeyRing.from_secret('test'),
+        timedelta(hours=1),
+        'test',
+        'token',
+        'localhost',
+        '/',
+        timedelta(days=1)
+    )
+    revocations = RevocationStore(pool)
+    await revocations.load()
+    authenticator = JwtAuthenticator(
+        repository,
+        token_manager,
+        revocations,
+        '/auth/login',
+        timedelta(days=1)
+    )
+    rate_limiter = RateLimiter(
+        TokenBucketTable(10, 1.0),
+        TokenBucketTable(10, 1.0)
+    )
+    return AuthController(repository, authenticator, rate_limiter)
+
+
+async def _form(body: bytes):
+    yield body
+
+
+def test_change_password_only_changes_the_logged_in_user(open_pool):
+    """The username in the form is ignored, so one user can't change the
+    password of another"""
+    async def run():
+        pool = await open_pool()
+        try:
+            controller = await _open_controller(pool)
+            # pylint: disable=protected-access
+            repository = controller._repository
+            authenticator = controller._authenticator
+            alice_id = await repository.create(
+                username='alice',
+                password='a',
+                role='reader'
+            )
+            await repository.create(username='bob', password='b', role='reader')
+            cookie = authenticator.create_token('alice', alice_id, 'reader')
+            scope = {
+                'path': '/auth/change-password',
+                'headers': [(b'cookie', cookie.split(b';')[0])]
+            }
+
+            handler = mw(
+                authenticator,
+                handler=controller._save_change_password
+            )
+
+            async def change_password(form: bytes):
+                status, headers, *_ = await handler(scope, {}, {}, _form(form))
+                return status, dict(headers)
+
+            status, headers = await change_password(
+                b'username=bob&old_password=b&new_password=x'
+            )
+            assert status == 303
+            assert headers[b'location'] == b'/auth/change-password'
+            assert await repository.is_valid_password('bob', 'b')
+            assert await repository.is_valid_password('alice', 'a')
+
+            status, headers = await change_password(
+                b'username=bob&old_password=a&new_password=x'
+            )
+            assert status == 303 and headers[b'Location'] == b'/auth/login'
+            assert await repository.is_valid_password('bob', 'b')
+            assert await repository.is_valid_password('alice', 'x')
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
+
+
+def test_admin_refuses_a_bad_cursor(open_pool):
+    """A cursor which can't be decoded is a bad request"""
+    async def run():
+        pool = await open_pool()
+        try:
+            controller = await _open_controller(pool)
+            # pylint: disable=protected-access
+            scope = {'query_string': b'cursor=WzFd'}
+            info = {'jwt': {'sub': 'admin', 'role': 'admin'}}
+            assert await controller._admin(scope, info, {}, None) == 400
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
@@ -0,0 +1,76 @@
+"""Tests for the auth repository"""
+
+import asyncio
+
+from bareasgi_blog.auth_repository import AuthRepository
+
+
+async def _open_repository(open_pool) -> AuthRepository:
+    repository = AuthRepository(await open_pool(), 'admin', 'secret')
+    await repository.initialise()
+    await repository.create(username='alice', password='a', role='reader')
+    await repository.create(username='bob', password='b', role='reader')
+    return repository
+
+
+def test_update_invalidates_only_that_user(open_pool):
+    """Updating a user changes the version of that user alone"""
+    async def run():
+        repository = await _open_repository(open_pool)
+        try:
+            alice = await repository.read_by_username('alice')
+            bob = await repository.read_by_username('bob')
+            alice_version = repository.user_version('alice')
+            bob_version = repository.user_version('bob')
+
+            assert await repository.update(alice['id'], role='blogger')
+
+            assert repository.user_version('alice') != alice_version
+            assert repository.user_version('bob') == bob_version
+            assert (await repository.read_by_username('alice'))['role'] == 'blogger'
+            assert await repository.read_by_username('bob') is bob
+        finally:
+            await repository._pool.close()  # pylint: disable=protected-access
+
+    asyncio.run(run())
+
+
+def test_rename_invalidates_both_usernames(open_pool):
+    """Renaming a user invalidates the old and the new username"""
+    async def run():
+        repository = await _open_repository(open_pool)
+        try:
+            alice = await repository.read_by_username('alice')
+            assert await repository.read_by_username('carol') is None
+            versions = [repository.user_version(name) for name in ('alice', 'carol')]
+
+            assert await repository.update(alice['id'], username='carol')
+
+            assert [
+                repository.user_version(name) for name in ('alice', 'carol')
+            ] != versions
+            assert await repository.read_by_username('alice') is None
+            assert (await repository.read_by_username('carol'))['id'] == alice['id']
+        finally:
+            await repository._pool.close()  # pylint: disable=protected-access
+
+    asyncio.run(run())
+
+
+def test_change_password_invalidates_the_user(open_pool):
+    """A changed password is used for the next login"""
+    async def run():
+        repository = await _open_repository(open_pool)
+        try:
+            assert await repository.is_valid_password('alice', 'a')
+            bob_version = repository.user_version('bob')
+
+            assert await repository.change_password('alice', 'new')
+
+            assert not await repository.is_valid_password('alice', 'a')
+            assert await repository.is_valid_password('alice', 'new')
+            assert repository.user_version('bob') == bob_version
+        finally:
+            await repository._pool.close()  # pylint: disable=protected-access
+
+    asyncio.run(run())
@@ -0,0 +1,65 @@
+"""Tests for the cached blog repository"""
+
+import asyncio
+
+from bareasgi_blog.cached_blog_repository import CachedBlogRepository
+from bareasgi_blog.entity_cache import EntityCache
+from bareasgi_blog.repository import Repository
+
+
+async def _create_user(pool) -> int:
+    return await Repository(pool, 'users').create(
+        username='user',
+        hash='hash',
+        salt='salt',
+        role='blogger'
+    )
+
+
+def test_read_by_id_is_cached_and_invalidated(open_pool):
+    """An entry is read from the cache until it is updated"""
+    async def run():
+        pool = await open_pool()
+        try:
+            repository = CachedBlogRepository(pool, EntityCache(16))
+            user_id = await _create_user(pool)
+            id_ = await repository.create(user_id=user_id, title='one')
+
+            first = await repository.read_by_id(id_, None)
+            assert await repository.read_by_id(id_, None) is first
+            assert repository.cache.hits == 1
+
+            await repository.update(id_, title='two')
+            second = await repository.read_by_id(id_, None)
+            assert second['title'] == 'two'
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
+
+
+def test_read_updated_sees_other_workers_writes(open_pool):
+    """The update time comes from the database, so a change made by another
+    worker is seen, and the stale cached entry is dropped"""
+    async def run():
+        pool, other_pool = await open_pool(), await open_pool()
+        try:
+            repository = CachedBlogRepository(pool, EntityCache(16))
+            other = CachedBlogRepository(other_pool, EntityCache(16))
+            user_id = await _create_user(pool)
+            id_ = await repository.create(user_id=user_id, title='one')
+
+            cached = await repository.read_by_id(id_, None)
+            await asyncio.sleep(0.001)
+            await other.update(id_, title='two')
+            changed = await other.read_by_id(id_, None)
+
+            assert changed['updated'] > cached['updated']
+            assert await repository.read_updated(id_) == changed['updated']
+            assert (await repository.read_by_id(id_, None))['title'] == 'two'
+            assert await repository.read_updated(id_ + 1) is None
+        finally:
+            await pool.close()
+            await other_pool.close()
+
+    asyncio.run(run())
@@ -0,0 +1,70 @@
+"""Tests for conditional requests"""
+
+from datetime import datetime
+
+from bareasgi_blog.conditional import (
+    is_conditional,
+    is_not_modified,
+    make_etag,
+    validator_headers
+)
+
+UPDATED = datetime(2020, 1, 2, 3, 4, 5, 678)
+
+
+def test_make_etag():
+    """The entity tag changes with the version and the variant"""
+    etag = make_etag(1, UPDATED)
+    assert etag.startswith(b'"') and etag.endswith(b'"')
+    assert make_etag(1, UPDATED) == etag
+    assert make_etag(1, UPDATED.replace(microsecond=679)) != etag
+    assert make_etag(2, UPDATED) != etag
+    assert make_etag(1, UPDATED, 'user') != etag
+    assert make_etag(1, UPDATED, 'user') != make_etag(1, UPDATED, 'other')
+
+
+def test_is_conditional():
+    """A request is conditional when it has a validator"""
+    assert not is_conditional([(b'accept', b'*/*')])
+    assert is_conditional([(b'if-none-match', b'"x"')])
+    assert is_conditional([(b'if-modified-since', b'x')])
+
+
+def test_if_none_match():
+    """If-None-Match uses the weak comparison and accepts a list"""
+    etag = make_etag(1, UPDATED)
+    assert is_not_modified([(b'if-none-match', etag)], etag, UPDATED)
+    assert is_not_modified([(b'if-none-match', b'W/' + etag)], etag, UPDATED)
+    assert is_not_modified(
+        [(b'if-none-match', b'"other", ' + etag)],
+        etag,
+        UPDATED
+    )
+    assert is_not_modified([(b'if-none-match', b'*')], etag, UPDATED)
+    assert not is_not_modified([(b'if-none-match', b'"other"')], etag, UPDATED)
+
+
+def test_if_modified_since():
+    """If-Modified-Since is compared to the second"""
+    etag = make_etag(1, UPDATED)
+    headers = validator_headers(etag, UPDATED)
+    last_modified = dict(headers)[b'last-modified']
+    assert last_modified == b'Thu, 02 Jan 2020 03:04:05 GMT'
+
+    assert is_not_modified([(b'if-modified-since', last_modified)], etag, UPDATED)
+    assert not is_not_modified(
+        [(b'if-modified-since', b'Thu, 02 Jan 2020 03:04:04 GMT')],
+        etag,
+        UPDATED
+    )
+    assert not is_not_modified([(b'if-modified-since', b'nonsense')], etag, UPDATED)
+
+
+def test_if_none_match_takes_precedence():
+    """If-Modified-Since is ignored when there is an If-None-Match"""
+    etag = make_etag(1, UPDATED)
+    headers = [
+        (b'if-none-match', b'"other"'),
+        (b'if-modified-since', b'Thu, 02 Jan 2020 03:04:05 GMT')
+    ]
+    assert not is_not_modified(headers, etag, UPDATED)
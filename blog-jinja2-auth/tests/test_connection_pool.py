@@ -0,0 +1,117 @@
+"""Tests for the connection pool"""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from bareasgi_blog.connection_pool import ConnectionPool
+from bareasgi_blog.repository import Repository
+
+
+async def _open_pool(filename, **kwargs) -> ConnectionPool:
+    pool = ConnectionPool(str(filename), 2, **kwargs)
+    await pool.open()
+    await pool.writer.executescript("""
+CREATE TABLE item (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE
+);
+""")
+    return pool
+
+
+async def _names(pool: ConnectionPool):
+    async with pool.reader() as conn, conn.execute(
+            'SELECT name FROM item ORDER BY id'
+    ) as cur:
+        return [name for name, in await cur.fetchall()]
+
+
+def test_readers_see_committed_writes(tmp_path):
+    """A write is visible to the readers once it has returned"""
+    async def run():
+        pool = await _open_pool(tmp_path / 'test.sqlite')
+        try:
+            repository = Repository(pool, 'item')
+            await repository.create(name='one')
+            assert await _names(pool) == ['one']
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
+
+
+def test_write_is_rolled_back_on_error(tmp_path):
+    """The statements in a failed write are rolled back"""
+    async def run():
+        pool = await _open_pool(tmp_path / 'test.sqlite')
+        try:
+            with pytest.raises(RuntimeError):
+                async with pool.write() as conn:
+                    await conn.execute("INSERT INTO item(name) VALUES ('one')")
+                    raise RuntimeError()
+            assert await _names(pool) == []
+
+            repository = Repository(pool, 'item')
+            with pytest.raises(sqlite3.IntegrityError):
+                await repository.create_many(
+                    [{'name': 'two'}, {'name': 'three'}, {'name': 'two'}]
+                )
+            assert await _names(pool) == []
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize('group_commit_window', [None, 0.01])
+def test_concurrent_write_is_not_rolled_back(tmp_path, group_commit_window):
+    """A write which arrives while another is in progress is not part of it,
+    so it survives the other being rolled back"""
+    async def run():
+        pool = await _open_pool(
+            tmp_path / 'test.sqlite',
+            group_commit_window=group_commit_window
+        )
+        try:
+            repository = Repository(pool, 'item')
+            concurrent = None
+            with pytest.raises(RuntimeError):
+                async with pool.write('batch') as conn:
+                    await conn.execute("INSERT INTO item(name) VALUES ('batch')")
+                    concurrent = asyncio.ensure_future(
+                        repository.create(name='concurrent')
+                    )
+                    await asyncio.sleep(0.05)
+                    assert not concurrent.done()
+                    raise RuntimeError()
+
+            rowid = await concurrent
+            assert rowid is not None
+            assert await _names(pool) == ['concurrent']
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
+
+
+def test_group_commit_shares_a_commit(tmp_path):
+    """Concurrent writes are committed together"""
+    async def run():
+        pool = await _open_pool(
+            tmp_path / 'test.sqlite',
+            group_commit_window=0.01
+        )
+        try:
+            repository = Repository(pool, 'item')
+            ids = await asyncio.gather(*(
+                repository.create(name=f'item{i}')
+                for i in range(10)
+            ))
+            assert sorted(ids) == list(range(1, 11))
+            assert len(await _names(pool)) == 10
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
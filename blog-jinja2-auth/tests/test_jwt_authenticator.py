@@ -0,0 +1,157 @@
+"""Tests for the JWT authenticator"""
+
+import asyncio
+from datetime import timedelta
+from typing import Any, Dict, List
+
+from bareasgi_blog.auth_repository import AuthRepository
+from bareasgi_blog.jwt_authenticator import JwtAuthenticator
+from bareasgi_blog.key_ring import KeyRing
+from bareasgi_blog.revocation_store import RevocationStore
+from bareasgi_blog.token_manager import TokenManager
+
+
+class CountingAuthRepository(AuthRepository):
+    """An auth repository which counts the users read"""
+
+    reads = 0
+
+    async def read_by_username(self, username: str):
+        self.reads += 1
+        return await super().read_by_username(username)
+
+
+async def _open_authenticator(pool) -> JwtAuthenticator:
+    repository = CountingAuthRepository(pool, 'admin', 'secret')
+    await repository.initialise()
+    token_manager = TokenManager(
+        KeyRing.from_secret('test'),
+        timedelta(hours=1),
+        'test',
+        'token',
+        'localhost',
+        '/',
+        timedelta(days=1)
+    )
+    revocations = RevocationStore(pool)
+    await revocations.load()
+    return JwtAuthenticator(
+        repository,
+        token_manager,
+        revocations,
+        '/auth/login',
+        timedelta(days=1)
+    )
+
+
+async def _request(authenticator: JwtAuthenticator, cookie: bytes):
+    token = cookie.split(b';')[0]
+    payloads: List[Dict[str, Any]] = []
+
+    async def handler(_scope, info, _matches, _content):
+        payloads.append(info['jwt'])
+        return 200, None, None, None
+
+    scope = {'path': '/', 'headers': [(b'cookie', token)]}
+    response = await authenticator(scope, {}, {}, None, handler)
+    if isinstance(response, int):
+        return response, None, None
+    status, headers, *_ = response
+    set_cookie = dict(headers or []).get(b'set-cookie')
+    return status, payloads[0] if payloads else None, set_cookie
+
+
+def test_role_change_is_checked_once(open_pool):
+    """A changed role is used for the next request, and the result of the
+    check is kept for the old and the new token"""
+    async def run():
+        pool = await open_pool()
+        try:
+            authenticator = await _open_authenticator(pool)
+            repository = authenticator._repository  # pylint: disable=protected-access
+            user_id = await repository.create(
+                username='alice',
+                password='a',
+                role='reader'
+            )
+            other_id = await repository.create(
+                username='bob',
+                password='b',
+                role='reader'
+            )
+            cookie = authenticator.create_token('alice', user_id, 'reader')
+
+            status, payload, _ = await _request(authenticator, cookie)
+            assert status == 200 and payload['role'] == 'reader'
+            reads = repository.reads
+            await _request(authenticator, cookie)
+            assert repository.reads == reads
+
+            await repository.update(other_id, role='blogger')
+            await _request(authenticator, cookie)
+            assert repository.reads == reads
+
+            await repository.update(user_id, role='blogger')
+            status, payload, new_cookie = await _request(authenticator, cookie)
+            assert status == 200 and payload['role'] == 'blogger'
+            assert new_cookie is not None
+            reads = repository.reads
+
+            status, payload, _ = await _request(authenticator, cookie)
+            assert payload['role'] == 'blogger'
+            status, payload, set_cookie = await _request(authenticator, new_cookie)
+            assert status == 200 and payload['role'] == 'blogger'
+            assert set_cookie is None
+            assert repository.reads == reads
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
+
+
+def test_deleted_user_is_refused(open_pool):
+    """A token for a user who has been deleted is refused"""
+    async def run():
+        pool = await open_pool()
+        try:
+            authenticator = await _open_authenticator(pool)
+            repository = authenticator._repository  # pylint: disable=protected-access
+            user_id = await repository.create(
+                username='alice',
+                password='a',
+                role='reader'
+            )
+            cookie = authenticator.create_token('alice', user_id, 'reader')
+            assert (await _request(authenticator, cookie))[0] == 200
+
+            await repository.delete(user_id)
+            assert (await _request(authenticator, cookie))[0] == 401
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
+
+
+def test_login_after_revocation_is_accepted(open_pool):
+    """A token issued just after the user was revoked is accepted, and the
+    token issued before is not"""
+    async def run():
+        pool = await open_pool()
+        try:
+            authenticator = await _open_authenticator(pool)
+            repository = authenticator._repository  # pylint: disable=protected-access
+            user_id = await repository.create(
+                username='alice',
+                password='a',
+                role='reader'
+            )
+            before = authenticator.create_token('alice', user_id, 'reader')
+            await authenticator.revoke_user('alice')
+            after = authenticator.create_token('alice', user_id, 'reader')
+
+            assert (await _request(authenticator, before))[0] == 302
+            assert (await _request(authenticator, after))[0] == 200
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
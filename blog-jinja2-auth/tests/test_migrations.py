@@ -0,0 +1,74 @@
+"""Tests for the migrations"""
+
+import asyncio
+import sqlite3
+
+import aiosqlite
+import pytest
+
+from bareasgi_blog.migrations import MIGRATIONS, Migration, migrate
+
+
+async def _names(conn: aiosqlite.Connection, type_: str):
+    async with conn.execute(
+            'SELECT name FROM sqlite_master WHERE type = ?',
+            (type_,)
+    ) as cur:
+        return {name for name, in await cur.fetchall()}
+
+
+def test_migrations_are_applied_once(tmp_path):
+    """An existing database is brought up to date, and migrating again
+    changes nothing"""
+    async def run():
+        conn = await aiosqlite.connect(str(tmp_path / 'blog.sqlite'))
+        try:
+            assert await migrate(conn, MIGRATIONS[:1]) == 1
+            await conn.execute(
+                """
+INSERT INTO users(username, hash, salt, role)
+VALUES ('admin', '', '', 'admin')
+"""
+            )
+            await conn.commit()
+
+            assert await migrate(conn) == MIGRATIONS[-1].version
+            assert await migrate(conn) == MIGRATIONS[-1].version
+
+            assert {
+                'blog_entries_created',
+                'blog_entries_user_id',
+                'users_role',
+                'revoked_tokens_expires'
+            } <= await _names(conn, 'index')
+            assert {'revoked_tokens', 'revoked_users'} <= await _names(conn, 'table')
+            async with conn.execute('SELECT username FROM users') as cur:
+                assert await cur.fetchall() == [('admin',)]
+        finally:
+            await conn.close()
+
+    asyncio.run(run())
+
+
+def test_failed_migration_is_rolled_back(tmp_path):
+    """A migration which fails leaves the schema at the previous version"""
+    async def run():
+        conn = await aiosqlite.connect(str(tmp_path / 'blog.sqlite'))
+        try:
+            failing = Migration(
+                MIGRATIONS[-1].version + 1,
+                'Fail part way through',
+                """
+CREATE TABLE partial(id INTEGER PRIMARY KEY);
+INSERT INTO missing VALUES (1);
+"""
+            )
+            with pytest.raises(sqlite3.OperationalError):
+                await migrate(conn, [*MIGRATIONS, failing])
+
+            assert await migrate(conn) == MIGRATIONS[-1].version
+            assert 'partial' not in await _names(conn, 'table')
+        finally:
+            await conn.close()
+
+    asyncio.run(run())
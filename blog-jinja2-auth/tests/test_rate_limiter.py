@@ -0,0 +1,104 @@
+"""Tests for the rate limiter"""
+
+import asyncio
+from typing import List, Optional
+
+from bareasgi_blog.rate_limiter import RateLimiter, TokenBucketTable
+
+
+def test_token_bucket_refills():
+    """A bucket allows its capacity at once, then refills at its rate"""
+    buckets = TokenBucketTable(2, 1.0)
+    assert buckets.take('a', 0.0) == 0
+    assert buckets.take('a', 0.0) == 0
+    assert buckets.wait('a', 0.0) == 1.0
+    assert buckets.take('a', 0.0) == 1.0
+    assert buckets.take('b', 0.0) == 0
+    assert buckets.wait('a', 1.0) == 0
+    assert buckets.take('a', 1.0) == 0
+
+
+def test_refused_username_does_not_spend_the_address():
+    """A request refused for its username takes no token for its address"""
+    limiter = RateLimiter(TokenBucketTable(2, 1.0), TokenBucketTable(1, 1.0))
+    assert limiter.check('1.2.3.4', 'alice', 0.0) == 0
+    assert limiter.check('1.2.3.4', 'alice', 0.0) == 1.0
+    assert limiter.check('1.2.3.4', 'bob', 0.0) == 0
+    assert limiter.check('1.2.3.4', 'carol', 0.0) == 1.0
+
+
+class Body:
+    """A request body which records how much of it was read"""
+
+    def __init__(self, *chunks: bytes) -> None:
+        self.chunks = list(chunks)
+        self.read = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> bytes:
+        if not self.chunks:
+            raise StopAsyncIteration
+        self.read += 1
+        return self.chunks.pop(0)
+
+
+async def _request(
+        limiter: RateLimiter,
+        body: Body,
+        content_length: Optional[int] = None
+):
+    forms: List[bytes] = []
+
+    async def handler(_scope, _info, _matches, content):
+        forms.append(b''.join([chunk async for chunk in content]))
+        return 303, None, None, None
+
+    headers = []
+    if content_length is not None:
+        headers.append((b'content-length', str(content_length).encode()))
+    scope = {'client': ('1.2.3.4', 1234), 'headers': headers}
+    response = await limiter(scope, {}, {}, body, handler)
+    status = response if isinstance(response, int) else response[0]
+    return status, forms
+
+
+def test_limited_address_is_refused_before_reading():
+    """A request from a limited address is refused without reading it"""
+    async def run():
+        limiter = RateLimiter(TokenBucketTable(1, 0.1), TokenBucketTable(5, 1.0))
+
+        status, forms = await _request(limiter, Body(b'username=alice'))
+        assert status == 303 and forms == [b'username=alice']
+
+        body = Body(b'username=bob')
+        status, forms = await _request(limiter, body)
+        assert status == 429 and not forms
+        assert body.read == 0
+
+    asyncio.run(run())
+
+
+def test_large_form_is_refused():
+    """A form larger than the limit is refused without reading all of it"""
+    async def run():
+        limiter = RateLimiter(
+            TokenBucketTable(5, 1.0),
+            TokenBucketTable(5, 1.0),
+            max_body_size=12
+        )
+
+        body = Body(b'username=', b'alice', b'&password=secret')
+        status, forms = await _request(limiter, body)
+        assert status == 413 and not forms
+        assert body.read == 2
+
+        body = Body(b'x')
+        status, forms = await _request(limiter, body, 100)
+        assert status == 413 and body.read == 0
+
+        status, forms = await _request(limiter, Body(b'username', b'=a'), 10)
+        assert status == 303 and forms == [b'username=a']
+
+    asyncio.run(run())
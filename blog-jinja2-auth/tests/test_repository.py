@@ -0,0 +1,84 @@
+"""Tests for the repository"""
+
+import asyncio
+
+import pytest
+
+from bareasgi_blog.repository import Repository, record_class
+
+
+def test_record_reads_like_a_dict():
+    """A record is read by column name"""
+    cls = record_class(('id', 'count', '_x', 'title'))
+    record = tuple.__new__(cls, (1, 2, 3, 'hello'))
+
+    assert record['id'] == 1
+    assert record['_x'] == 3
+    assert record.get('count') == 2
+    assert record.get('index') is None
+    assert record.get('missing', 'default') == 'default'
+    assert 'title' in record
+    assert 'hello' not in record
+    assert list(record) == ['id', 'count', '_x', 'title']
+    assert dict(record) == {'id': 1, 'count': 2, '_x': 3, 'title': 'hello'}
+    assert record[3] == 'hello'
+
+
+def test_record_missing_column_raises_key_error():
+    """A missing column raises a KeyError like a dict"""
+    record = tuple.__new__(record_class(('id',)), (1,))
+    with pytest.raises(KeyError):
+        record['title']  # pylint: disable=pointless-statement
+
+
+async def _read_pages(repository: Repository, ascending: bool, **kwargs):
+    pages, cursor = [], None
+    while True:
+        users, cursor = await repository.read_page(
+            ['username'],
+            'role',
+            ascending,
+            3,
+            cursor,
+            **kwargs
+        )
+        pages.append([(user['role'], user['id']) for user in users])
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize('ascending', [True, False])
+def test_keyset_pages_cover_every_record_once(open_pool, ascending):
+    """The pages are in order of the column then the id, and a record which
+    shares its value with the end of a page is on the next page"""
+    async def run():
+        pool = await open_pool()
+        try:
+            repository = Repository(pool, 'users')
+            for i in range(10):
+                await repository.create(
+                    username=f'user{i}',
+                    hash='',
+                    salt='',
+                    role=('admin', 'blogger', 'reader')[i % 3]
+                )
+
+            pages = await _read_pages(repository, ascending)
+            assert [len(page) for page in pages] == [3, 3, 3, 1]
+            keys = [key for page in pages for key in page]
+            assert keys == sorted(keys, reverse=not ascending)
+            assert len(set(keys)) == 10
+
+            pages = await _read_pages(
+                repository,
+                ascending,
+                between=('blogger', 'reader')
+            )
+            keys = [key for page in pages for key in page]
+            assert keys == sorted(keys, reverse=not ascending)
+            assert {role for role, _ in keys} == {'blogger', 'reader'}
+            assert len(keys) == 6
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
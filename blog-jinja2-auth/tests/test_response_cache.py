@@ -0,0 +1,78 @@
+"""Tests for the response cache"""
+
+import asyncio
+import gzip
+from typing import List, Optional
+
+import pytest
+
+from bareasgi_blog.response_cache import ResponseCache, accepts_gzip
+
+PAGE = b'<html>' + b'page ' * 100 + b'</html>'
+
+
+@pytest.mark.parametrize('accept_encoding, expected', [
+    (None, False),
+    (b'gzip, deflate, br', True),
+    (b'GZip', True),
+    (b'x-gzip', True),
+    (b'gzip;q=0', False),
+    (b'gzip; q=0.0', False),
+    (b'deflate, gzip;q=0.5', True),
+    (b'gzip;q=0.5, identity', False),
+    (b'*', True),
+    (b'*;q=0', False),
+    (b'*, gzip;q=0', False),
+    (b'br', False),
+    (b'notgzip', False),
+    (b'gzip;q=nonsense', False)
+])
+def test_accepts_gzip(accept_encoding, expected):
+    """The quality values are used rather than the presence of the text"""
+    assert accepts_gzip(accept_encoding) == expected
+
+
+async def _body(body) -> bytes:
+    return b''.join([chunk async for chunk in body])
+
+
+def test_both_variants_are_served_from_one_entry():
+    """A response is rendered once, and served compressed or not to suit the
+    client, with a vary header on each"""
+    async def run():
+        cache = ResponseCache(1024 * 1024, ['path'])
+        renders: List[int] = []
+
+        async def handler(_scope, _info, _matches, _content):
+            renders.append(1)
+
+            async def body():
+                yield PAGE
+
+            return 200, [(b'content-type', b'text/html')], body(), None
+
+        async def request(accept_encoding: Optional[bytes]):
+            headers = []
+            if accept_encoding is not None:
+                headers.append((b'accept-encoding', accept_encoding))
+            scope = {'path': '/', 'query_string': b'', 'headers': headers}
+            status, headers, body = await cache(scope, {}, {}, None, handler)
+            return status, dict(headers), await _body(body)
+
+        status, headers, body = await request(b'gzip;q=0, deflate')
+        assert status == 200 and body == PAGE
+        assert b'content-encoding' not in headers
+        assert headers[b'vary'] == b'accept-encoding'
+
+        status, headers, body = await request(b'gzip')
+        assert gzip.decompress(body) == PAGE
+        assert headers[b'content-encoding'] == b'gzip'
+        assert headers[b'vary'] == b'accept-encoding'
+
+        status, headers, body = await request(None)
+        assert body == PAGE and b'content-encoding' not in headers
+
+        assert len(renders) == 1
+        assert cache.stats()['hits'] == 2
+
+    asyncio.run(run())
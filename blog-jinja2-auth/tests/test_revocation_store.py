@@ -0,0 +1,92 @@
+"""Tests for the revocation store"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from bareasgi_blog.revocation_store import RevocationStore
+
+
+def _payload(jti: str, username: str, issued_at: datetime):
+    return {'jti': jti, 'sub': username, 'iat': issued_at}
+
+
+def test_revoke_user_spares_later_tokens(open_pool):
+    """Revoking a user revokes the tokens issued before, and not those issued
+    after in the same second"""
+    async def run():
+        pool = await open_pool()
+        try:
+            store = RevocationStore(pool)
+            await store.load()
+            revoked_before = datetime(2020, 1, 1, 12, 0, 0, 500000)
+            await store.revoke_user('alice', revoked_before)
+
+            assert await store.is_revoked(
+                _payload('a', 'alice', revoked_before.replace(microsecond=0))
+            )
+            assert not await store.is_revoked(
+                _payload('b', 'alice', revoked_before.replace(microsecond=600000))
+            )
+            assert not await store.is_revoked(
+                _payload('c', 'bob', revoked_before - timedelta(hours=1))
+            )
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
+
+
+def test_revocations_are_seen_by_other_workers(open_pool):
+    """A revocation made by one worker is seen by another once the refresh
+    interval has passed"""
+    async def run():
+        pools = [await open_pool(), await open_pool()]
+        try:
+            first = RevocationStore(pools[0])
+            second = RevocationStore(pools[1], timedelta(seconds=0.05))
+            await first.load()
+            await second.load()
+
+            now = datetime.utcnow()
+            payload = _payload('a', 'alice', now - timedelta(minutes=1))
+            assert not await second.is_revoked(payload)
+
+            await first.revoke_token('a', 'alice', now + timedelta(days=1))
+            await first.revoke_user('bob', now)
+            await asyncio.sleep(0.1)
+
+            assert await second.is_revoked(payload)
+            assert await second.is_revoked(
+                _payload('b', 'bob', now - timedelta(minutes=1))
+            )
+        finally:
+            for pool in pools:
+                await pool.close()
+
+    asyncio.run(run())
+
+
+def test_refresh_keeps_local_revocations(open_pool):
+    """A refresh which reads the rows before a revocation was written keeps
+    it, and forgets the revocations which have expired"""
+    async def run():
+        pool = await open_pool()
+        try:
+            store = RevocationStore(pool, timedelta(0))
+            await store.load()
+            now = datetime.utcnow()
+            await store.revoke_token('old', 'alice', now - timedelta(minutes=1))
+            await store.revoke_token('new', 'alice', now + timedelta(days=1))
+            await store.revoke_user('bob', now)
+            # Make the rows look as they did before the revocations.
+            async with pool.write() as conn:
+                await conn.execute('DELETE FROM revoked_tokens')
+                await conn.execute('DELETE FROM revoked_users')
+
+            assert await store.is_revoked(_payload('new', 'alice', now))
+            assert not await store.is_revoked(_payload('old', 'alice', now))
+            assert await store.is_revoked(_payload('x', 'bob', now))
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
@@ -0,0 +1,85 @@
+"""Tests for the utilities"""
+
+import asyncio
+import base64
+from datetime import datetime
+
+import pytest
+
+from bareasgi_blog.utils import (
+    MAX_NDJSON_LINE_LENGTH,
+    NdjsonError,
+    decode_cursor,
+    encode_cursor,
+    ndjson_reader
+)
+
+
+async def _chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _read(*chunks: bytes, max_line_length=MAX_NDJSON_LINE_LENGTH):
+    return [
+        value
+        async for value in ndjson_reader(_chunks(*chunks), max_line_length)
+    ]
+
+
+def test_ndjson_reader_numbers_lines():
+    """The values are read across chunks, with their line numbers"""
+    values = asyncio.run(_read(b'{"a":', b'1}\n\n{"b":2}\n', b'{"c":3}'))
+    assert values == [(1, {'a': 1}), (3, {'b': 2}), (4, {'c': 3})]
+
+
+def test_ndjson_reader_reports_invalid_line():
+    """An invalid line raises an error with its line number"""
+    with pytest.raises(NdjsonError) as error:
+        asyncio.run(_read(b'{"a":1}\n\n{bad\n{"c":3}\n'))
+    assert error.value.line == 3
+
+
+def test_ndjson_reader_refuses_long_line():
+    """A line longer than the maximum raises an error with its line number,
+    even when it spans chunks"""
+    values = asyncio.run(_read(b'[1,2,3]\n', b'"abcdef"', max_line_length=8))
+    assert values == [(1, [1, 2, 3]), (2, 'abcdef')]
+    with pytest.raises(NdjsonError) as error:
+        asyncio.run(
+            _read(b'[1,2,3]\n[1,', b'2,3,', b'4]\n', max_line_length=8)
+        )
+    assert error.value.line == 2
+
+
+def test_cursor_round_trip():
+    """A cursor decodes to the values it was made from"""
+    created = datetime(2020, 1, 2, 3, 4, 5, 678)
+    cursor = encode_cursor(created, 42)
+    assert '=' not in cursor
+    assert decode_cursor(cursor, 2) == [created, 42]
+    assert decode_cursor(encode_cursor('title', 1), 2) == ['title', 1]
+
+
+def _raw_cursor(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode()
+
+
+@pytest.mark.parametrize(
+    'cursor',
+    [
+        '!!!',
+        'e30',
+        'é',
+        encode_cursor(1, 2, 3),
+        _raw_cursor('5'),
+        _raw_cursor('{"x":1}'),
+        _raw_cursor('[{"x":1},1]'),
+        _raw_cursor('[{"datetime":5},1]'),
+        _raw_cursor('[[1],1]')
+    ]
+)
+def test_invalid_cursor_raises_value_error(cursor):
+    """A cursor which wasn't made by encode_cursor is refused"""
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 2)
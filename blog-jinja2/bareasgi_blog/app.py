@@ -12,11 +12,17 @@ from bareasgi import (
     Message
 )
 import bareasgi_jinja2
-import jinja2
 import pkg_resources
 
-from .blog_repository import BlogRepository
+from .cached_blog_repository import CachedBlogRepository
+from .entity_cache import EntityCache
+from .migrations import migrate
 from .blog_controller import BlogController
+from .templating import (
+    FirstRequestLogger,
+    create_environment,
+    precompile_templates
+)
 
 
 async def _on_startup(
@@ -32,8 +38,9 @@ async def _on_startup(
         detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
     )
 
-    blog_repository = BlogRepository(conn)
-    await blog_repository.initialise()
+    await migrate(conn)
+
+    blog_repository = CachedBlogRepository(conn, EntityCache(1024))
 
     blog_controller = BlogController(blog_repository)
     blog_controller.add_routes(app)
@@ -54,13 +61,21 @@ def create_application(config: Mapping[str, Any]) -> Application:
     """Create the application"""
     templates = pkg_resources.resource_filename(__name__, "templates")
 
-    app = Application(info=dict(config=config))
+    templates_config = config['templates']
+
+    app = Application(
+        middlewares=[
+            FirstRequestLogger(templates_config['log_first_requests'])
+        ],
+        info=dict(config=config)
+    )
 
-    env = jinja2.Environment(
-        loader=jinja2.FileSystemLoader(templates),
-        autoescape=jinja2.select_autoescape(['html', 'xml']),
-        enable_async=True
+    env = create_environment(
+        templates,
+        templates_config.get('bytecode_cache_dir')
     )
+    if templates_config['precompile']:
+        precompile_templates(env)
     bareasgi_jinja2.add_jinja2(app, env)
 
     app.startup_handlers.append(partial(_on_startup, app))
@@ -149,19 +149,3 @@ WHERE rowid=?
             await cur.execute(stmt, args)
             await self._conn.commit()
             return cur.rowcount == 1
-
-    async def initialise(self) -> None:
-        """Initialise the repository"""
-        await self._conn.execute("""
-CREATE TABLE IF NOT EXISTS blog_entries
-(
-    title TEXT NOT NULL,
-    description TEXT NULL,
-    content TEXT NULL,
-    created timestamp NOT NULL,
-    updated timestamp NOT NULL,
-
-    PRIMARY KEY(title)
-)
-""")
-        await self._conn.commit()
@@ -0,0 +1,50 @@
+"""Cached Blog Repository"""
+
+from typing import Any, Dict, List, Optional
+
+import aiosqlite
+
+from .blog_repository import BlogRepository
+from .entity_cache import EntityCache
+
+
+class CachedBlogRepository(BlogRepository):
+    """A blog repository which caches the entries read by id.
+
+    Updates and deletes invalidate the cached entry. The cached entries are
+    shared between callers, so they must not be modified.
+    """
+
+    def __init__(self, conn: aiosqlite.Connection, cache: EntityCache) -> None:
+        super().__init__(conn)
+        self.cache = cache
+
+    async def read_by_id(
+            self,
+            id_: int,
+            columns: Optional[List[str]]
+    ) -> Optional[Dict[str, Any]]:
+        if columns:
+            return await super().read_by_id(id_, columns)
+
+        entry = self.cache.get(id_)
+        if entry is not None:
+            return entry
+
+        generation = self.cache.generation
+        entry = await super().read_by_id(id_, None)
+        if entry is not None:
+            self.cache.put(id_, entry, generation)
+        return entry
+
+    async def update(self, id_: int, **kwargs) -> bool:
+        try:
+            return await super().update(id_, **kwargs)
+        finally:
+            self.cache.invalidate(id_)
+
+    async def delete(self, id_: int) -> bool:
+        try:
+            return await super().delete(id_)
+        finally:
+            self.cache.invalidate(id_)
@@ -0,0 +1,104 @@
+"""Entity Cache"""
+
+from collections import OrderedDict
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class EntityCache:
+    """A bounded cache with least recently used eviction and an optional time
+    to live.
+
+    The generation is incremented on every invalidation. A reader takes the
+    generation before reading from the database and only stores the result if
+    the generation is unchanged, so a value read before a write can never be
+    cached after it.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None) -> None:
+        """Initialise the entity cache
+
+        :param max_size: The maximum number of entries
+        :type max_size: int
+        :param ttl: The time to live in seconds, or None if entries don't
+            expire, defaults to None
+        :type ttl: Optional[float], optional
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a value from the cache
+
+        :param key: The key
+        :type key: Hashable
+        :return: The value or None if it was not found
+        :rtype: Optional[Any]
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if self.ttl is not None and expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any, generation: int) -> None:
+        """Put a value in the cache if there have been no invalidations since
+        it was read
+
+        :param key: The key
+        :type key: Hashable
+        :param value: The value
+        :type value: Any
+        :param generation: The generation when the value was read
+        :type generation: int
+        """
+        if generation != self.generation:
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else 0.0
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Remove a value from the cache
+
+        :param key: The key
+        :type key: Hashable
+        """
+        self.generation += 1
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all the values from the cache"""
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """The cache statistics
+
+        :return: The hits, misses, evictions and size of the cache
+        :rtype: Dict[str, int]
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries)
+        }
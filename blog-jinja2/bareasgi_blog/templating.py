@@ -0,0 +1,103 @@
+"""Templating"""
+
+import logging
+import os
+import time
+from typing import Optional
+
+from baretypes import (
+    Scope,
+    Info,
+    RouteMatches,
+    Content,
+    HttpResponse,
+    HttpRequestCallback
+)
+import jinja2
+
+LOGGER = logging.getLogger(__name__)
+
+
+def create_environment(
+        templates: str,
+        bytecode_cache_dir: Optional[str] = None
+) -> jinja2.Environment:
+    """Create the template environment.
+
+    The bytecode cache keeps the compiled templates on disk, so a worker
+    which starts after the templates have been compiled by another worker,
+    or by an earlier run, only has to load them. A compiled template is
+    recompiled when its source changes.
+
+    :param templates: The folder containing the templates
+    :type templates: str
+    :param bytecode_cache_dir: The folder for the bytecode cache, or None for
+        no bytecode cache, defaults to None
+    :type bytecode_cache_dir: Optional[str], optional
+    :return: The template environment
+    :rtype: jinja2.Environment
+    """
+    bytecode_cache: Optional[jinja2.BytecodeCache] = None
+    if bytecode_cache_dir is not None:
+        directory = os.path.expanduser(bytecode_cache_dir)
+        os.makedirs(directory, exist_ok=True)
+        bytecode_cache = jinja2.FileSystemBytecodeCache(directory)
+
+    return jinja2.Environment(
+        loader=jinja2.FileSystemLoader(templates),
+        autoescape=jinja2.select_autoescape(['html', 'xml']),
+        enable_async=True,
+        bytecode_cache=bytecode_cache
+    )
+
+
+def precompile_templates(env: jinja2.Environment) -> None:
+    """Load every template, so none are compiled while serving a request
+
+    :param env: The template environment
+    :type env: jinja2.Environment
+    """
+    start = time.perf_counter()
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    LOGGER.info(
+        'Loaded %s templates in %.1f ms',
+        len(names),
+        (time.perf_counter() - start) * 1000
+    )
+
+
+class FirstRequestLogger:
+    """Middleware which logs the time taken by the first requests a worker
+    serves, when anything still to be loaded or warmed up shows."""
+
+    def __init__(self, count: int = 20) -> None:
+        """Initialise the first request logger
+
+        :param count: The number of requests to log, defaults to 20
+        :type count: int, optional
+        """
+        self.remaining = count
+
+    async def __call__(
+            self,
+            scope: Scope,
+            info: Info,
+            matches: RouteMatches,
+            content: Content,
+            handler: HttpRequestCallback
+    ) -> HttpResponse:
+        if self.remaining <= 0:
+            return await handler(scope, info, matches, content)
+
+        self.remaining -= 1
+        start = time.perf_counter()
+        response = await handler(scope, info, matches, content)
+        LOGGER.info(
+            'Early request %s %s took %.1f ms',
+            scope['method'],
+            scope['path'],
+            (time.perf_counter() - start) * 1000
+        )
+        return response
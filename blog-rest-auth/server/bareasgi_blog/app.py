@@ -12,6 +12,7 @@ from bareasgi import (
 )
 
 from .blog_repository import BlogRepository
+from .migrations import migrate
 from .blog_rest_controller import BlogRestController
 
 async def _on_startup(
@@ -26,6 +27,8 @@ async def _on_startup(
         detect_types=sqlite3.PARSE_DECLTYPES|sqlite3.PARSE_COLNAMES
     )
 
+    await migrate(conn)
+
     blog_repository = BlogRepository(conn)
     await blog_repository.initialise()
 
@@ -5,7 +5,8 @@ from typing import (
     Any,
     Dict,
     List,
-    Optional
+    Optional,
+    Tuple
 )
 
 import aiosqlite
@@ -32,6 +33,25 @@ class BlogRepository(Repository):
         inserts.update(kwargs)
         return await super().create(**inserts)
 
+    async def read_updated(self, id_: int) -> Optional[datetime]:
+        """Read the time a blog entry was last updated, without reading the
+        entry itself
+
+        :param id_: The id of the blog entry
+        :type id_: int
+        :return: The time the entry was updated, or None if there is no entry
+        :rtype: Optional[datetime]
+        """
+        stmt = f"""SELECT updated
+FROM {self._table}
+WHERE rowid = ?"""
+        args = (id_,)
+
+        async with self._conn.cursor() as cur:
+            await cur.execute(stmt, args)
+            row = await cur.fetchone()
+            return row[0] if row is not None else None
+
     async def read_between(
             self,
             start_date: datetime,
@@ -61,18 +81,62 @@ class BlogRepository(Repository):
             limit
         )
 
-    async def initialise(self) -> None:
-        """Initialise the repository"""
-        await self._conn.execute("""
-CREATE TABLE IF NOT EXISTS blog_entry
-(
-    title TEXT NOT NULL,
-    description TEXT NULL,
-    content TEXT NULL,
-    created timestamp NOT NULL,
-    updated timestamp NOT NULL,
-
-    PRIMARY KEY(title)
-)
-""")
-        await self._conn.commit()
+    async def read_between_page(
+            self,
+            start_date: datetime,
+            end_date: datetime,
+            columns: Optional[List[str]],
+            limit: int,
+            cursor: Optional[str]
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Read a page of entries between the start and end date
+
+        :param start_date: The start date
+        :type start_date: datetime
+        :param end_date: The end date
+        :type end_date: datetime
+        :param columns: The columns to return
+        :type columns: Optional[List[str]]
+        :param limit: The maximum number of entries to return
+        :type limit: int
+        :param cursor: The cursor returned with the previous page
+        :type cursor: Optional[str]
+        :return: The entries found and the cursor for the next page
+        :rtype: Tuple[List[Dict[str, Any]], Optional[str]]
+        """
+        return await self.read_between_column_page(
+            'created',
+            start_date,
+            end_date,
+            columns,
+            limit,
+            cursor
+        )
+
+    async def search_page(
+            self,
+            text: str,
+            limit: int,
+            cursor: Optional[str]
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Search the entries for the terms in the text
+
+        Matches in the title rank above the description, which rank above the
+        content.
+
+        :param text: The text to search for
+        :type text: str
+        :param limit: The maximum number of entries to return
+        :type limit: int
+        :param cursor: The cursor returned with the previous page
+        :type cursor: Optional[str]
+        :return: The entries found and the cursor for the next page
+        :rtype: Tuple[List[Dict[str, Any]], Optional[str]]
+        """
+        return await self.read_match_page(
+            text,
+            ['title', 'description', 'created'],
+            [10.0, 5.0, 1.0],
+            limit,
+            cursor
+        )
@@ -1,9 +1,8 @@
 """Blog REST Controller"""
 
 from datetime import datetime, timedelta
-import json
 from typing import Optional
-from urllib.parse import parse_qsl
+from urllib.parse import parse_qsl, urlencode
 
 from bareasgi import (
     Application,
@@ -14,21 +13,19 @@ from bareasgi import (
     HttpResponse
 )
 from bareutils import (
-    text_reader,
-    text_writer
+    bytes_writer,
+    text_reader
 )
 import bareutils.header as header
 
 from .blog_repository import BlogRepository
-
-
-class DateEncoder(json.JSONEncoder):
-    """JSONEncoder with date support"""
-
-    def default(self, obj):  # pylint: disable=method-hidden,arguments-differ
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return json.JSONEncoder.default(self, obj)
+from .conditional import (
+    is_conditional,
+    is_not_modified,
+    make_etag,
+    validator_headers
+)
+from . import serializer
 
 
 def _is_form_data(scope: Scope) -> bool:
@@ -41,7 +38,7 @@ def _parse_date(value: Optional[bytes], default: datetime) -> datetime:
 
 
 def _parse_int(value: Optional[bytes], default: int) -> int:
-    return default if not value else int(value[0])
+    return default if not value else int(value)
 
 
 class BlogRestController:
@@ -50,6 +47,7 @@ class BlogRestController:
     def __init__(self, repository: BlogRepository, path_prefix: str) -> None:
         self._repository = repository
         self._path = f'{path_prefix}/blog_entry'
+        self._search_path = f'{path_prefix}/search'
 
     def add_routes(self, app: Application) -> None:
         """Add routes to the application
@@ -60,6 +58,7 @@ class BlogRestController:
         app.http_router.add({'POST'}, f'{self._path}', self._create)
         app.http_router.add({'GET'}, f'{self._path}/{{id:int}}', self._read)
         app.http_router.add({'GET'}, f'{self._path}', self._read_between)
+        app.http_router.add({'GET'}, self._search_path, self._search)
         app.http_router.add({'PUT'}, f'{self._path}/{{id:int}}', self._update)
         app.http_router.add(
             {'DELETE'}, f'{self._path}/{{id:int}}', self._delete)
@@ -83,8 +82,8 @@ class BlogRestController:
             return (
                 200,
                 [(b'content-type', b'application/json')],
-                text_writer(
-                    json.dumps({
+                bytes_writer(
+                    serializer.dumps({
                         'id': id_,
                         'read': f'{self._path}/{id_}'
                     })
@@ -95,7 +94,7 @@ class BlogRestController:
 
     async def _read(
             self,
-            _scope: Scope,
+            scope: Scope,
             _info: Info,
             matches: RouteMatches,
             _content: Content
@@ -105,19 +104,30 @@ class BlogRestController:
             if id_ is None:
                 raise RuntimeError('Invalid id')
 
+            # Check the validators against the update time before reading
+            # the whole entry.
+            if is_conditional(scope['headers']):
+                updated = await self._repository.read_updated(id_)
+                if updated is None:
+                    return 404
+                etag = make_etag(id_, updated)
+                if is_not_modified(scope['headers'], etag, updated):
+                    return 304, validator_headers(etag, updated)
+
             entry = await self._repository.read_by_id(id_, None)
             if entry is None:
                 return 404
 
             return (
                 200,
-                [(b'content-type', b'application/json')],
-                text_writer(
-                    json.dumps(
-                        entry,
-                        cls=DateEncoder
+                [
+                    (b'content-type', b'application/json'),
+                    *validator_headers(
+                        make_etag(id_, entry['updated']),
+                        entry['updated']
                     )
-                )
+                ],
+                bytes_writer(serializer.dumps(entry))
             )
         except:  # pylint: disable=bare-except
             return 500
@@ -136,23 +146,77 @@ class BlogRestController:
             start_date = _parse_date(
                 query.get(b'from'), end_date - timedelta(5))
             limit = _parse_int(query.get(b'limit'), 20)
+            cursor = query[b'cursor'].decode() if b'cursor' in query else None
+
+            try:
+                entries, next_cursor = await self._repository.read_between_page(
+                    start_date,
+                    end_date,
+                    ['title', 'description'],
+                    limit,
+                    cursor
+                )
+            except ValueError:
+                return 400
+
+            headers = [(b'content-type', b'application/json')]
+            if next_cursor is not None:
+                next_query = urlencode({
+                    'from': start_date.isoformat(),
+                    'to': end_date.isoformat(),
+                    'limit': limit,
+                    'cursor': next_cursor
+                })
+                link = f'<{self._path}?{next_query}>; rel="next"'
+                headers.append((b'link', link.encode()))
 
-            entries = await self._repository.read_between(
-                start_date,
-                end_date,
-                ['title', 'description'],
-                limit
+            return (
+                200,
+                headers,
+                bytes_writer(serializer.dumps(entries))
             )
+        except:  # pylint: disable=bare-except
+            return 500
+
+    async def _search(
+            self,
+            scope: Scope,
+            _info: Info,
+            _matches: RouteMatches,
+            _content: Content
+    ) -> HttpResponse:
+        try:
+            query = dict(parse_qsl(scope['query_string'] or b''))
+
+            text = query.get(b'q', b'').decode()
+            if not text.strip():
+                return 400
+            limit = _parse_int(query.get(b'limit'), 20)
+            cursor = query[b'cursor'].decode() if b'cursor' in query else None
+
+            try:
+                entries, next_cursor = await self._repository.search_page(
+                    text,
+                    limit,
+                    cursor
+                )
+            except ValueError:
+                return 400
+
+            headers = [(b'content-type', b'application/json')]
+            if next_cursor is not None:
+                next_query = urlencode({
+                    'q': text,
+                    'limit': limit,
+                    'cursor': next_cursor
+                })
+                link = f'<{self._search_path}?{next_query}>; rel="next"'
+                headers.append((b'link', link.encode()))
 
             return (
                 200,
-                [(b'content-type', b'application/json')],
-                text_writer(
-                    json.dumps(
-                        entries,
-                        cls=DateEncoder
-                    )
-                )
+                headers,
+                bytes_writer(serializer.dumps(entries))
             )
         except:  # pylint: disable=bare-except
             return 500
@@ -178,8 +242,8 @@ class BlogRestController:
             return (
                 200,
                 [(b'content-type', b'application/json')],
-                text_writer(
-                    json.dumps({
+                bytes_writer(
+                    serializer.dumps({
                         'id': id_,
                         'read': f'{self._path}/{id_}'
                     })
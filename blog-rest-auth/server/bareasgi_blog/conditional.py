@@ -0,0 +1,130 @@
+"""Conditional requests
+
+Entity tags and modification times let a client revalidate its copy of an
+entity, and get a 304 with no body when the copy is current.
+"""
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import hashlib
+from typing import List
+
+from baretypes import Header
+import bareutils.header as header
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def make_etag(id_: int, updated: datetime, variant: str = '') -> bytes:
+    """Make a strong entity tag for a version of an entity
+
+    :param id_: The id of the entity
+    :type id_: int
+    :param updated: The time the entity was last updated in UTC
+    :type updated: datetime
+    :param variant: Anything else the representation depends on, such as
+        the user a page is rendered for, defaults to ''
+    :type variant: str, optional
+    :return: The entity tag
+    :rtype: bytes
+    """
+    tag = f'{id_:x}-{(updated - EPOCH) // MICROSECOND:x}'
+    if variant:
+        digest = hashlib.blake2b(variant.encode(), digest_size=8).hexdigest()
+        tag = f'{tag}-{digest}'
+    return f'"{tag}"'.encode()
+
+
+def is_conditional(headers: List[Header]) -> bool:
+    """Check if a request has any validators
+
+    :param headers: The request headers
+    :type headers: List[Header]
+    :return: True if the request has an If-None-Match or If-Modified-Since
+        header
+    :rtype: bool
+    """
+    return any(
+        name in (b'if-none-match', b'if-modified-since')
+        for name, _value in headers
+    )
+
+
+def _etag_matches(value: bytes, etag: bytes) -> bool:
+    if value.strip() == b'*':
+        return True
+    # If-None-Match uses the weak comparison.
+    for tag in value.split(b','):
+        tag = tag.strip()
+        if tag.startswith(b'W/'):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def is_not_modified(
+        headers: List[Header],
+        etag: bytes,
+        updated: datetime
+) -> bool:
+    """Check if the client's copy of an entity is current.
+
+    If-Modified-Since is ignored when there is an If-None-Match header, and
+    when it is not a valid date.
+
+    :param headers: The request headers
+    :type headers: List[Header]
+    :param etag: The entity tag of the current version
+    :type etag: bytes
+    :param updated: The time the entity was last updated in UTC
+    :type updated: datetime
+    :return: True if a 304 should be sent
+    :rtype: bool
+    """
+    if_none_match = [
+        value
+        for name, value in headers
+        if name == b'if-none-match'
+    ]
+    if if_none_match:
+        return any(_etag_matches(value, etag) for value in if_none_match)
+
+    try:
+        if_modified_since = header.if_modified_since(headers)
+    except ValueError:
+        return False
+    if if_modified_since is None:
+        return False
+    return updated.replace(microsecond=0) <= if_modified_since
+
+
+def validator_headers(
+        etag: bytes,
+        updated: datetime,
+        cache_control: bytes = b'no-cache'
+) -> List[Header]:
+    """Make the validator headers for a response.
+
+    The default cache control lets a client keep a copy, but makes it
+    revalidate the copy before each use.
+
+    :param etag: The entity tag
+    :type etag: bytes
+    :param updated: The time the entity was last updated in UTC
+    :type updated: datetime
+    :param cache_control: The cache control, defaults to b'no-cache'
+    :type cache_control: bytes, optional
+    :return: The ETag, Last-Modified and Cache-Control headers
+    :rtype: List[Header]
+    """
+    last_modified = format_datetime(
+        updated.replace(tzinfo=timezone.utc),
+        usegmt=True
+    )
+    return [
+        (b'etag', etag),
+        (b'last-modified', last_modified.encode()),
+        (b'cache-control', cache_control)
+    ]
@@ -0,0 +1,146 @@
+"""Migrations"""
+
+import logging
+from typing import List, NamedTuple, Optional, Sequence
+
+import aiosqlite
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Migration(NamedTuple):
+    """A numbered schema migration"""
+    version: int
+    description: str
+    script: str
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1,
+        'Create the blog entries table',
+        """
+CREATE TABLE IF NOT EXISTS blog_entry
+(
+    title TEXT NOT NULL,
+    description TEXT NULL,
+    content TEXT NULL,
+    created timestamp NOT NULL,
+    updated timestamp NOT NULL,
+
+    PRIMARY KEY(title)
+);
+"""
+    ),
+    Migration(
+        2,
+        'Key the blog entries by an integer id and index the created date',
+        """
+CREATE TABLE blog_entry_new
+(
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    description TEXT NULL,
+    content TEXT NULL,
+    created timestamp NOT NULL,
+    updated timestamp NOT NULL,
+
+    UNIQUE(title)
+);
+
+INSERT INTO blog_entry_new(id, title, description, content, created, updated)
+SELECT rowid, title, description, content, created, updated
+FROM blog_entry;
+
+DROP TABLE blog_entry;
+
+ALTER TABLE blog_entry_new RENAME TO blog_entry;
+
+CREATE INDEX blog_entry_created ON blog_entry(created, id);
+"""
+    ),
+    Migration(
+        3,
+        'Add a full text index over the blog entries',
+        """
+CREATE VIRTUAL TABLE blog_entry_fts USING fts5
+(
+    title,
+    description,
+    content,
+    content='blog_entry',
+    content_rowid='id',
+    tokenize='porter unicode61'
+);
+
+CREATE TRIGGER blog_entry_fts_insert AFTER INSERT ON blog_entry
+BEGIN
+    INSERT INTO blog_entry_fts(rowid, title, description, content)
+    VALUES (new.id, new.title, new.description, new.content);
+END;
+
+CREATE TRIGGER blog_entry_fts_delete AFTER DELETE ON blog_entry
+BEGIN
+    INSERT INTO blog_entry_fts(blog_entry_fts, rowid, title, description, content)
+    VALUES ('delete', old.id, old.title, old.description, old.content);
+END;
+
+CREATE TRIGGER blog_entry_fts_update AFTER UPDATE ON blog_entry
+BEGIN
+    INSERT INTO blog_entry_fts(blog_entry_fts, rowid, title, description, content)
+    VALUES ('delete', old.id, old.title, old.description, old.content);
+    INSERT INTO blog_entry_fts(rowid, title, description, content)
+    VALUES (new.id, new.title, new.description, new.content);
+END;
+
+INSERT INTO blog_entry_fts(blog_entry_fts) VALUES ('rebuild');
+"""
+    )
+]
+
+
+async def migrate(
+        conn: aiosqlite.Connection,
+        migrations: Optional[Sequence[Migration]] = None
+) -> int:
+    """Apply the migrations which have not yet been applied.
+
+    Each migration runs in its own transaction, and the version applied is
+    recorded in the database with the user_version pragma.
+
+    :param conn: The connection to migrate
+    :type conn: aiosqlite.Connection
+    :param migrations: The migrations, or None for MIGRATIONS, defaults to
+        None
+    :type migrations: Optional[Sequence[Migration]], optional
+    :return: The version of the schema
+    :rtype: int
+    """
+    async with conn.execute('PRAGMA user_version') as cur:
+        version, = await cur.fetchone()
+
+    if migrations is None:
+        migrations = MIGRATIONS
+
+    for migration in sorted(migrations, key=lambda x: x.version):
+        if migration.version <= version:
+            continue
+
+        LOGGER.info(
+            'Applying migration %s: %s',
+            migration.version,
+            migration.description
+        )
+        try:
+            await conn.executescript(f"""
+BEGIN;
+{migration.script}
+PRAGMA user_version = {migration.version};
+COMMIT;
+""")
+        except:  # pylint: disable=bare-except
+            await conn.rollback()
+            raise
+        version = migration.version
+
+    return version
@@ -1,6 +1,5 @@
 """Repository"""
 
-from abc import ABCMeta, abstractmethod
 from datetime import datetime
 from typing import (
     Any,
@@ -13,11 +12,20 @@ from typing import (
 
 import aiosqlite
 
+from .utils import (
+    SNIPPET_END,
+    SNIPPET_START,
+    decode_cursor,
+    encode_cursor,
+    make_match_query,
+    make_snippet
+)
+
 def _make_unpacker(cur: aiosqlite.Cursor) -> Callable[[Tuple], Dict[str, Any]]:
     columns = [name for name, *_ in cur.description]
     return lambda row: dict(zip(columns, row))
 
-class Repository(metaclass=ABCMeta):
+class Repository:
     """"Repository"""
 
     def __init__(self, conn: aiosqlite.Connection, table: str) -> None:
@@ -88,6 +96,111 @@ LIMIT ?"""
             values = [unpack(row) async for row in cur]
             return values
 
+    async def read_between_column_page(
+            self,
+            column: str,
+            start_value: Any,
+            end_value: Any,
+            columns: Optional[List[str]],
+            limit: int,
+            cursor: Optional[str]
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Read a page of records between values for a given column.
+
+        The records are ordered by the column and the rowid. A page starts
+        after the last record of the previous page, so reading a page is an
+        index seek rather than an offset scan.
+
+        :return: The records and a cursor for the next page, or None if there
+            are no more records.
+        """
+        # The keyset is selected apart from the columns asked for, so it
+        # isn't added to the records.
+        selected = f"rowid AS id,{','.join(columns)}" if columns else '*'
+        stmt = f"""SELECT {column} AS page_key,rowid AS page_key_id,{selected}
+FROM {self._table}
+WHERE {column} BETWEEN ? AND ?{f' AND ({column},rowid) > (?,?)' if cursor else ''}
+ORDER BY {column},rowid
+LIMIT ?"""
+        args = (
+            start_value,
+            end_value,
+            *(decode_cursor(cursor, 2) if cursor else ()),
+            limit + 1
+        )
+
+        async with self._conn.cursor() as cur:
+            await cur.execute(stmt, args)
+            unpack = _make_unpacker(cur)
+            values = [unpack(row) async for row in cur]
+
+        keys = [
+            (value.pop('page_key'), value.pop('page_key_id'))
+            for value in values
+        ]
+        if len(values) <= limit:
+            return values, None
+        return values[:limit], encode_cursor(*keys[limit - 1])
+
+    async def read_match_page(
+            self,
+            text: str,
+            columns: List[str],
+            weights: List[float],
+            limit: int,
+            cursor: Optional[str],
+            highlight: Tuple[str, str] = ('<mark>', '</mark>')
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Read a page of records matching the terms in the text.
+
+        The full text index is the table named with an "_fts" suffix. The
+        records are ranked by bm25 with the weights of the indexed columns,
+        and a snippet of the best matching column is made, then HTML escaped
+        with the terms highlighted, so it can be inserted into a page as HTML.
+
+        :return: The records, best first with the lowest score, and a cursor
+            for the next page, or None if there are no more records.
+        """
+        match_query = make_match_query(text)
+        if not match_query:
+            return [], None
+
+        fts_table = f'{self._table}_fts'
+        stmt = f"""SELECT *
+FROM (
+    SELECT
+        {self._table}.rowid AS id,
+        {','.join(f'{self._table}.{column} AS {column}' for column in columns)},
+        snippet({fts_table}, -1, ?, ?, '…', 16) AS snippet,
+        bm25({fts_table}, {','.join(str(weight) for weight in weights)}) AS score
+    FROM {fts_table}
+    JOIN {self._table} ON {self._table}.rowid = {fts_table}.rowid
+    WHERE {fts_table} MATCH ?
+)
+{'WHERE (score,id) > (?,?)' if cursor else ''}
+ORDER BY score,id
+LIMIT ?"""
+        args = (
+            SNIPPET_START,
+            SNIPPET_END,
+            match_query,
+            *(decode_cursor(cursor, 2) if cursor else ()),
+            limit + 1
+        )
+
+        async with self._conn.cursor() as cur:
+            await cur.execute(stmt, args)
+            unpack = _make_unpacker(cur)
+            values = [unpack(row) async for row in cur]
+        for value in values:
+            value['snippet'] = make_snippet(value['snippet'], highlight)
+
+        if len(values) <= limit:
+            return values, None
+        values = values[:limit]
+        last = values[-1]
+        return values, encode_cursor(last['score'], last['id'])
+
     async def read_many(
             self,
             columns: Optional[List[str]],
@@ -131,6 +244,5 @@ WHERE rowid=?"""
             await self._conn.commit()
             return cur.rowcount == 1
 
-    @abstractmethod
     async def initialise(self) -> None:
-        """Initialise the repository"""
+        """Initialise the repository once the schema has been migrated"""
@@ -0,0 +1,92 @@
+"""Utilities"""
+
+import base64
+from datetime import datetime
+import html
+import json
+from typing import Any, List, Tuple
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the keyset values of the last row of a page as an opaque cursor.
+
+    :return: The cursor
+    :rtype: str
+    """
+    text = json.dumps(
+        [
+            {'datetime': value.isoformat()} if isinstance(value, datetime)
+            else value
+            for value in values
+        ],
+        separators=(',', ':')
+    )
+    return base64.urlsafe_b64encode(text.encode()).rstrip(b'=').decode()
+
+
+def _decode_cursor_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value['datetime'])
+    if isinstance(value, list):
+        raise ValueError('Invalid cursor value')
+    return value
+
+
+def decode_cursor(cursor: str, count: int) -> List[Any]:
+    """Decode a cursor created by encode_cursor
+
+    :param cursor: The cursor
+    :type cursor: str
+    :param count: The number of keyset values expected
+    :type count: int
+    :raises ValueError: If the cursor is invalid
+    :return: The keyset values
+    :rtype: List[Any]
+    """
+    try:
+        text = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(text)
+        if not isinstance(values, list) or len(values) != count:
+            raise ValueError('Invalid cursor')
+        return [_decode_cursor_value(value) for value in values]
+    except (KeyError, TypeError, ValueError) as error:
+        raise ValueError('Invalid cursor') from error
+
+
+# The snippet is made with these markers around the terms, which are replaced
+# with the highlight after the text has been escaped, so the markup in a blog
+# entry is never sent as markup.
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+
+
+def make_snippet(text: str, highlight: Tuple[str, str]) -> str:
+    """Make a search snippet safe to show as HTML
+
+    :param text: The snippet with the terms between SNIPPET_START and
+        SNIPPET_END
+    :type text: str
+    :param highlight: The markup to put before and after the terms
+    :type highlight: Tuple[str, str]
+    :return: The escaped snippet with the terms highlighted
+    :rtype: str
+    """
+    start, end = highlight
+    escaped = html.escape(text)
+    return escaped.replace(SNIPPET_START, start).replace(SNIPPET_END, end)
+
+
+def make_match_query(text: str) -> str:
+    """Make an FTS5 query which matches all the terms in a search
+
+    Each term is quoted, so the user's text can't use the FTS5 query syntax.
+
+    :param text: The search text
+    :type text: str
+    :return: The query
+    :rtype: str
+    """
+    return ' '.join(
+        '"' + term.replace('"', '""') + '"'
+        for term in text.split()
+    )
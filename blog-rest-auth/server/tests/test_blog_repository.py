@@ -0,0 +1,111 @@
+"""Tests for the blog repository"""
+
+import asyncio
+from datetime import datetime, timedelta
+import sqlite3
+
+import aiosqlite
+
+from bareasgi_blog.blog_repository import BlogRepository
+from bareasgi_blog.migrations import migrate
+
+
+async def _open_repository() -> BlogRepository:
+    conn = await aiosqlite.connect(
+        ':memory:',
+        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
+    )
+    await migrate(conn)
+    return BlogRepository(conn)
+
+
+def test_pages_cover_every_entry_once():
+    """Following the cursors reads every entry once, in order, when entries
+    share a creation time"""
+    async def run():
+        repository = await _open_repository()
+        try:
+            start = datetime(2020, 1, 1)
+            for i in range(10):
+                await repository.create(
+                    title=f'entry{i}',
+                    created=start + timedelta(minutes=i // 3)
+                )
+
+            titles, cursor = [], None
+            while True:
+                entries, cursor = await repository.read_between_page(
+                    start,
+                    start + timedelta(days=1),
+                    ['title'],
+                    4,
+                    cursor
+                )
+                assert len(entries) <= 4
+                assert all(entry.keys() == {'id', 'title'} for entry in entries)
+                titles.extend(entry['title'] for entry in entries)
+                if cursor is None:
+                    break
+
+            assert titles == [f'entry{i}' for i in range(10)]
+        finally:
+            await repository._conn.close()  # pylint: disable=protected-access
+
+    asyncio.run(run())
+
+
+def test_page_without_columns_has_every_column():
+    """A page read without columns has every column of the table"""
+    async def run():
+        repository = await _open_repository()
+        try:
+            start = datetime(2020, 1, 1)
+            await repository.create(title='entry', created=start)
+
+            entries, cursor = await repository.read_between_page(
+                start,
+                start + timedelta(days=1),
+                None,
+                4,
+                None
+            )
+            assert cursor is None
+            assert list(entries[0]) == [
+                'id',
+                'title',
+                'description',
+                'content',
+                'created',
+                'updated'
+            ]
+        finally:
+            await repository._conn.close()  # pylint: disable=protected-access
+
+    asyncio.run(run())
+
+
+def test_search_ranks_and_escapes_snippets():
+    """The title is weighted above the content, and the snippet is escaped
+    with only the terms marked up"""
+    async def run():
+        repository = await _open_repository()
+        try:
+            await repository.create(
+                title='Other',
+                content='<img src=x onerror="zebra()"> & more'
+            )
+            await repository.create(title='Zebra', content='nothing')
+
+            entries, cursor = await repository.search_page('zebra', 10, None)
+            assert cursor is None
+            assert [entry['title'] for entry in entries] == ['Zebra', 'Other']
+            snippet = entries[1]['snippet']
+            assert '<img' not in snippet
+            assert (
+                '&lt;img src=x onerror=&quot;<mark>zebra</mark>()&quot;&gt;'
+                ' &amp; more'
+            ) in snippet
+        finally:
+            await repository._conn.close()  # pylint: disable=protected-access
+
+    asyncio.run(run())
@@ -12,7 +12,9 @@ from bareasgi import (
 )
 from bareasgi_cors import CORSMiddleware
 
-from .blog_repository import BlogRepository
+from .cached_blog_repository import CachedBlogRepository
+from .entity_cache import EntityCache
+from .migrations import migrate
 from .blog_controller import BlogController
 
 
@@ -27,8 +29,9 @@ async def _on_startup(
         detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
     )
 
-    blog_repository = BlogRepository(conn)
-    await blog_repository.initialise()
+    await migrate(conn)
+
+    blog_repository = CachedBlogRepository(conn, EntityCache(1024))
 
     blog_controller = BlogController(blog_repository)
     blog_controller.add_routes(app)
@@ -48,6 +51,7 @@ def create_application() -> Application:
     """Create the application"""
     cors_middleware = CORSMiddleware(
         # allow_methods=ALL_METHODS
+        expose_headers={'link'}
     )
     app = Application(info={}, middlewares=[cors_middleware])
     app.startup_handlers.append(partial(_on_startup, app))
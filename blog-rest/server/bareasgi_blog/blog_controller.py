@@ -2,8 +2,10 @@
 
 from datetime import datetime, timedelta
 import json
-from typing import Optional
-from urllib.parse import parse_qsl
+import logging
+import sqlite3
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode
 
 from bareasgi import (
     Application,
@@ -14,21 +16,30 @@ from bareasgi import (
     HttpResponse
 )
 from bareutils import (
-    text_reader,
-    text_writer
+    bytes_writer,
+    text_reader
 )
 import bareutils.header as header
 
 from .blog_repository import BlogRepository
+from .conditional import (
+    is_conditional,
+    is_not_modified,
+    make_etag,
+    validator_headers
+)
+from .json_writers import json_array_writer, ndjson_writer
+from .utils import (
+    NdjsonError,
+    import_failed,
+    make_import_entry,
+    ndjson_reader
+)
+from . import serializer
 
+LOGGER = logging.getLogger(__name__)
 
-class DateEncoder(json.JSONEncoder):
-    """JSONEncoder with date support"""
-
-    def default(self, obj):  # pylint: disable=method-hidden,arguments-differ
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return json.JSONEncoder.default(self, obj)
+IMPORT_BATCH_SIZE = 1000
 
 
 def _is_form_data(scope: Scope) -> bool:
@@ -41,7 +52,7 @@ def _parse_date(value: Optional[bytes], default: datetime) -> datetime:
 
 
 def _parse_int(value: Optional[bytes], default: int) -> int:
-    return default if not value else int(value[0])
+    return default if not value else int(value)
 
 
 class BlogController:
@@ -61,6 +72,16 @@ class BlogController:
             '/blog/api/post',
             self._create
         )
+        app.http_router.add(
+            {'POST', 'OPTIONS'},
+            '/blog/api/post/import',
+            self._import
+        )
+        app.http_router.add(
+            {'GET'},
+            '/blog/api/post/export',
+            self._export
+        )
         app.http_router.add(
             {'GET'},
             '/blog/api/post/{id:int}',
@@ -71,6 +92,11 @@ class BlogController:
             '/blog/api/post',
             self._read_between
         )
+        app.http_router.add(
+            {'GET'},
+            '/blog/api/search',
+            self._search
+        )
         app.http_router.add(
             {'POST', 'OPTIONS'},
             '/blog/api/post/{id:int}',
@@ -102,8 +128,8 @@ class BlogController:
             return (
                 200,
                 [(b'content-type', b'application/json')],
-                text_writer(
-                    json.dumps({
+                bytes_writer(
+                    serializer.dumps({
                         'id': id_,
                         'read': f'/blog/api/post/{id_}'
                     })
@@ -112,31 +138,103 @@ class BlogController:
         except:  # pylint: disable=bare-except
             return 500
 
+    async def _import(
+            self,
+            scope: Scope,
+            _info: Info,
+            _matches: RouteMatches,
+            content: Content
+    ) -> HttpResponse:
+        """Import blog entries from newline delimited JSON.
+
+        The entries are inserted in batches as the body is read, so the
+        memory used does not depend on the size of the upload. Each batch is
+        committed when it is inserted. If a line is invalid, or a batch can't
+        be inserted, the response is a 400 giving the number of entries
+        imported, the line which failed, and the line to resume the import
+        from. Every entry before that line has been imported.
+        """
+        try:
+            media_type, *_ = header.content_type(scope['headers'])
+            if media_type != b'application/x-ndjson':
+                raise RuntimeError("Invalid media type")
+
+            count = 0
+            batch: List[Dict[str, Any]] = []
+            batch_line = 1
+            try:
+                async for line, value in ndjson_reader(content):
+                    if not batch:
+                        batch_line = line
+                    batch.append(make_import_entry(line, value))
+                    if len(batch) == IMPORT_BATCH_SIZE:
+                        count += await self._repository.create_many(batch)
+                        batch = []
+                if batch:
+                    count += await self._repository.create_many(batch)
+            except NdjsonError as error:
+                return import_failed(
+                    count,
+                    error.line,
+                    batch_line if batch else error.line,
+                    str(error)
+                )
+            except sqlite3.IntegrityError as error:
+                return import_failed(
+                    count,
+                    batch_line,
+                    batch_line,
+                    f'Line {batch_line}: {error}'
+                )
+
+            return (
+                200,
+                [(b'content-type', b'application/json')],
+                bytes_writer(serializer.dumps({'count': count}))
+            )
+        except:  # pylint: disable=bare-except
+            LOGGER.exception('import failed')
+            return 500
+
     async def _read(
             self,
-            _scope: Scope,
+            scope: Scope,
             _info: Info,
             matches: RouteMatches,
             _content: Content
     ) -> HttpResponse:
+        """Read a blog entry.
+
+        When the client sends validators, only the time the entry was
+        updated is read to check them, and an unchanged entry gets a 304.
+        """
         try:
             id_: Optional[int] = matches.get('id')
             if id_ is None:
                 raise RuntimeError('Invalid id')
 
+            if is_conditional(scope['headers']):
+                updated = await self._repository.read_updated(id_)
+                if updated is None:
+                    return 404
+                etag = make_etag(id_, updated)
+                if is_not_modified(scope['headers'], etag, updated):
+                    return 304, validator_headers(etag, updated)
+
             entry = await self._repository.read_by_id(id_, None)
             if entry is None:
                 return 404
 
             return (
                 200,
-                [(b'content-type', b'application/json')],
-                text_writer(
-                    json.dumps(
-                        entry,
-                        cls=DateEncoder
+                [
+                    (b'content-type', b'application/json'),
+                    *validator_headers(
+                        make_etag(id_, entry['updated']),
+                        entry['updated']
                     )
-                )
+                ],
+                bytes_writer(serializer.dumps(entry))
             )
         except:  # pylint: disable=bare-except
             return 500
@@ -155,26 +253,118 @@ class BlogController:
             start_date = _parse_date(
                 query.get(b'from'), end_date - timedelta(5))
             limit = _parse_int(query.get(b'limit'), 20)
+            cursor = query[b'cursor'].decode() if b'cursor' in query else None
+
+            try:
+                entries, next_cursor = await self._repository.iter_between_page(
+                    start_date,
+                    end_date,
+                    ['title', 'description', 'created'],
+                    limit,
+                    cursor
+                )
+            except ValueError:
+                return 400
+
+            headers = [(b'content-type', b'application/json')]
+            if next_cursor is not None:
+                next_query = urlencode({
+                    'from': start_date.isoformat(),
+                    'to': end_date.isoformat(),
+                    'limit': limit,
+                    'cursor': next_cursor
+                })
+                link = f'<{scope["path"]}?{next_query}>; rel="next"'
+                headers.append((b'link', link.encode()))
+
+            return 200, headers, json_array_writer(entries)
+        except:  # pylint: disable=bare-except
+            return 500
+
+    async def _search(
+            self,
+            scope: Scope,
+            _info: Info,
+            _matches: RouteMatches,
+            _content: Content
+    ) -> HttpResponse:
+        try:
+            query = dict(parse_qsl(scope['query_string'] or b''))
+
+            text = query.get(b'q', b'').decode()
+            if not text.strip():
+                return 400
+            limit = _parse_int(query.get(b'limit'), 20)
+            cursor = query[b'cursor'].decode() if b'cursor' in query else None
+
+            try:
+                entries, next_cursor = await self._repository.search_page(
+                    text,
+                    limit,
+                    cursor
+                )
+            except ValueError:
+                return 400
+
+            headers = [(b'content-type', b'application/json')]
+            if next_cursor is not None:
+                next_query = urlencode({
+                    'q': text,
+                    'limit': limit,
+                    'cursor': next_cursor
+                })
+                link = f'<{scope["path"]}?{next_query}>; rel="next"'
+                headers.append((b'link', link.encode()))
 
-            entries = await self._repository.read_between(
+            return (
+                200,
+                headers,
+                bytes_writer(serializer.dumps(entries))
+            )
+        except:  # pylint: disable=bare-except
+            LOGGER.exception('search failed')
+            return 500
+
+    async def _export(
+            self,
+            scope: Scope,
+            _info: Info,
+            _matches: RouteMatches,
+            _content: Content
+    ) -> HttpResponse:
+        """Export the blog entries between two dates.
+
+        The entries are streamed from the cursor into the response as a JSON
+        array, or as newline delimited JSON if that is what the client
+        accepts.
+        """
+        try:
+            query = dict(parse_qsl(scope['query_string'] or b''))
+
+            end_date = _parse_date(query.get(b'to'), datetime.utcnow())
+            start_date = _parse_date(query.get(b'from'), datetime.min)
+
+            entries = self._repository.iter_between(
                 start_date,
                 end_date,
-                ['title', 'description', 'created'],
-                'created',
-                limit
+                None
             )
 
+            accept = header.find(b'accept', scope['headers']) or b''
+            if b'application/x-ndjson' in accept:
+                return (
+                    200,
+                    [(b'content-type', b'application/x-ndjson')],
+                    ndjson_writer(entries)
+                )
+
             return (
                 200,
                 [(b'content-type', b'application/json')],
-                text_writer(
-                    json.dumps(
-                        entries,
-                        cls=DateEncoder
-                    )
-                )
+                json_array_writer(entries)
             )
         except:  # pylint: disable=bare-except
+            LOGGER.exception('export failed')
             return 500
 
     async def _update(
@@ -199,8 +389,8 @@ class BlogController:
             return (
                 200,
                 [(b'content-type', b'application/json')],
-                text_writer(
-                    json.dumps({
+                bytes_writer(
+                    serializer.dumps({
                         'id': id_,
                         'read': f'/blog/api/post/{id_}'
                     })
@@ -1,8 +1,11 @@
 """Repository"""
 
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import (
     Any,
+    AsyncIterator,
     Callable,
     Dict,
     List,
@@ -12,17 +15,49 @@ from typing import (
 
 import aiosqlite
 
+from .utils import (
+    SNIPPET_END,
+    SNIPPET_START,
+    decode_cursor,
+    encode_cursor,
+    make_match_query,
+    make_snippet
+)
+
 
 def _make_unpacker(cur: aiosqlite.Cursor) -> Callable[[Tuple], Dict[str, Any]]:
     columns = [name for name, *_ in cur.description]
     return lambda row: dict(zip(columns, row))
 
 
+async def _no_entries() -> AsyncIterator[Dict[str, Any]]:
+    for entry in ():
+        yield entry
+
+
 class BlogRepository:
     """"Repository"""
 
     def __init__(self, conn: aiosqlite.Connection) -> None:
         self._conn = conn
+        self._write_lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def _write(self, name: str = 'write') -> AsyncIterator[aiosqlite.Cursor]:
+        # The connection is shared, so the writes are serialized and each is
+        # run in a savepoint, which is all that is rolled back on an error.
+        async with self._write_lock, self._conn.cursor() as cur:
+            await cur.execute(f'SAVEPOINT {name}')
+            try:
+                yield cur
+            except:  # pylint: disable=bare-except
+                await cur.execute(f'ROLLBACK TO SAVEPOINT {name}')
+                await cur.execute(f'RELEASE SAVEPOINT {name}')
+                raise
+            else:
+                await cur.execute(f'RELEASE SAVEPOINT {name}')
+            finally:
+                await self._conn.commit()
 
     async def create(self, **kwargs) -> int:
         """Create a blog entry"""
@@ -40,10 +75,40 @@ VALUES ({','.join('?' for _ in range(len(inserts)))})
 """
         args = tuple(inserts.values())
 
-        async with self._conn.cursor() as cur:
+        async with self._write() as cur:
             await cur.execute(stmt, args)
-            await self._conn.commit()
-            return cur.lastrowid
+            rowid = cur.lastrowid
+        return rowid
+
+    async def create_many(self, entries: List[Dict[str, Any]]) -> int:
+        """Create many blog entries in a single transaction"""
+        if not entries:
+            return 0
+
+        now = datetime.utcnow()
+        inserts = []
+        for entry in entries:
+            insert: Dict[str, Any] = {
+                'created': now,
+                'updated': now
+            }
+            insert.update(entry)
+            inserts.append(insert)
+
+        keys = tuple(inserts[0])
+        stmt = f"""
+INSERT INTO blog_entries({','.join(keys)})
+VALUES ({','.join('?' for _ in keys)})
+"""
+        args = []
+        for insert in inserts:
+            if tuple(insert) != keys:
+                raise ValueError('All entries must have the same fields')
+            args.append(tuple(insert.values()))
+
+        async with self._write('create_many') as cur:
+            await cur.executemany(stmt, args)
+        return len(args)
 
     async def read_by_id(
             self,
@@ -53,6 +118,21 @@ VALUES ({','.join('?' for _ in range(len(inserts)))})
         """Read a blog entry by id"""
         return await self.read_by_column('rowid', id_, columns)
 
+    async def read_updated(self, id_: int) -> Optional[datetime]:
+        """Read the time a blog entry was last updated, without reading the
+        entry itself"""
+        stmt = """
+SELECT updated
+FROM blog_entries
+WHERE rowid = ?
+"""
+        args = (id_,)
+
+        async with self._conn.cursor() as cur:
+            await cur.execute(stmt, args)
+            row = await cur.fetchone()
+            return row[0] if row is not None else None
+
     async def read_by_column(
             self,
             column: str,
@@ -99,6 +179,161 @@ LIMIT ?
             values = [unpack(row) async for row in cur]
             return values
 
+    async def iter_between_page(
+            self,
+            start_value: datetime,
+            end_value: datetime,
+            columns: Optional[List[str]],
+            limit: int,
+            cursor: Optional[str]
+    ) -> Tuple[AsyncIterator[Dict[str, Any]], Optional[str]]:
+        """Stream a page of blog entries between two dates.
+
+        The entries are ordered by the created date and id. A page starts
+        after the last entry of the previous page, so reading a page is an
+        index seek rather than an offset scan.
+
+        The keys of the page are read from the index first, so the cursor for
+        the next page is known before the entries are read and they can be
+        streamed. The page ends at the last of those keys rather than after a
+        number of entries, so an entry created while the page is being read
+        can't fall between two pages, and one created after the end of the
+        page isn't added to it.
+
+        :raises ValueError: If the limit is less than 1
+        :return: An async iterator of the entries, and a cursor for the next
+            page, or None if there are no more entries.
+        """
+        if limit < 1:
+            raise ValueError('The limit must be at least 1')
+
+        conditions = ['created BETWEEN ? AND ?']
+        args: List[Any] = [start_value, end_value]
+        if cursor:
+            conditions.append('(created,rowid) > (?,?)')
+            args.extend(decode_cursor(cursor, 2))
+
+        stmt = f"""
+SELECT created,rowid
+FROM blog_entries
+WHERE {' AND '.join(conditions)}
+ORDER BY created,rowid
+LIMIT ?
+"""
+        async with self._conn.cursor() as cur:
+            await cur.execute(stmt, (*args, limit + 1))
+            keys = await cur.fetchall()
+
+        if not keys:
+            return _no_entries(), None
+
+        last_created, last_id = keys[min(len(keys), limit) - 1]
+        conditions.append('(created,rowid) <= (?,?)')
+        args.extend((last_created, last_id))
+        next_cursor = (
+            encode_cursor(last_created, last_id) if len(keys) > limit
+            else None
+        )
+
+        return self._iter_where(conditions, args, columns), next_cursor
+
+    async def search_page(
+            self,
+            text: str,
+            limit: int,
+            cursor: Optional[str],
+            highlight: Tuple[str, str] = ('<mark>', '</mark>')
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Search the blog entries for the terms in the text.
+
+        The entries are ranked by bm25, with matches in the title weighted
+        above the description and the content. The snippet of the best
+        matching column is made by SQLite, then HTML escaped with the terms
+        highlighted, so it can be inserted into a page as HTML.
+
+        :return: The entries found, best first with the lowest score, and a
+            cursor for the next page, or None if there are no more entries.
+        """
+        match_query = make_match_query(text)
+        if not match_query:
+            return [], None
+
+        stmt = f"""
+SELECT id,title,description,created,snippet,score
+FROM (
+    SELECT
+        blog_entries.id AS id,
+        blog_entries.title AS title,
+        blog_entries.description AS description,
+        blog_entries.created AS created,
+        snippet(blog_entries_fts, -1, ?, ?, '…', 16) AS snippet,
+        bm25(blog_entries_fts, 10.0, 5.0, 1.0) AS score
+    FROM blog_entries_fts
+    JOIN blog_entries ON blog_entries.id = blog_entries_fts.rowid
+    WHERE blog_entries_fts MATCH ?
+)
+{'WHERE (score,id) > (?,?)' if cursor else ''}
+ORDER BY score,id
+LIMIT ?
+"""
+        args = (
+            SNIPPET_START,
+            SNIPPET_END,
+            match_query,
+            *(decode_cursor(cursor, 2) if cursor else ()),
+            limit + 1
+        )
+
+        async with self._conn.cursor() as cur:
+            await cur.execute(stmt, args)
+            unpack = _make_unpacker(cur)
+            values = [unpack(row) async for row in cur]
+        for value in values:
+            value['snippet'] = make_snippet(value['snippet'], highlight)
+
+        if len(values) <= limit:
+            return values, None
+        values = values[:limit]
+        last = values[-1]
+        return values, encode_cursor(last['score'], last['id'])
+
+    def iter_between(
+            self,
+            start_value: datetime,
+            end_value: datetime,
+            columns: Optional[List[str]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate over the blog entries between two dates.
+
+        The entries are yielded as they are fetched from the cursor, so they
+        are never all held in memory.
+        """
+        return self._iter_where(
+            ['created BETWEEN ? AND ?'],
+            [start_value, end_value],
+            columns
+        )
+
+    async def _iter_where(
+            self,
+            conditions: List[str],
+            args: List[Any],
+            columns: Optional[List[str]]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        stmt = f"""
+SELECT rowid AS id,{','.join(columns) if columns else '*'}
+FROM blog_entries
+WHERE {' AND '.join(conditions)}
+ORDER BY created,rowid
+"""
+        # The cursor is closed when the iterator is closed, even if it is
+        # not run to the end.
+        async with self._conn.cursor() as cur:
+            await cur.execute(stmt, args)
+            unpack = _make_unpacker(cur)
+            async for row in cur:
+                yield unpack(row)
+
     async def read_many(
             self,
             columns: Optional[List[str]],
@@ -133,10 +368,10 @@ SET {','.join(f'{key}=?' for key in updates)}
 WHERE rowid=?
 """
         args = *updates.values(), id_
-        async with self._conn.cursor() as cur:
+        async with self._write() as cur:
             await cur.execute(stmt, args)
-            await self._conn.commit()
-            return cur.rowcount == 1
+            rowcount = cur.rowcount
+        return rowcount == 1
 
     async def delete(self, id_: int) -> bool:
         """Delete a blog entry"""
@@ -145,23 +380,7 @@ DELETE FROM blog_entries
 WHERE rowid=?
 """
         args = (id_,)
-        async with self._conn.cursor() as cur:
+        async with self._write() as cur:
             await cur.execute(stmt, args)
-            await self._conn.commit()
-            return cur.rowcount == 1
-
-    async def initialise(self) -> None:
-        """Initialise the repository"""
-        await self._conn.execute("""
-CREATE TABLE IF NOT EXISTS blog_entries
-(
-    title TEXT NOT NULL,
-    description TEXT NULL,
-    content TEXT NULL,
-    created timestamp NOT NULL,
-    updated timestamp NOT NULL,
-
-    PRIMARY KEY(title)
-)
-""")
-        await self._conn.commit()
+            rowcount = cur.rowcount
+        return rowcount == 1
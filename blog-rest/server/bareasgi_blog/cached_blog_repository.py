@@ -0,0 +1,61 @@
+"""Cached Blog Repository"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import aiosqlite
+
+from .blog_repository import BlogRepository
+from .entity_cache import EntityCache
+
+
+class CachedBlogRepository(BlogRepository):
+    """A blog repository which caches the entries read by id.
+
+    Updates and deletes invalidate the cached entry. The cached entries are
+    shared between callers, so they must not be modified.
+    """
+
+    def __init__(self, conn: aiosqlite.Connection, cache: EntityCache) -> None:
+        super().__init__(conn)
+        self.cache = cache
+
+    async def read_by_id(
+            self,
+            id_: int,
+            columns: Optional[List[str]]
+    ) -> Optional[Dict[str, Any]]:
+        if columns:
+            return await super().read_by_id(id_, columns)
+
+        entry = self.cache.get(id_)
+        if entry is not None:
+            return entry
+
+        generation = self.cache.generation
+        entry = await super().read_by_id(id_, None)
+        if entry is not None:
+            self.cache.put(id_, entry, generation)
+        return entry
+
+    async def read_updated(self, id_: int) -> Optional[datetime]:
+        # This decides whether a client's copy is current, so it is read from
+        # the database: another worker may have changed the entry. A cached
+        # entry which is older is dropped, so the next read gets the change.
+        updated = await super().read_updated(id_)
+        entry = self.cache.get(id_)
+        if entry is not None and entry['updated'] != updated:
+            self.cache.invalidate(id_)
+        return updated
+
+    async def update(self, id_: int, **kwargs) -> bool:
+        try:
+            return await super().update(id_, **kwargs)
+        finally:
+            self.cache.invalidate(id_)
+
+    async def delete(self, id_: int) -> bool:
+        try:
+            return await super().delete(id_)
+        finally:
+            self.cache.invalidate(id_)
@@ -0,0 +1,80 @@
+"""Streaming JSON writers"""
+
+from typing import Any, AsyncIterable, AsyncIterator, Callable, List
+
+from . import serializer
+
+
+async def _aclose(values: AsyncIterable[Any]) -> None:
+    # A response body is abandoned when the client disconnects, so the values
+    # are closed here rather than left for the garbage collector, which
+    # releases the database cursor they are read from.
+    aclose = getattr(values, 'aclose', None)
+    if aclose is not None:
+        await aclose()
+
+
+async def json_array_writer(
+        values: AsyncIterable[Any],
+        dumps: Callable[[Any], bytes] = serializer.dumps,
+        chunk_size: int = 64
+) -> AsyncIterator[bytes]:
+    """Write values as a JSON array, sending a chunk as each group of values
+    arrives.
+
+    :param values: The values to write
+    :type values: AsyncIterable[Any]
+    :param dumps: The function to serialize a value, defaults to
+        serializer.dumps
+    :type dumps: Callable[[Any], bytes], optional
+    :param chunk_size: The number of values in each chunk, defaults to 64
+    :type chunk_size: int, optional
+    :return: An async iterator of the body chunks
+    :rtype: AsyncIterator[bytes]
+    """
+    separator = b'['
+    parts: List[bytes] = []
+    try:
+        async for value in values:
+            parts.append(separator)
+            parts.append(dumps(value))
+            separator = b','
+            if len(parts) >= 2 * chunk_size:
+                yield b''.join(parts)
+                parts = []
+    finally:
+        await _aclose(values)
+    parts.append(b'[]' if separator == b'[' else b']')
+    yield b''.join(parts)
+
+
+async def ndjson_writer(
+        values: AsyncIterable[Any],
+        dumps: Callable[[Any], bytes] = serializer.dumps,
+        chunk_size: int = 64
+) -> AsyncIterator[bytes]:
+    """Write values as newline delimited JSON, sending a chunk as each group
+    of values arrives.
+
+    :param values: The values to write
+    :type values: AsyncIterable[Any]
+    :param dumps: The function to serialize a value, defaults to
+        serializer.dumps
+    :type dumps: Callable[[Any], bytes], optional
+    :param chunk_size: The number of values in each chunk, defaults to 64
+    :type chunk_size: int, optional
+    :return: An async iterator of the body chunks
+    :rtype: AsyncIterator[bytes]
+    """
+    parts: List[bytes] = []
+    try:
+        async for value in values:
+            parts.append(dumps(value))
+            parts.append(b'\n')
+            if len(parts) >= 2 * chunk_size:
+                yield b''.join(parts)
+                parts = []
+    finally:
+        await _aclose(values)
+    if parts:
+        yield b''.join(parts)
@@ -0,0 +1,62 @@
+"""JSON Serializer
+
+The responses are serialized with orjson when it is installed, and with an
+encoder from the standard library otherwise. Either way the values are
+written directly to bytes, and datetimes are written in ISO 8601 format.
+"""
+
+from datetime import datetime
+import json
+from typing import Any, Callable, Dict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+# The encoder is made once rather than for each call, as json.dumps does when
+# given an encoder class. The values are rows and lists of rows, which can't
+# be circular, so the check for circular references is skipped.
+_ENCODER = json.JSONEncoder(
+    default=_default,
+    check_circular=False,
+    separators=(',', ':')
+)
+
+
+def json_dumps(value: Any) -> bytes:
+    """Serialize a value to JSON with the standard library
+
+    :param value: The value to serialize
+    :type value: Any
+    :return: The JSON as UTF-8
+    :rtype: bytes
+    """
+    return _ENCODER.encode(value).encode()
+
+
+def orjson_dumps(value: Any) -> bytes:
+    """Serialize a value to JSON with orjson
+
+    :param value: The value to serialize
+    :type value: Any
+    :return: The JSON as UTF-8
+    :rtype: bytes
+    """
+    return orjson.dumps(value)
+
+
+SERIALIZERS: Dict[str, Callable[[Any], bytes]] = {'json': json_dumps}
+if orjson is not None:
+    SERIALIZERS['orjson'] = orjson_dumps
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+dumps: Callable[[Any], bytes] = SERIALIZERS[BACKEND]
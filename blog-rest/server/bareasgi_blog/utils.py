@@ -0,0 +1,222 @@
+"""Utilities"""
+
+import base64
+from datetime import datetime
+import html
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Tuple
+
+from bareasgi import HttpResponse
+from bareutils import bytes_writer
+
+from . import serializer
+
+MAX_NDJSON_LINE_LENGTH = 1024 * 1024
+
+
+class NdjsonError(ValueError):
+    """An invalid line in newline delimited JSON"""
+
+    def __init__(self, line: int, message: str) -> None:
+        """Initialise the error
+
+        :param line: The number of the line, counting from 1
+        :type line: int
+        :param message: The error message
+        :type message: str
+        """
+        super().__init__(f'Line {line}: {message}')
+        self.line = line
+
+
+def _ndjson_loads(line: int, text: bytes) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError as error:
+        raise NdjsonError(line, str(error)) from error
+
+
+async def ndjson_reader(
+        content: AsyncIterable[bytes],
+        max_line_length: int = MAX_NDJSON_LINE_LENGTH
+) -> AsyncIterator[Tuple[int, Any]]:
+    """Read newline delimited JSON from the body of a request.
+
+    The values are yielded as each line arrives, and a line is gathered from
+    the pieces of the chunks it spans, so only the current line is held in
+    memory.
+
+    :param content: The request body
+    :type content: AsyncIterable[bytes]
+    :param max_line_length: The maximum length of a line in bytes, defaults
+        to MAX_NDJSON_LINE_LENGTH
+    :type max_line_length: int, optional
+    :raises NdjsonError: If a line is not valid JSON, or is too long
+    :return: An async iterator of the line numbers and decoded values
+    :rtype: AsyncIterator[Tuple[int, Any]]
+    """
+    pieces: List[bytes] = []
+    length = 0
+    line = 1
+    async for chunk in content:
+        start = 0
+        while True:
+            end = chunk.find(b'\n', start)
+            piece = chunk[start:] if end == -1 else chunk[start:end]
+            length += len(piece)
+            if length > max_line_length:
+                raise NdjsonError(line, f'Longer than {max_line_length} bytes')
+            pieces.append(piece)
+            if end == -1:
+                break
+            text = b''.join(pieces)
+            if text.strip():
+                yield line, _ndjson_loads(line, text)
+            pieces, length = [], 0
+            line += 1
+            start = end + 1
+    text = b''.join(pieces)
+    if text.strip():
+        yield line, _ndjson_loads(line, text)
+
+
+def make_import_entry(line: int, value: Dict[str, Any]) -> Dict[str, Any]:
+    """Make a blog entry to import from a line of newline delimited JSON
+
+    :param line: The number of the line
+    :type line: int
+    :param value: The decoded line
+    :type value: Dict[str, Any]
+    :raises NdjsonError: If the value is not a valid blog entry
+    :return: The blog entry
+    :rtype: Dict[str, Any]
+    """
+    try:
+        entry: Dict[str, Any] = {}
+        if 'created' in value:
+            entry['created'] = datetime.fromisoformat(value['created'])
+            entry['updated'] = datetime.fromisoformat(
+                value.get('updated', value['created'])
+            )
+        entry['title'] = value['title']
+        entry['description'] = value.get('description')
+        entry['content'] = value.get('content')
+        return entry
+    except (AttributeError, KeyError, TypeError, ValueError) as error:
+        raise NdjsonError(line, f'Invalid blog entry: {error!r}') from error
+
+
+def import_failed(
+        count: int,
+        line: int,
+        resume_from: int,
+        error: str
+) -> HttpResponse:
+    """Make the response to an import which failed
+
+    :param count: The number of entries imported
+    :type count: int
+    :param line: The line which failed
+    :type line: int
+    :param resume_from: The line to resume the import from
+    :type resume_from: int
+    :param error: The error
+    :type error: str
+    :return: A 400 response with the details as JSON
+    :rtype: HttpResponse
+    """
+    return (
+        400,
+        [(b'content-type', b'application/json')],
+        bytes_writer(serializer.dumps({
+            'count': count,
+            'line': line,
+            'resume_from': resume_from,
+            'error': error
+        }))
+    )
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the keyset values of the last row of a page as an opaque cursor.
+
+    :return: The cursor
+    :rtype: str
+    """
+    text = json.dumps(
+        [
+            {'datetime': value.isoformat()} if isinstance(value, datetime)
+            else value
+            for value in values
+        ],
+        separators=(',', ':')
+    )
+    return base64.urlsafe_b64encode(text.encode()).rstrip(b'=').decode()
+
+
+def _decode_cursor_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value['datetime'])
+    if isinstance(value, list):
+        raise ValueError('Invalid cursor value')
+    return value
+
+
+def decode_cursor(cursor: str, count: int) -> List[Any]:
+    """Decode a cursor created by encode_cursor
+
+    :param cursor: The cursor
+    :type cursor: str
+    :param count: The number of keyset values expected
+    :type count: int
+    :raises ValueError: If the cursor is invalid
+    :return: The keyset values
+    :rtype: List[Any]
+    """
+    try:
+        text = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(text)
+        if not isinstance(values, list) or len(values) != count:
+            raise ValueError('Invalid cursor')
+        return [_decode_cursor_value(value) for value in values]
+    except (KeyError, TypeError, ValueError) as error:
+        raise ValueError('Invalid cursor') from error
+
+
+# The snippet is made with these markers around the terms, which are replaced
+# with the highlight after the text has been escaped, so the markup in a blog
+# entry is never sent as markup.
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+
+
+def make_snippet(text: str, highlight: Tuple[str, str]) -> str:
+    """Make a search snippet safe to show as HTML
+
+    :param text: The snippet with the terms between SNIPPET_START and
+        SNIPPET_END
+    :type text: str
+    :param highlight: The markup to put before and after the terms
+    :type highlight: Tuple[str, str]
+    :return: The escaped snippet with the terms highlighted
+    :rtype: str
+    """
+    start, end = highlight
+    escaped = html.escape(text)
+    return escaped.replace(SNIPPET_START, start).replace(SNIPPET_END, end)
+
+
+def make_match_query(text: str) -> str:
+    """Make an FTS5 query which matches all the terms in a search
+
+    Each term is quoted, so the user's text can't use the FTS5 query syntax.
+
+    :param text: The search text
+    :type text: str
+    :return: The query
+    :rtype: str
+    """
+    return ' '.join(
+        '"' + term.replace('"', '""') + '"'
+        for term in text.split()
+    )
@@ -0,0 +1,44 @@
+"""Tests for the blog controller"""
+
+import asyncio
+import sqlite3
+
+import aiosqlite
+import pytest
+
+from bareasgi_blog.blog_controller import BlogController
+from bareasgi_blog.blog_repository import BlogRepository
+from bareasgi_blog.migrations import migrate
+
+
+@pytest.mark.parametrize(
+    'query_string',
+    [
+        b'cursor=!!!',
+        b'cursor=NQ',
+        b'cursor=WzEsMiwzXQ',
+        b'cursor=eyJ4IjoxfQ'
+    ]
+)
+def test_bad_cursor_is_a_bad_request(query_string):
+    """A cursor which can't be decoded is a bad request"""
+    async def run():
+        conn = await aiosqlite.connect(
+            ':memory:',
+            detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
+        )
+        try:
+            await migrate(conn)
+            controller = BlogController(BlogRepository(conn))
+            # pylint: disable=protected-access
+            scope = {'path': '/blog/api/post', 'query_string': query_string}
+            assert await controller._read_between(scope, {}, {}, None) == 400
+            scope = {
+                'path': '/blog/api/search',
+                'query_string': b'q=entry&' + query_string
+            }
+            assert await controller._search(scope, {}, {}, None) == 400
+        finally:
+            await conn.close()
+
+    asyncio.run(run())
@@ -0,0 +1,217 @@
+"""Tests for the blog repository"""
+
+import asyncio
+from datetime import datetime, timedelta
+import sqlite3
+
+import aiosqlite
+import pytest
+
+from bareasgi_blog.blog_repository import BlogRepository
+from bareasgi_blog.migrations import migrate
+
+
+async def _open_repository() -> BlogRepository:
+    conn = await aiosqlite.connect(
+        ':memory:',
+        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
+    )
+    await migrate(conn)
+    return BlogRepository(conn)
+
+
+async def _titles(repository: BlogRepository):
+    return [
+        entry['title']
+        for entry in await repository.read_many(None, 'id', True, 100)
+    ]
+
+
+def test_failed_create_many_rolls_back_only_the_batch():
+    """A batch which fails is rolled back, and nothing else is"""
+    async def run():
+        repository = await _open_repository()
+        try:
+            await repository.create(title='first')
+            with pytest.raises(sqlite3.IntegrityError):
+                await repository.create_many(
+                    [{'title': 'second'}, {'title': 'first'}]
+                )
+            assert await _titles(repository) == ['first']
+        finally:
+            await repository._conn.close()  # pylint: disable=protected-access
+
+    asyncio.run(run())
+
+
+def test_concurrent_create_survives_failed_create_many():
+    """A write made while a batch is being inserted is not rolled back with
+    it"""
+    async def run():
+        repository = await _open_repository()
+        try:
+            rows = [{'title': f'entry{i}'} for i in range(1000)]
+            rows.append({'title': 'entry0'})
+            batch = asyncio.ensure_future(repository.create_many(rows))
+            created = asyncio.ensure_future(repository.create(title='single'))
+            results = await asyncio.gather(
+                batch,
+                created,
+                return_exceptions=True
+            )
+            assert isinstance(results[0], sqlite3.IntegrityError)
+            assert isinstance(results[1], int)
+            assert await _titles(repository) == ['single']
+        finally:
+            await repository._conn.close()  # pylint: disable=protected-access
+
+    asyncio.run(run())
+
+
+def test_pages_cover_every_entry_once():
+    """Following the cursors reads every entry once, in order"""
+    async def run():
+        repository = await _open_repository()
+        try:
+            start = datetime(2020, 1, 1)
+            await repository.create_many([
+                {
+                    'title': f'entry{i}',
+                    'created': start + timedelta(minutes=i // 2),
+                    'updated': start
+                }
+                for i in range(10)
+            ])
+
+            ids, cursors = [], []
+            cursor = None
+            while True:
+                entries, cursor = await repository.iter_between_page(
+                    start,
+                    start + timedelta(days=1),
+                    ['title'],
+                    3,
+                    cursor
+                )
+                page = [entry['id'] async for entry in entries]
+                assert len(page) <= 3
+                ids.extend(page)
+                if cursor is None:
+                    break
+                cursors.append(cursor)
+
+            assert ids == list(range(1, 11))
+            assert len(cursors) == 3
+        finally:
+            await repository._conn.close()  # pylint: disable=protected-access
+
+    asyncio.run(run())
+
+
+def test_page_ends_at_its_cursor():
+    """An entry created while a page is being read can't fall between the
+    pages"""
+    async def run():
+        repository = await _open_repository()
+        try:
+            start = datetime(2020, 1, 1)
+            await repository.create_many([
+                {
+                    'title': f'entry{i}',
+                    'created': start + timedelta(minutes=2 * i),
+                    'updated': start
+                }
+                for i in range(4)
+            ])
+            end = start + timedelta(days=1)
+
+            entries, cursor = await repository.iter_between_page(
+                start, end, ['title'], 2, None
+            )
+            await repository.create(
+                title='inserted',
+                created=start + timedelta(minutes=1)
+            )
+            first = [entry['title'] async for entry in entries]
+            entries, _ = await repository.iter_between_page(
+                start, end, ['title'], 2, cursor
+            )
+            second = [entry['title'] async for entry in entries]
+
+            assert first == ['entry0', 'inserted', 'entry1']
+            assert second == ['entry2', 'entry3']
+        finally:
+            await repository._conn.close()  # pylint: disable=protected-access
+
+    asyncio.run(run())
+
+
+def test_last_page_ends_at_its_last_entry():
+    """An entry created after the last page was started isn't added to it"""
+    async def run():
+        repository = await _open_repository()
+        try:
+            start = datetime(2020, 1, 1)
+            for i in range(2):
+                await repository.create(
+                    title=f'entry{i}',
+                    created=start + timedelta(minutes=i)
+                )
+            end = start + timedelta(days=1)
+
+            entries, cursor = await repository.iter_between_page(
+                start, end, ['title'], 2, None
+            )
+            await repository.create(
+                title='inserted',
+                created=start + timedelta(minutes=2)
+            )
+            assert cursor is None
+            assert [entry['title'] async for entry in entries] == [
+                'entry0',
+                'entry1'
+            ]
+
+            entries, cursor = await repository.iter_between_page(
+                end, end + timedelta(days=1), ['title'], 2, None
+            )
+            await repository.create(title='later', created=end)
+            assert cursor is None
+            assert [entry async for entry in entries] == []
+        finally:
+            await repository._conn.close()  # pylint: disable=protected-access
+
+    asyncio.run(run())
+
+
+def test_search_ranks_and_escapes_snippets():
+    """The title is weighted above the content, and the snippet is escaped
+    with only the terms marked up"""
+    async def run():
+        repository = await _open_repository()
+        try:
+            await repository.create(
+                title='Other',
+                content='<script>alert("zebra")</script> & more'
+            )
+            await repository.create(title='Zebra', content='nothing')
+
+            entries, cursor = await repository.search_page('zebra', 10, None)
+            assert cursor is None
+            assert [entry['title'] for entry in entries] == ['Zebra', 'Other']
+            snippet = entries[1]['snippet']
+            assert '<script>' not in snippet
+            assert (
+                '&lt;script&gt;alert(&quot;<mark>zebra</mark>&quot;)'
+                '&lt;/script&gt; &amp; more'
+            ) in snippet
+
+            entries, cursor = await repository.search_page('zebra', 1, None)
+            assert len(entries) == 1 and cursor is not None
+            entries, cursor = await repository.search_page('zebra', 1, cursor)
+            assert [entry['title'] for entry in entries] == ['Other']
+            assert cursor is None
+        finally:
+            await repository._conn.close()  # pylint: disable=protected-access
+
+    asyncio.run(run())
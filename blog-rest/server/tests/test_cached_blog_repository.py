@@ -0,0 +1,36 @@
+"""Tests for the cached blog repository"""
+
+import asyncio
+from datetime import datetime
+import sqlite3
+
+import aiosqlite
+
+from bareasgi_blog.cached_blog_repository import CachedBlogRepository
+from bareasgi_blog.entity_cache import EntityCache
+from bareasgi_blog.migrations import migrate
+
+
+def test_read_updated_ignores_a_stale_cached_entry():
+    """The update time is read from the database, and a cached entry which
+    is older, as it would be after another worker's write, is dropped"""
+    async def run():
+        conn = await aiosqlite.connect(
+            ':memory:',
+            detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
+        )
+        try:
+            await migrate(conn)
+            repository = CachedBlogRepository(conn, EntityCache(16))
+            id_ = await repository.create(title='one')
+            entry = await repository.read_by_id(id_, None)
+
+            stale = dict(entry, updated=datetime(2000, 1, 1))
+            repository.cache.put(id_, stale, repository.cache.generation)
+
+            assert await repository.read_updated(id_) == entry['updated']
+            assert repository.cache.get(id_) is None
+        finally:
+            await conn.close()
+
+    asyncio.run(run())
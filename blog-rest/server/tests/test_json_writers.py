@@ -0,0 +1,61 @@
+"""Tests for the streaming JSON writers"""
+
+import asyncio
+import json
+
+from bareasgi_blog.json_writers import json_array_writer, ndjson_writer
+
+
+class _Values:
+    """An async iterator which records whether it was closed"""
+
+    def __init__(self, count: int) -> None:
+        self.count = count
+        self.closed = False
+
+    def __aiter__(self):
+        return self._generate()
+
+    async def _generate(self):
+        try:
+            for i in range(self.count):
+                yield {'id': i}
+        finally:
+            self.closed = True
+
+
+async def _read(writer):
+    return b''.join([chunk async for chunk in writer])
+
+
+def test_json_array_writer():
+    """The values are written as a JSON array"""
+    assert json.loads(asyncio.run(_read(json_array_writer(_aiter(0))))) == []
+    body = asyncio.run(_read(json_array_writer(_aiter(200), chunk_size=16)))
+    assert json.loads(body) == [{'id': i} for i in range(200)]
+
+
+def test_ndjson_writer():
+    """The values are written one per line"""
+    body = asyncio.run(_read(ndjson_writer(_aiter(3))))
+    assert body == b'{"id":0}\n{"id":1}\n{"id":2}\n'
+
+
+def test_writers_close_the_values_when_abandoned():
+    """Closing a writer part way through closes the values it reads"""
+    async def run(writer_factory):
+        values = _Values(1000)
+        source = values.__aiter__()
+        writer = writer_factory(source, chunk_size=16)
+        await writer.__anext__()
+        assert not values.closed
+        await writer.aclose()
+        return values.closed
+
+    assert asyncio.run(run(json_array_writer))
+    assert asyncio.run(run(ndjson_writer))
+
+
+async def _aiter(count: int):
+    for i in range(count):
+        yield {'id': i}
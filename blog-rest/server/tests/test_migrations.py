@@ -0,0 +1,82 @@
+"""Tests for the migrations"""
+
+import asyncio
+from datetime import datetime
+import sqlite3
+
+import aiosqlite
+import pytest
+
+from bareasgi_blog.blog_repository import BlogRepository
+from bareasgi_blog.migrations import MIGRATIONS, Migration, migrate
+
+
+async def _connect() -> aiosqlite.Connection:
+    return await aiosqlite.connect(
+        ':memory:',
+        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
+    )
+
+
+async def _version(conn: aiosqlite.Connection) -> int:
+    async with conn.execute('PRAGMA user_version') as cur:
+        version, = await cur.fetchone()
+    return version
+
+
+def test_entries_are_kept_through_the_migrations():
+    """Entries written by the first schema are keyed, indexed and searchable
+    after the rest of the migrations"""
+    async def run():
+        conn = await _connect()
+        try:
+            assert await migrate(conn, MIGRATIONS[:1]) == 1
+            now = datetime(2020, 1, 1)
+            await conn.execute(
+                """
+INSERT INTO blog_entries(title, description, content, created, updated)
+VALUES (?, ?, ?, ?, ?)
+""",
+                ('First', 'The first entry', 'about zebras', now, now)
+            )
+            await conn.commit()
+
+            assert await migrate(conn) == MIGRATIONS[-1].version
+            assert await migrate(conn) == MIGRATIONS[-1].version
+
+            repository = BlogRepository(conn)
+            entry = await repository.read_by_id(1, None)
+            assert entry['title'] == 'First' and entry['created'] == now
+            entries, _ = await repository.search_page('zebra', 10, None)
+            assert [entry['title'] for entry in entries] == ['First']
+        finally:
+            await conn.close()
+
+    asyncio.run(run())
+
+
+def test_failed_migration_is_rolled_back():
+    """A migration which fails leaves the schema at the previous version"""
+    async def run():
+        conn = await _connect()
+        try:
+            failing = Migration(
+                MIGRATIONS[-1].version + 1,
+                'Fail part way through',
+                """
+CREATE TABLE partial(id INTEGER PRIMARY KEY);
+INSERT INTO missing VALUES (1);
+"""
+            )
+            with pytest.raises(sqlite3.OperationalError):
+                await migrate(conn, [*MIGRATIONS, failing])
+
+            assert await _version(conn) == MIGRATIONS[-1].version
+            async with conn.execute(
+                "SELECT name FROM sqlite_master WHERE name = 'partial'"
+            ) as cur:
+                assert await cur.fetchone() is None
+        finally:
+            await conn.close()
+
+    asyncio.run(run())
@@ -0,0 +1,48 @@
+"""Tests for the utilities"""
+
+import asyncio
+
+import pytest
+
+from bareasgi_blog.utils import (
+    MAX_NDJSON_LINE_LENGTH,
+    NdjsonError,
+    ndjson_reader
+)
+
+
+async def _chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _read(*chunks: bytes, max_line_length=MAX_NDJSON_LINE_LENGTH):
+    return [
+        value
+        async for value in ndjson_reader(_chunks(*chunks), max_line_length)
+    ]
+
+
+def test_ndjson_reader_numbers_lines():
+    """The values are read across chunks, with their line numbers"""
+    values = asyncio.run(_read(b'{"a":', b'1}\n\n{"b":2}\n', b'{"c":3}'))
+    assert values == [(1, {'a': 1}), (3, {'b': 2}), (4, {'c': 3})]
+
+
+def test_ndjson_reader_reports_invalid_line():
+    """An invalid line raises an error with its line number"""
+    with pytest.raises(NdjsonError) as error:
+        asyncio.run(_read(b'{"a":1}\n\n{bad\n{"c":3}\n'))
+    assert error.value.line == 3
+
+
+def test_ndjson_reader_refuses_long_line():
+    """A line longer than the maximum raises an error with its line number,
+    even when it spans chunks"""
+    values = asyncio.run(_read(b'[1,2,3]\n', b'"abcdef"', max_line_length=8))
+    assert values == [(1, [1, 2, 3]), (2, 'abcdef')]
+    with pytest.raises(NdjsonError) as error:
+        asyncio.run(
+            _read(b'[1,2,3]\n[1,', b'2,3,', b'4]\n', max_line_length=8)
+        )
+    assert error.value.line == 2